@@ -0,0 +1,17 @@
+from app import app, db
+from sqlalchemy import text
+
+with app.app_context():
+    try:
+        db.session.execute(text("""
+            ALTER TABLE bestellungen
+            ADD COLUMN IF NOT EXISTS status_geprueft_am TIMESTAMP,
+            ADD COLUMN IF NOT EXISTS naechste_pruefung_am TIMESTAMP,
+            ADD COLUMN IF NOT EXISTS pruef_fehler INTEGER DEFAULT 0;
+        """))
+
+        db.session.commit()
+        print("✅ Poller-Spalten wurden hinzugefügt!")
+
+    except Exception as e:
+        print("⚠️ Fehler:", e)
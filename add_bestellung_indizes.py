@@ -0,0 +1,22 @@
+
+from app import app, db
+from sqlalchemy import text
+
+# Indizes für die Admin-Bestellliste (Keyset-Paging + Filter)
+INDIZES = [
+    "CREATE INDEX IF NOT EXISTS ix_bestellungen_bestelldatum_id ON bestellungen (bestelldatum, id)",
+    "CREATE INDEX IF NOT EXISTS ix_bestellungen_collectkey ON bestellungen (collectkey)",
+    "CREATE INDEX IF NOT EXISTS ix_bestellungen_moluna_status ON bestellungen (moluna_status)",
+    "CREATE INDEX IF NOT EXISTS ix_bestellpositionen_bestellung_id ON bestellpositionen (bestellung_id)",
+]
+
+with app.app_context():
+    try:
+        for sql in INDIZES:
+            db.session.execute(text(sql))
+
+        db.session.commit()
+        print("✅ Alle Indizes wurden angelegt!")
+
+    except Exception as e:
+        print("⚠️ Fehler:", e)
@@ -0,0 +1,21 @@
+
+from app import app, db
+from sqlalchemy import text
+
+with app.app_context():
+    try:
+        db.session.execute(text("""
+            ALTER TABLE bestellungen
+            ADD COLUMN IF NOT EXISTS paypal_order_id VARCHAR(50),
+            ADD COLUMN IF NOT EXISTS paypal_capture_id VARCHAR(50),
+            ADD COLUMN IF NOT EXISTS bezahlt_am TIMESTAMP;
+        """))
+        db.session.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_bestellungen_paypal_order_id ON bestellungen (paypal_order_id)"
+        ))
+
+        db.session.commit()
+        print("✅ PayPal-Spalten wurden hinzugefügt!")
+
+    except Exception as e:
+        print("⚠️ Fehler:", e)
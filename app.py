@@ -1,35 +1,57 @@
 
 import os
 import json
+import hashlib
 import logging
 from datetime import datetime
 from dotenv import load_dotenv
-import requests
 import uuid
+import time
+import threading
 
 
 from flask import (
     Flask, render_template, request,
     redirect, flash, abort,
-    session, url_for, jsonify
+    session, url_for, jsonify, make_response, send_from_directory
 )
 
 from flask_sqlalchemy import SQLAlchemy
-from flask_wtf.csrf import CSRFProtect
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail
+from sqlalchemy import or_, func, update, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
+from flask_wtf.csrf import CSRFProtect, generate_csrf
 
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 
 # Modelle importieren
-from models import db, Bestellung, BestellPosition, NewsletterSubscriber, Gutschein, User
+from models import (
+    db, Bestellung, BestellPosition, NewsletterSubscriber, Gutschein, User,
+    SyncLauf, BestellAusgang, PayPalEreignis, NewsletterVersand, MailAuftrag
+)
+from katalog import Katalog
+from buchbutler_client import standard_client
+from paypal_client import PayPalClient, token_cache
+from buchbutler_sync import SyncEngine, delta, sync_felder
+from hintergrund import im_hintergrund, beim_ersten_request, periodisch, UpstreamPool
+from cache import SqliteCache, KurzzeitCache
+from sitzung import DbSitzungInterface, sitzungen_aufraeumen
+from seitencache import SeitenCache, nicht_cachen
+from bilder import BildManifest
+from assets import AssetManifest
+from leseproben import LESEPROBEN_ORDNER, LeseprobenVorschau
+from suchindex import praefix_normalisieren
+from mailversand import (
+    BATCH_MAX, ABMELDE_PLATZHALTER,
+    email_senden, newsletter_batch_senden, konfiguriert as mail_konfiguriert
+)
 
 from datetime import timedelta
 
-from functools import lru_cache
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, wait
 
-import re
 
 
 
@@ -78,6 +100,22 @@ db.init_app(app)
 with app.app_context():
     db.create_all()
 
+# Session-Inhalt in der DB, im Cookie nur eine zufällige ID
+app.session_interface = DbSitzungInterface()
+
+# {{ bild(pfad, alt=…, sizes=…) }} → <picture> mit AVIF/WebP-Varianten (bilder_bauen.py)
+bild_manifest = BildManifest(app.static_folder)
+app.jinja_env.globals["bild"] = bild_manifest.bild
+
+# url_for('static', …) → ?v=<content-hash>, immutable + .br/.gz (assets_bauen.py)
+asset_manifest = AssetManifest(app.static_folder)
+app.url_defaults(asset_manifest.url_defaults)
+app.view_functions["static"] = asset_manifest.ausliefern
+
+# {{ leseprobe_vorschau(pdf) }} → Bild der ersten Seite (leseproben_bauen.py)
+leseproben_vorschau = LeseprobenVorschau(app.static_folder)
+app.jinja_env.globals["leseprobe_vorschau"] = leseproben_vorschau.vorschau
+
 
 
 
@@ -85,7 +123,6 @@ with app.app_context():
 
 ADMIN_PASSWORD = os.getenv("FLASK_ADMIN_PASSWORD")
 
-SENDGRID_API_KEY = os.getenv("SENDGRID_API_KEY")
 EMAIL_SENDER = os.getenv("EMAIL_SENDER")
 
 logging.basicConfig(level=logging.INFO)
@@ -99,14 +136,35 @@ csrf = CSRFProtect(app)
 
 
 
-BUCHBUTLER_USER = os.getenv("BUCHBUTLER_USER")
-BUCHBUTLER_PASSWORD = os.getenv("BUCHBUTLER_PASSWORD")
+# Zugangsdaten, Connection-Pool, Timeouts und Retries stecken im Client
+buchbutler = standard_client()
 
 BUCHBUTLER_MOL_KUNDE_ID = os.getenv("BUCHBUTLER_MOL_KUNDE_ID")
 BUCHBUTLER_RECHNUNGSADRESSE_ID = os.getenv("BUCHBUTLER_RECHNUNGSADRESSE_ID", "1")
 BUCHBUTLER_VERKAUFSKANAL_ID = os.getenv("BUCHBUTLER_VERKAUFSKANAL_ID", "1")
 
-BASE_URL = "https://api.buchbutler.de"
+# CONTENT ändert sich selten → geteilter Cache für alle Worker auf dem Host
+content_cache = SqliteCache(
+    os.getenv(
+        "CONTENT_CACHE_PFAD",
+        os.path.join(tempfile.gettempdir(), "ibk-content-cache.sqlite3")
+    ),
+    ttl=int(os.getenv("CONTENT_CACHE_TTL", str(6 * 3600))),
+    stale=int(os.getenv("CONTENT_CACHE_STALE", str(7 * 24 * 3600)))
+)
+
+# Preis/Bestand: kurze TTL, gleichzeitige Anfragen pro EAN teilen sich einen Call
+movement_cache = KurzzeitCache(ttl=int(os.getenv("MOVEMENT_CACHE_TTL", "60")))
+
+# Gemeinsamer Pool für parallele Upstream-Calls aus Requests heraus –
+# begrenzt, damit ein langsamer Upstream keinen endlosen Rückstau aufbaut
+upstream_pool = UpstreamPool(
+    max_threads=int(os.getenv("UPSTREAM_THREADS", "8")),
+    max_wartend=int(os.getenv("UPSTREAM_WARTEND", "32"))
+)
+
+# Budget für CONTENT auf der Produktseite bzw. MOVEMENT in der Verfügbarkeits-API (Sekunden)
+PRODUKT_DEADLINE = float(os.getenv("PRODUKT_DEADLINE", "4"))
 
 
 
@@ -117,11 +175,55 @@ BASE_URL = "https://api.buchbutler.de"
 basedir = os.path.abspath(os.path.dirname(__file__))
 json_path = os.path.join(basedir, "produkte.json")
 
-if os.path.exists(json_path):
-    with open(json_path, encoding="utf-8") as f:
-        produkte = json.load(f)
-else:
-    produkte = []
+katalog = Katalog.laden(json_path)
+
+
+@app.before_request
+def katalog_aktualisieren():
+    # Änderungen anderer Gunicorn-Worker (Journal) übernehmen
+    katalog.neu_laden_falls_geaendert()
+
+
+# =====================================================
+# SEITEN-CACHE (anonyme Katalog- und Infoseiten)
+# =====================================================
+
+seiten_cache = SeitenCache(
+    max_eintraege=int(os.getenv("SEITEN_CACHE_EINTRAEGE", "256")),
+    max_bytes=int(os.getenv("SEITEN_CACHE_MB", "32")) * 1024 * 1024
+)
+
+# csrf_token() darf in gecachten Seiten nicht vorkommen
+# (Flask-WTF setzt csrf_token als Global und per Context-Processor)
+app.jinja_env.globals["csrf_token"] = seiten_cache.csrf_token
+
+
+@app.context_processor
+def seiten_cache_csrf():
+    return {"csrf_token": seiten_cache.csrf_token}
+
+
+@app.route("/csrf-token")
+@limiter.limit("30 per minute")
+def csrf_token_holen():
+    """Token für Formulare mit data-csrf (static/js/csrf.js), nie gecacht"""
+    token = generate_csrf()
+    # Hier wird wirklich abgeschickt → Session trotz NUR_TECHNISCH anlegen
+    session.behalten = True
+    response = jsonify({"csrf_token": token})
+    response.headers["Cache-Control"] = "no-store"
+    return response
+
+
+def seiten_version():
+    return katalog.version
+
+
+def seiten_variation():
+    return session.get("user_email")
+
+
+seite_cachen = seiten_cache.seite(seiten_version, seiten_variation)
 
 
 
@@ -142,30 +244,16 @@ def create_gutschein_order():
         if wert < 5:
             return jsonify({"error": "Mindestwert 5€"}), 400
 
-        access_token = paypal_access_token()
-
-        if not access_token:
-            return jsonify({"error": "Kein PayPal Token"}), 500
-
-        response = requests.post(
-            f"{PAYPAL_BASE}/v2/checkout/orders",
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {access_token}",
-            },
-            json={
-                "intent": "CAPTURE",
-                "purchase_units": [{
-                    "amount": {
-                        "currency_code": "EUR",
-                        "value": f"{wert:.2f}"
-                    },
-                    "description": "Geschenkgutschein"
-                }]
-            }
-        )
-
-        order = response.json()
+        order = paypal.bestellung_anlegen({
+            "intent": "CAPTURE",
+            "purchase_units": [{
+                "amount": {
+                    "currency_code": "EUR",
+                    "value": f"{wert:.2f}"
+                },
+                "description": "Geschenkgutschein"
+            }]
+        })
 
         print("PAYPAL RESPONSE:", order)
 
@@ -187,17 +275,7 @@ def create_gutschein_order():
 @csrf.exempt
 def capture_gutschein_order(order_id):
 
-    access_token = paypal_access_token()
-
-    response = requests.post(
-        f"{PAYPAL_BASE}/v2/checkout/orders/{order_id}/capture",
-        headers={
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {access_token}",
-        }
-    )
-
-    data = response.json()
+    data = paypal.bestellung_erfassen(order_id)
 
     if data.get("status") != "COMPLETED":
         return jsonify({"error": "Zahlung fehlgeschlagen"}), 400
@@ -265,13 +343,19 @@ def apply_gutschein():
 # PAYPAL
 # =====================================================
 
-def paypal_access_token():
-    response = requests.post(
-        f"{PAYPAL_BASE}/v1/oauth2/token",
-        auth=(PAYPAL_CLIENT_ID, PAYPAL_SECRET),
-        data={"grant_type": "client_credentials"},
+# Token, Connection-Pool und Timeouts stecken im Client; das Token teilen
+# sich alle Worker eines Hosts über eine SQLite-Datei
+paypal = PayPalClient(
+    PAYPAL_CLIENT_ID,
+    PAYPAL_SECRET,
+    PAYPAL_BASE,
+    token_cache=token_cache(
+        os.getenv(
+            "PAYPAL_TOKEN_CACHE_PFAD",
+            os.path.join(tempfile.gettempdir(), "ibk-paypal-token.sqlite3")
+        )
     )
-    return response.json().get("access_token")
+)
 
 
 
@@ -282,6 +366,15 @@ def paypal_access_token():
 def create_paypal_order():
     cart_items = get_cart()
 
+    # Nie mit 0 € abrechnen – lieber später noch einmal versuchen
+    fehlend = ohne_preis(cart_items)
+    if fehlend:
+        logger.warning("Checkout ohne Preis für: %s", ", ".join(fehlend))
+        return jsonify({
+            "error": "Preis gerade nicht verfügbar – bitte später erneut versuchen",
+            "positionen": fehlend
+        }), 409
+
     total = calculate_total(cart_items)
     if session.get("gutschein_code"):
         g = Gutschein.query.filter_by(
@@ -295,15 +388,18 @@ def create_paypal_order():
     if not cart_items or total <= 0:
         return jsonify({"error": "Warenkorb leer"}), 400
 
-    access_token = paypal_access_token()
+    # Gleicher Warenkorb in derselben Session → offene PayPal-Order wiederverwenden
+    fingerabdruck = warenkorb_fingerabdruck(cart_items, session.get("gutschein_code"), total)
+    offen = session.get("paypal_offen")
+    if offen and offen["fingerabdruck"] == fingerabdruck:
+        return jsonify({"id": offen["order_id"]})
 
-    response = requests.post(
-        f"{PAYPAL_BASE}/v2/checkout/orders",
-        headers={
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {access_token}",
-        },
-        json={
+    # Parallele Doppelklicks erreichen PayPal mit derselben Request-Id → gleiche Order
+    if "paypal_nonce" not in session:
+        session["paypal_nonce"] = uuid.uuid4().hex
+
+    order_data = paypal.bestellung_anlegen(
+        {
             "intent": "CAPTURE",
             "purchase_units": [{
                 "amount": {
@@ -312,9 +408,20 @@ def create_paypal_order():
                 }
             }]
         },
+        headers={"PayPal-Request-Id": f"ibk-{session['paypal_nonce']}-{fingerabdruck}"}
     )
 
-    order_data = response.json()
+    if "id" not in order_data:
+        logger.error("PayPal Order konnte nicht angelegt werden: %s", order_data)
+        return jsonify({"error": "PayPal nicht erreichbar"}), 502
+
+    # Positionen festhalten – die Bestellung bekommt genau die bezahlten Preise
+    session["paypal_offen"] = {
+        "fingerabdruck": fingerabdruck,
+        "order_id": order_data["id"],
+        "positionen": cart_items
+    }
+
     return jsonify({"id": order_data["id"]})
 
 
@@ -324,22 +431,16 @@ def create_paypal_order():
 @csrf.exempt
 def capture_paypal_order(order_id):
     try:
-        access_token = paypal_access_token()
-
-        response = requests.post(
-            f"{PAYPAL_BASE}/v2/checkout/orders/{order_id}/capture",
-            headers={
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {access_token}",
-            }
-        )
-
-        data = response.json()
+        data = paypal.bestellung_erfassen(order_id)
 
         if data.get("status") != "COMPLETED":
             return jsonify({"status": "error", "message": "PayPal-Zahlung nicht abgeschlossen", "data": data}), 400
 
-        cart_items = get_cart()
+        offen = session.get("paypal_offen") or {}
+        if offen.get("order_id") == order_id:
+            cart_items = offen["positionen"]
+        else:
+            cart_items = get_cart()
 
         bestellung = Bestellung(
             email=session.get("checkout_email"),
@@ -351,7 +452,11 @@ def capture_paypal_order(order_id):
             stadt=session.get("checkout_stadt"),
             land=session.get("checkout_land"),
             telefon=session.get("checkout_telefon"),
-            paymentmethod="paypal"
+            paymentmethod="paypal",
+            collectkey=str(uuid.uuid4()),
+            paypal_order_id=order_id,
+            paypal_capture_id=paypal_capture_id(data),
+            bezahlt_am=datetime.utcnow()
         )
 
         db.session.add(bestellung)
@@ -361,12 +466,17 @@ def capture_paypal_order(order_id):
             db.session.add(
                 BestellPosition(
                     bestellung_id=bestellung.id,
+                    ean=item.get("ean"),
                     bezeichnung=item["title"],
                     menge=item["quantity"],
                     preis=item["price"]
                 )
             )
 
+        # Übermittlung an Buchbutler übernimmt der Outbox-Worker – im selben
+        # Commit wie die Bestellung, damit keine bezahlte Bestellung verloren geht
+        db.session.add(BestellAusgang(bestellung_id=bestellung.id))
+
         db.session.commit()
 
 
@@ -395,13 +505,10 @@ def capture_paypal_order(order_id):
                 
             session.pop("gutschein_code", None)
 
-        try:
-            sende_bestellung_an_buchbutler(bestellung, cart_items)
-        except Exception:
-            logger.exception("Buchbutler Bestellung fehlgeschlagen")
-
-        # Warenkorb leeren
+        # Warenkorb leeren – nächster Kauf bekommt eine neue PayPal-Order
         session.pop("cart", None)
+        session.pop("paypal_offen", None)
+        session.pop("paypal_nonce", None)
 
         return jsonify({"status": "success", "order_id": order_id})
 
@@ -409,72 +516,270 @@ def capture_paypal_order(order_id):
         logger.exception("Fehler beim Capturen der PayPal-Zahlung")
         return jsonify({"status": "error", "message": str(e)}), 500
 
-def verify_webhook(headers, body):
+WEBHOOK_HEADER = (
+    "PAYPAL-TRANSMISSION-ID",
+    "PAYPAL-TRANSMISSION-TIME",
+    "PAYPAL-CERT-URL",
+    "PAYPAL-AUTH-ALGO",
+    "PAYPAL-TRANSMISSION-SIG",
+)
 
-    access_token = paypal_access_token()
+PAYPAL_WEBHOOK_TAKT = int(os.getenv("PAYPAL_WEBHOOK_TAKT", "10"))          # Sekunden zwischen Läufen
+PAYPAL_WEBHOOK_MAX_VERSUCHE = int(os.getenv("PAYPAL_WEBHOOK_MAX_VERSUCHE", "6"))
+PAYPAL_WEBHOOK_SPERRE = timedelta(minutes=2)
+PAYPAL_WEBHOOK_BATCH = 50
+
+
+def paypal_capture_id(data):
+    """Capture-ID aus der Antwort von /capture (oder None)"""
+    try:
+        return data["purchase_units"][0]["payments"]["captures"][0]["id"]
+    except (KeyError, IndexError, TypeError):
+        return None
 
-    response = requests.post(
-        f"{PAYPAL_BASE}/v1/notifications/verify-webhook-signature",
-        headers={
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {access_token}",
-        },
-        json={
-            "transmission_id": headers.get("PAYPAL-TRANSMISSION-ID"),
-            "transmission_time": headers.get("PAYPAL-TRANSMISSION-TIME"),
-            "cert_url": headers.get("PAYPAL-CERT-URL"),
-            "auth_algo": headers.get("PAYPAL-AUTH-ALGO"),
-            "transmission_sig": headers.get("PAYPAL-TRANSMISSION-SIG"),
-            "webhook_id": PAYPAL_WEBHOOK_ID,
-            "webhook_event": body
-        }
-    )
 
-    return response.json().get("verification_status") == "SUCCESS"
+def verify_webhook(headers, event):
+    """Signaturprüfung bei PayPal – `event` ist das geparste JSON-Objekt"""
 
+    data = paypal.webhook_verifizieren({
+        "transmission_id": headers.get("PAYPAL-TRANSMISSION-ID"),
+        "transmission_time": headers.get("PAYPAL-TRANSMISSION-TIME"),
+        "cert_url": headers.get("PAYPAL-CERT-URL"),
+        "auth_algo": headers.get("PAYPAL-AUTH-ALGO"),
+        "transmission_sig": headers.get("PAYPAL-TRANSMISSION-SIG"),
+        "webhook_id": PAYPAL_WEBHOOK_ID,
+        "webhook_event": event
+    })
+
+    return data.get("verification_status") == "SUCCESS"
 
 
 @app.route("/paypal-webhook", methods=["POST"])
 @csrf.exempt
 def paypal_webhook():
+    """Nimmt das Ereignis nur entgegen – Prüfung und Verarbeitung laufen im Hintergrund"""
 
     body = request.get_data(as_text=True)
-    event = json.loads(body)
-    headers = request.headers
 
-    if not verify_webhook(headers, body):
+    try:
+        event = json.loads(body)
+    except ValueError:
         return "", 400
 
-    event_type = body.get("event_type")
-
-    if event_type == "PAYMENT.CAPTURE.COMPLETED":
-        capture = event["resource"]
-        order_id = capture["supplementary_data"]["related_ids"]["order_id"]
-        amount = capture["amount"]["value"]
-        logger.info(f"PayPal Zahlung abgeschlossen: {order_id} – {amount} EUR")
+    if not isinstance(event, dict) or not event.get("id"):
+        return "", 400
 
+    db.session.add(
+        PayPalEreignis(
+            event_id=event["id"],
+            event_type=event.get("event_type"),
+            body=body,
+            headers=json.dumps({h: request.headers.get(h) for h in WEBHOOK_HEADER})
+        )
+    )
 
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Zustellung wiederholt – schon gespeichert
+        db.session.rollback()
 
     return "", 200
 
 
+def paypal_ereignis_anwenden(event):
+    """Fachliche Verarbeitung eines geprüften Ereignisses.
+
+    Gibt den neuen Status zurück; "übersprungen", wenn das Ereignis nicht
+    die erwartete Form hat – ein Retry würde daran nichts ändern.
+    """
+
+    if event.get("event_type") != "PAYMENT.CAPTURE.COMPLETED":
+        return "verarbeitet"
+
+    capture = event.get("resource") or {}
+    order_id = (
+        (capture.get("supplementary_data") or {})
+        .get("related_ids", {})
+        .get("order_id")
+    )
+    if not order_id:
+        logger.warning(
+            "PayPal Webhook %s: Capture ohne order_id – übersprungen",
+            event.get("id")
+        )
+        return "übersprungen"
+
+    amount = (capture.get("amount") or {}).get("value")
+    logger.info("PayPal Zahlung abgeschlossen: %s – %s EUR", order_id, amount)
+
+    bestellung = Bestellung.query.filter_by(paypal_order_id=order_id).first()
+    if bestellung is None:
+        # z.B. Gutschein-Kauf oder Capture-Request nie zurückgekommen
+        logger.warning("PayPal Capture %s ohne passende Bestellung", order_id)
+        return "verarbeitet"
+
+    bestellung.paypal_capture_id = capture.get("id")
+    if not bestellung.bezahlt_am:
+        bestellung.bezahlt_am = datetime.utcnow()
+
+    return "verarbeitet"
+
+
+def paypal_ereignisse_verarbeiten():
+    """Prüft und verarbeitet gespeicherte Webhook-Ereignisse"""
+
+    jetzt = datetime.utcnow()
+
+    faellig = PayPalEreignis.query.filter(
+        PayPalEreignis.status == "offen",
+        PayPalEreignis.naechster_versuch_am <= jetzt
+    ).order_by(PayPalEreignis.id).limit(PAYPAL_WEBHOOK_BATCH).all()
+
+    for ereignis in faellig:
+        # Reservieren, damit kein anderer Worker dasselbe Ereignis bearbeitet
+        reserviert = db.session.execute(
+            update(PayPalEreignis)
+            .where(
+                PayPalEreignis.id == ereignis.id,
+                PayPalEreignis.status == "offen",
+                PayPalEreignis.naechster_versuch_am <= jetzt
+            )
+            .values(naechster_versuch_am=jetzt + PAYPAL_WEBHOOK_SPERRE)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.session.commit()
+
+        if not reserviert:
+            continue
+
+        event = json.loads(ereignis.body)
+
+        try:
+            if not verify_webhook(json.loads(ereignis.headers or "{}"), event):
+                ereignis.status = "ungültig"
+                logger.warning("PayPal Webhook %s: Signatur ungültig", ereignis.event_id)
+            else:
+                ereignis.status = paypal_ereignis_anwenden(event)
+                ereignis.letzter_fehler = None
+            ereignis.verarbeitet_am = datetime.utcnow()
+
+        except Exception as e:
+            db.session.rollback()
+            logger.warning("PayPal Webhook %s fehlgeschlagen: %s", ereignis.event_id, e)
+
+            ereignis.versuche = (ereignis.versuche or 0) + 1
+            ereignis.letzter_fehler = str(e)[:1000]
+            if ereignis.versuche >= PAYPAL_WEBHOOK_MAX_VERSUCHE:
+                ereignis.status = "fehler"
+            else:
+                ereignis.naechster_versuch_am = datetime.utcnow() + timedelta(minutes=2 ** ereignis.versuche)
+
+        db.session.commit()
+
+
 # =====================================================
 # HILFSFUNKTIONEN
 # =====================================================
 
+# Obergrenzen für /sync-cart
+CART_MAX_POSITIONEN = 100
+CART_MAX_MENGE = 99
+CART_MAX_BYTES = 32 * 1024
+
+
+def cart_mengen():
+    """Warenkorb wie gespeichert: {produkt_id (str): menge}"""
+    mengen = session.get("cart")
+    return dict(mengen) if isinstance(mengen, dict) else {}
+
+
+def preise_ermitteln(produkte):
+    """{produkt_id: preis} – MOVEMENT, sonst CONTENT (geteilter Cache), sonst Katalog.
+
+    MOVEMENT wird für alle EANs parallel geladen (gemeinsame Deadline).
+    Produkte, für die es nirgends einen Preis gibt, fehlen im Ergebnis.
+    """
+    eans = {p["ean"] for p in produkte if p.get("ean")}
+    futures = {
+        ean: upstream_pool.submit(("MOVEMENT", ean), cached_lade_bestand_von_api, ean)
+        for ean in eans
+    }
+    wait([f for f in futures.values() if f is not None], timeout=PRODUKT_DEADLINE)
+
+    preise = {}
+    for produkt in produkte:
+        ean = produkt.get("ean")
+        future = futures.get(ean)
+
+        movement = future.result() if future is not None and future.done() else None
+        preis = movement.get("preis") if movement else None
+
+        if not preis and ean:
+            content = cached_lade_produkt_von_api(ean)
+            preis = content.get("preis") if content else None
+
+        preis = preis or produkt.get("preis")
+        if preis:
+            preise[produkt["id"]] = preis
+
+    return preise
+
+
 def get_cart():
-    return session.get("cart", [])
+    """Warenkorb-Positionen mit Titel und serverseitig ermitteltem Preis.
+
+    Ist kein Preis zu bekommen, ist `price` None – siehe `ohne_preis()`.
+    """
+    mengen = cart_mengen()
+    produkte = [p for p in (katalog.nach_id(int(pid)) for pid in mengen) if p]
+    preise = preise_ermitteln(produkte)
+
+    return [
+        {
+            "id": produkt["id"],
+            "title": produkt["name"],
+            "price": preise.get(produkt["id"]),
+            "quantity": mengen[str(produkt["id"])],
+            "ean": produkt.get("ean"),
+        }
+        for produkt in produkte
+    ]
+
+
+def ohne_preis(cart):
+    """Titel der Positionen, für die gerade kein Preis ermittelt werden kann"""
+    return [item["title"] for item in cart if not item["price"]]
 
-def save_cart(cart):
-    session["cart"] = cart
-    session.modified = True
+
+def save_cart(mengen):
+    if mengen:
+        session["cart"] = mengen
+    else:
+        session.pop("cart", None)
 
 def calculate_total(cart):
-    return sum(item["price"] * item["quantity"] for item in cart)
+    return sum((item["price"] or 0) * item["quantity"] for item in cart)
+
+
+def warenkorb_fingerabdruck(cart, gutschein_code, total):
+    """Hash über Positionen, Gutschein und Summe (für idempotente PayPal-Orders)"""
+    inhalt = json.dumps(
+        {
+            "positionen": sorted(
+                (str(item.get("ean") or item.get("id")), item["quantity"], item["price"])
+                for item in cart
+            ),
+            "gutschein": gutschein_code,
+            "summe": f"{total:.2f}",
+        },
+        sort_keys=True
+    )
+    return hashlib.sha256(inhalt.encode()).hexdigest()[:32]
 
 
 def check_auth():
-    if not BUCHBUTLER_USER or not BUCHBUTLER_PASSWORD:
+    if not buchbutler.konfiguriert:
         logger.error("Buchbutler Zugangsdaten fehlen")
         return False
     return True
@@ -506,30 +811,65 @@ def attr(attrs, key):
 
 def buchbutler_request(endpoint, ean):
     """Allgemeine Request Funktion"""
-    url = f"{BASE_URL}/{endpoint}/"
+    return buchbutler.abfragen(endpoint, ean)
+# -----------------------------
+# CONTENT API
+# -----------------------------
 
-    params = {
-        "username": BUCHBUTLER_USER,
-        "passwort": BUCHBUTLER_PASSWORD,
-        "ean": ean
-    }
+def cached_lade_produkt_von_api(ean):
+    """CONTENT aus dem geteilten Cache – liefert immer eine eigene Kopie"""
+    return content_cache.holen(ean, lade_produkt_von_api)
+
+
+def content_cache_aufwaermen():
+    if not check_auth():
+        return
+
+    # Alle Worker teilen sich den Cache → nur einer wärmt auf (einmal pro TTL)
+    if not content_cache.beanspruchen("aufwaermen", content_cache.ttl):
+        logger.info("CONTENT-Cache wird schon von einem anderen Worker aufgewärmt")
+        return
+
+    eans = list(dict.fromkeys(p["ean"] for p in katalog if p.get("ean")))
+    anzahl = content_cache.aufwaermen(eans, lade_produkt_von_api)
+    logger.info("CONTENT-Cache aufgewärmt: %s von %s EANs geladen", anzahl, len(eans))
 
-    response = requests.get(url, params=params, timeout=10)
-    response.raise_for_status()
+def content_abrufen(ean):
+    """CONTENT API ohne Fehlerbehandlung – Fehler gehen an den Aufrufer"""
 
-    data = response.json()
+    res = buchbutler_request("CONTENT", ean)
 
-    if not data or "response" not in data:
+    if not res:
         return None
 
-    return data["response"]
-# -----------------------------
-# CONTENT API
-# -----------------------------
+    attrs = res.get("Artikelattribute") or {}
+
+    produkt = {
+        "id": to_int(res.get("pim_artikel_id")),
+        "name": res.get("bezeichnung"),
+        "autor": attr(attrs, "Autor"),
+        "illustrator": attr(attrs, "Illustrator"),
+        "preis": to_float(res.get("vk_brutto")),
+
+        "isbn": attr(attrs, "ISBN_13"),
+        "seiten": attr(attrs, "Seiten"),
+        "format": attr(attrs, "Buchtyp"),
+        "sprache": attr(attrs, "Sprache"),
+        "verlag": attr(attrs, "Verlag"),
+        "erscheinungsjahr": attr(attrs, "Erscheinungsjahr"),
+        "erscheinungsdatum": attr(attrs, "Erscheinungsdatum"),
+        "alter_von": attr(attrs, "Altersempfehlung_von"),
+        "alter_bis": attr(attrs, "Altersempfehlung_bis"),
+        "lesealter": attr(attrs, "Lesealter"),
+        "gewicht": attr(attrs, "Gewicht"),
+        "laenge": attr(attrs, "Laenge"),
+        "breite": attr(attrs, "Breite"),
+        "hoehe": attr(attrs, "Hoehe"),
+        "extra": attrs
+    }
+
+    return produkt
 
-@lru_cache(maxsize=128)
-def cached_lade_produkt_von_api(ean):
-    return lade_produkt_von_api(ean)
 
 def lade_produkt_von_api(ean):
     """Lädt Produktdaten von CONTENT API"""
@@ -538,38 +878,7 @@ def lade_produkt_von_api(ean):
         return None
 
     try:
-        res = buchbutler_request("CONTENT", ean)
-
-        if not res:
-            return None
-
-        attrs = res.get("Artikelattribute") or {}
-
-        produkt = {
-            "id": to_int(res.get("pim_artikel_id")),
-            "name": res.get("bezeichnung"),
-            "autor": attr(attrs, "Autor"),
-            "illustrator": attr(attrs, "Illustrator"),
-            "preis": to_float(res.get("vk_brutto")),
-           
-            "isbn": attr(attrs, "ISBN_13"),
-            "seiten": attr(attrs, "Seiten"),
-            "format": attr(attrs, "Buchtyp"),
-            "sprache": attr(attrs, "Sprache"),
-            "verlag": attr(attrs, "Verlag"),
-            "erscheinungsjahr": attr(attrs, "Erscheinungsjahr"),
-            "erscheinungsdatum": attr(attrs, "Erscheinungsdatum"),
-            "alter_von": attr(attrs, "Altersempfehlung_von"),
-            "alter_bis": attr(attrs, "Altersempfehlung_bis"),
-            "lesealter": attr(attrs, "Lesealter"),
-            "gewicht": attr(attrs, "Gewicht"),
-            "laenge": attr(attrs, "Laenge"),
-            "breite": attr(attrs, "Breite"),
-            "hoehe": attr(attrs, "Hoehe"),
-            "extra": attrs
-        }
-
-        return produkt
+        return content_abrufen(ean)
 
     except Exception:
         logger.exception("Fehler beim Laden von CONTENT API")
@@ -579,58 +888,60 @@ def lade_produkt_von_api(ean):
 # MOVEMENT API
 # -----------------------------
 
-def lade_bestand_von_api(ean):
-    """Lädt Bestand / Preis / Lieferdaten"""
+def bestand_abrufen(ean):
+    """MOVEMENT API ohne Fehlerbehandlung – Fehler gehen an den Aufrufer"""
 
-    if not check_auth():
-        return None
+    res = buchbutler_request("MOVEMENT", ean)
 
-    try:
-        res = buchbutler_request("MOVEMENT", ean)
+    if not res:
+        return None
 
-        if not res:
+    # 🔥 FIX — falls Liste zurückkommt
+    if isinstance(res, list):
+        if len(res) == 0:
             return None
+        res = res[0]
 
-        # 🔥 FIX — falls Liste zurückkommt
-        if isinstance(res, list):
-            if len(res) == 0:
-                return None
-            res = res[0]
+    return {
+        "bestand": to_int(res.get("Bestand")),
+        "preis": to_float(res.get("Preis")),
+        "erfuellungsrate": res.get("Erfuellungsrate"),
+        "handling_zeit": res.get("Handling_Zeit_in_Werktagen")
 
-        return {
-            "bestand": to_int(res.get("Bestand")),
-            "preis": to_float(res.get("Preis")),
-            "erfuellungsrate": res.get("Erfuellungsrate"),
-            "handling_zeit": res.get("Handling_Zeit_in_Werktagen")
+    }
 
-        }
 
+def lade_bestand_von_api(ean):
+    """Lädt Bestand / Preis / Lieferdaten"""
+
+    if not check_auth():
+        return None
+
+    try:
+        return bestand_abrufen(ean)
 
     except Exception:
         logger.exception("Fehler beim Laden von MOVEMENT API")
         return None
 
+
+def cached_lade_bestand_von_api(ean):
+    """MOVEMENT aus dem Kurzzeit-Cache (mit Request-Coalescing)"""
+    return movement_cache.holen(ean, lade_bestand_von_api)
+
 # -----------------------------
 # Bestellung an Buchbutler senden 
 # -----------------------------
 
-def sende_bestellung_an_buchbutler(bestellung, cart_items):
-
-    url = f"{BASE_URL}/ORDER/"
-
-    collectkey = str(uuid.uuid4())
-    bestellung.collectkey = collectkey
-    db.session.commit()
+def buchbutler_payload(bestellung):
+    """ORDER-Payload aus der gespeicherten Bestellung (Zugangsdaten ergänzt der Client)"""
 
     payload = {
-        "username": BUCHBUTLER_USER,
-        "passwort": BUCHBUTLER_PASSWORD,
-
         "auftrag_kopf": {
             "mol_kunde_id": int(BUCHBUTLER_MOL_KUNDE_ID),
             "rechnungsadresse_id": int(BUCHBUTLER_RECHNUNGSADRESSE_ID),
             "mol_zahlart_id": 2,  # PayPal
-            "bestelldatum": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "bestelldatum": bestellung.bestelldatum.strftime("%Y-%m-%d %H:%M:%S"),
             "bestellreferenz": f"IBK-{bestellung.id}",
             "seite": "ibk-bilderbuch.de",
             "bestellfreigabe": 1,
@@ -659,48 +970,28 @@ def sende_bestellung_an_buchbutler(bestellung, cart_items):
             },
             {
                 "typ": "collectkey",
-                "value": collectkey
+                "value": bestellung.collectkey
             }
         ]
     }
 
-    
-
-    for i, item in enumerate(cart_items):
+    for i, pos in enumerate(sorted(bestellung.positionen, key=lambda p: p.id)):
         payload["auftrag_position"].append({
-            "ean": item["ean"],
-            "pos_bezeichnung": item["title"],
-            "menge": item["quantity"],
+            "ean": pos.ean,
+            "pos_bezeichnung": pos.bezeichnung,
+            "menge": pos.menge,
             "ek_netto": 0,
-            "vk_brutto": item["price"],
+            "vk_brutto": pos.preis,
             "pos_referenz": f"{bestellung.id}-{i}"
         })
-    
-    response = requests.post(url, json=payload, timeout=20)
-    
-    data = response.json()
-    
-    if data.get("import_hash"):
-        bestellung.moluna_order_id = data["import_hash"]
-        bestellung.moluna_status = "übermittelt"
-        db.session.commit()
-        
-    logger.info("Buchbutler Bestellung: %s", data)
-    return data
-    
-    
-def buchbutler_orderresponse(collectkey):
 
-    url = f"{BASE_URL}/ORDERRESPONSE/"
+    return payload
 
-    payload = {
-        "username": BUCHBUTLER_USER,
-        "passwort": BUCHBUTLER_PASSWORD,
-        "collectkey": collectkey
-    }
+
+def buchbutler_orderresponse(collectkey):
 
     try:
-        response = requests.post(url, json=payload, timeout=10)
+        response = buchbutler.orderresponse(collectkey)
 
         # Wenn keine erfolgreiche Antwort
         if response.status_code != 200:
@@ -717,6 +1008,229 @@ def buchbutler_orderresponse(collectkey):
     except Exception:
         logger.exception("ORDERRESPONSE Fehler")
         return None
+
+
+# -----------------------------
+# Bestellstatus-Poller
+# -----------------------------
+
+# Status, nach denen sich bei Buchbutler nichts mehr ändert
+ENDSTATUS = {
+    s.strip().lower()
+    for s in os.getenv(
+        "BESTELLSTATUS_ENDSTATUS",
+        "versendet,geliefert,zugestellt,storniert,abgeschlossen"
+    ).split(",")
+}
+
+BESTELLSTATUS_TAKT = int(os.getenv("BESTELLSTATUS_TAKT", "60"))            # Sekunden zwischen Läufen
+BESTELLSTATUS_INTERVALL = timedelta(minutes=int(os.getenv("BESTELLSTATUS_INTERVALL", "15")))
+BESTELLSTATUS_MAX_BACKOFF = timedelta(hours=6)
+BESTELLSTATUS_PARALLEL = int(os.getenv("BESTELLSTATUS_PARALLEL", "4"))
+BESTELLSTATUS_BATCH = 50
+
+
+def orderresponse_uebernehmen(b, response):
+    """Schreibt Status und Lieferdaten aus ORDERRESPONSE in die Bestellung"""
+    status = response["response"].get("status")
+    lieferungen = response["response"].get("lieferungen", [])
+
+    # Status speichern
+    b.moluna_status = status if status else "unbekannt"
+
+    # Trackingnummern & andere Felder sammeln
+    trackingnummern = []
+    logistiker_list = []
+    paketart_list = []
+    eans = []
+
+    for lieferung in lieferungen:
+        if lieferung.get("trackingnummer"):
+            trackingnummern.append(lieferung["trackingnummer"])
+        if lieferung.get("logistiker"):
+            logistiker_list.append(lieferung["logistiker"])
+        if lieferung.get("logistik_produkt"):
+            paketart_list.append(lieferung["logistik_produkt"])
+        if lieferung.get("ean"):
+            eans.append(lieferung["ean"])
+
+    # Optional: als kommagetrennte Strings speichern
+    b.trackingnummer = ", ".join(trackingnummern) if trackingnummern else None
+    b.logistiker = ", ".join(logistiker_list) if logistiker_list else None
+    b.paketart = ", ".join(paketart_list) if paketart_list else None
+    b.eans = ", ".join(eans) if eans else None
+
+
+def bestellstatus_pruefen():
+    """Fragt ORDERRESPONSE für fällige, noch offene Bestellungen ab"""
+
+    if not check_auth():
+        return
+
+    jetzt = datetime.utcnow()
+
+    faellig = Bestellung.query.filter(
+        Bestellung.collectkey.isnot(None),
+        # Nur was Buchbutler schon hat – die Outbox setzt collectkey vor dem Senden
+        or_(
+            Bestellung.moluna_order_id.isnot(None),
+            Bestellung.ausgang.has(BestellAusgang.status == "gesendet")
+        ),
+        ~Bestellung.ausgang.has(BestellAusgang.status == "tot"),
+        or_(
+            Bestellung.moluna_status.is_(None),
+            func.lower(Bestellung.moluna_status).notin_(ENDSTATUS)
+        ),
+        or_(
+            Bestellung.naechste_pruefung_am.is_(None),
+            Bestellung.naechste_pruefung_am <= jetzt
+        )
+    ).order_by(Bestellung.id).limit(BESTELLSTATUS_BATCH).all()
+
+    # Bestellungen "reservieren", damit andere Worker sie nicht parallel abfragen
+    reserviert = []
+    for b in faellig:
+        ergebnis = db.session.execute(
+            update(Bestellung)
+            .where(
+                Bestellung.id == b.id,
+                or_(
+                    Bestellung.naechste_pruefung_am.is_(None),
+                    Bestellung.naechste_pruefung_am <= jetzt
+                )
+            )
+            .values(naechste_pruefung_am=jetzt + BESTELLSTATUS_INTERVALL)
+            .execution_options(synchronize_session=False)
+        )
+        if ergebnis.rowcount:
+            reserviert.append(b)
+    db.session.commit()
+
+    if not reserviert:
+        return
+
+    # HTTP parallel, DB-Schreibzugriffe danach im eigenen Thread
+    with ThreadPoolExecutor(max_workers=BESTELLSTATUS_PARALLEL) as pool:
+        antworten = list(pool.map(
+            buchbutler_orderresponse,
+            [b.collectkey for b in reserviert]
+        ))
+
+    for b, response in zip(reserviert, antworten):
+        b.status_geprueft_am = jetzt
+
+        if response and "response" in response:
+            orderresponse_uebernehmen(b, response)
+            b.pruef_fehler = 0
+            b.naechste_pruefung_am = jetzt + BESTELLSTATUS_INTERVALL
+        else:
+            # Backoff pro Bestellung: 15 min, 30 min, 1 h … bis 6 h
+            b.pruef_fehler = (b.pruef_fehler or 0) + 1
+            b.naechste_pruefung_am = jetzt + min(
+                BESTELLSTATUS_INTERVALL * (2 ** b.pruef_fehler),
+                BESTELLSTATUS_MAX_BACKOFF
+            )
+            if not b.moluna_status:
+                b.moluna_status = "keine Antwort"
+
+    db.session.commit()
+    logger.info("Bestellstatus geprüft: %s Bestellungen", len(reserviert))
+
+
+# -----------------------------
+# Outbox: Bestellungen an Buchbutler übermitteln
+# -----------------------------
+
+BESTELLAUSGANG_TAKT = int(os.getenv("BESTELLAUSGANG_TAKT", "20"))           # Sekunden zwischen Läufen
+BESTELLAUSGANG_MAX_VERSUCHE = int(os.getenv("BESTELLAUSGANG_MAX_VERSUCHE", "8"))
+BESTELLAUSGANG_SPERRE = timedelta(minutes=5)      # solange gehört ein Eintrag einem Worker
+BESTELLAUSGANG_MAX_BACKOFF = timedelta(hours=2)
+BESTELLAUSGANG_BATCH = 20
+
+
+def bestellung_uebermitteln(eintrag):
+    """Sendet einen Outbox-Eintrag – True, wenn Buchbutler die Bestellung hat"""
+
+    bestellung = eintrag.bestellung
+
+    # Gab es schon einen Versuch (Fehler, Read-Timeout, abgestürzter Worker
+    # nach dem POST), kann die Bestellung trotzdem angekommen sein → erst per
+    # collectkey nachfragen, nicht doppelt bestellen. `versuche` zählt schon
+    # beim Reservieren hoch; letzter_fehler bleibt auch nach "erneut senden".
+    if eintrag.versuche > 1 or eintrag.letzter_fehler:
+        response = buchbutler_orderresponse(bestellung.collectkey)
+        if response and response.get("response"):
+            orderresponse_uebernehmen(bestellung, response)
+            return True
+
+    data = buchbutler.bestellen(buchbutler_payload(bestellung))
+    logger.info("Buchbutler Bestellung %s: %s", bestellung.id, data)
+
+    if not data.get("import_hash"):
+        raise RuntimeError(f"Keine import_hash in der Antwort: {data}")
+
+    bestellung.moluna_order_id = data["import_hash"]
+    bestellung.moluna_status = "übermittelt"
+    return True
+
+
+def bestellausgang_abarbeiten():
+    """Übermittelt fällige Outbox-Einträge mit Backoff; nach N Versuchen → "tot" """
+
+    if not check_auth():
+        return
+
+    jetzt = datetime.utcnow()
+
+    faellig = BestellAusgang.query.filter(
+        BestellAusgang.status == "offen",
+        BestellAusgang.naechster_versuch_am <= jetzt
+    ).order_by(BestellAusgang.id).limit(BESTELLAUSGANG_BATCH).all()
+
+    for eintrag in faellig:
+        # Eintrag reservieren, damit kein anderer Worker dieselbe Bestellung
+        # sendet – und den Versuch vor dem POST festschreiben
+        reserviert = db.session.execute(
+            update(BestellAusgang)
+            .where(
+                BestellAusgang.id == eintrag.id,
+                BestellAusgang.status == "offen",
+                BestellAusgang.naechster_versuch_am <= jetzt
+            )
+            .values(
+                naechster_versuch_am=jetzt + BESTELLAUSGANG_SPERRE,
+                versuche=func.coalesce(BestellAusgang.versuche, 0) + 1
+            )
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.session.commit()
+
+        if not reserviert:
+            continue
+
+        try:
+            bestellung_uebermitteln(eintrag)
+        except Exception as e:
+            logger.warning("Bestellung %s an Buchbutler fehlgeschlagen: %s", eintrag.bestellung_id, e)
+
+            eintrag.letzter_fehler = str(e)[:1000]
+
+            if eintrag.versuche >= BESTELLAUSGANG_MAX_VERSUCHE:
+                eintrag.status = "tot"
+                eintrag.bestellung.moluna_status = "Übermittlung fehlgeschlagen"
+                logger.error("Bestellung %s nach %s Versuchen aufgegeben", eintrag.bestellung_id, eintrag.versuche)
+            else:
+                # 1 min, 2 min, 4 min … bis 2 h
+                eintrag.naechster_versuch_am = datetime.utcnow() + min(
+                    timedelta(minutes=2 ** (eintrag.versuche - 1)),
+                    BESTELLAUSGANG_MAX_BACKOFF
+                )
+        else:
+            eintrag.status = "gesendet"
+            eintrag.gesendet_am = datetime.utcnow()
+            eintrag.letzter_fehler = None
+
+        db.session.commit()
 # =====================================================
 # ROUTES
 # =====================================================
@@ -729,6 +1243,9 @@ def admin_test():
 
 
 
+ADMIN_PRO_SEITE = int(os.getenv("ADMIN_BESTELLUNGEN_PRO_SEITE", "50"))
+
+
 def admin_required():
     if not session.get("admin"):
         return redirect(url_for("admin_login"))
@@ -764,131 +1281,273 @@ def admin_bestellungen():
     if resp:
         return resp
 
-    alle = Bestellung.query.order_by(Bestellung.bestelldatum.desc()).all()
-
-    for b in alle:
+    # Status/Tracking aktualisiert der Hintergrund-Poller → hier nur lesen
+    filter_werte = {
+        k: request.args.get(k, "").strip()
+        for k in ("status", "von", "bis", "zahlung")
+    }
 
-        if getattr(b, "collectkey", None):
+    try:
+        von = datetime.strptime(filter_werte["von"], "%Y-%m-%d") if filter_werte["von"] else None
+        bis = datetime.strptime(filter_werte["bis"], "%Y-%m-%d") if filter_werte["bis"] else None
+        nach = cursor_lesen(request.args.get("nach"))
+    except ValueError:
+        abort(400)
 
-            response = buchbutler_orderresponse(b.collectkey)
+    abfrage = Bestellung.query.options(
+        selectinload(Bestellung.positionen),
+        selectinload(Bestellung.ausgang)
+    )
 
-            if response and "response" in response:
-                status = response["response"].get("status")
-                lieferungen = response["response"].get("lieferungen", [])
+    if filter_werte["status"]:
+        abfrage = abfrage.filter(Bestellung.moluna_status == filter_werte["status"])
+    if filter_werte["zahlung"]:
+        abfrage = abfrage.filter(Bestellung.paymentmethod == filter_werte["zahlung"])
+    if von:
+        abfrage = abfrage.filter(Bestellung.bestelldatum >= von)
+    if bis:
+        abfrage = abfrage.filter(Bestellung.bestelldatum < bis + timedelta(days=1))
+
+    # Keyset statt OFFSET: Kosten unabhängig davon, wie weit geblättert wurde
+    if nach:
+        abfrage = abfrage.filter(tuple_(Bestellung.bestelldatum, Bestellung.id) < nach)
+
+    bestellungen = (
+        abfrage
+        .order_by(Bestellung.bestelldatum.desc(), Bestellung.id.desc())
+        .limit(ADMIN_PRO_SEITE + 1)
+        .all()
+    )
 
-                # Status speichern
-                b.moluna_status = status if status else "unbekannt"
+    weiter = None
+    if len(bestellungen) > ADMIN_PRO_SEITE:
+        bestellungen = bestellungen[:ADMIN_PRO_SEITE]
+        letzte = bestellungen[-1]
+        weiter = url_for(
+            "admin_bestellungen",
+            nach=f"{letzte.bestelldatum.isoformat()}_{letzte.id}",
+            **{k: v for k, v in filter_werte.items() if v}
+        )
 
-                # Trackingnummern & andere Felder sammeln
-                trackingnummern = []
-                logistiker_list = []
-                paketart_list = []
-                eans = []
+    return render_template(
+        "admin_bestellungen.html",
+        bestellungen=bestellungen,
+        filter=filter_werte,
+        weiter=weiter,
+        erste_seite=bool(nach)
+    )
 
-                for lieferung in lieferungen:
-                    if lieferung.get("trackingnummer"):
-                        trackingnummern.append(lieferung["trackingnummer"])
-                    if lieferung.get("logistiker"):
-                        logistiker_list.append(lieferung["logistiker"])
-                    if lieferung.get("logistik_produkt"):
-                        paketart_list.append(lieferung["logistik_produkt"])
-                    if lieferung.get("ean"):
-                        eans.append(lieferung["ean"])
 
-                # Optional: als kommagetrennte Strings speichern
-                b.trackingnummer = ", ".join(trackingnummern) if trackingnummern else None
-                b.logistiker = ", ".join(logistiker_list) if logistiker_list else None
-                b.paketart = ", ".join(paketart_list) if paketart_list else None
-                b.eans = ", ".join(eans) if eans else None
+@app.route("/admin/bestellungen/<int:bestellung_id>/erneut-senden", methods=["POST"])
+def bestellung_erneut_senden(bestellung_id):
+    """Aufgegebenen Outbox-Eintrag wieder in die Warteschlange stellen"""
 
-            else:
-                b.moluna_status = "keine Antwort"
-                b.trackingnummer = None
-                b.logistiker = None
-                b.paketart = None
-                b.eans = None
+    resp = admin_required()
+    if resp:
+        return resp
+
+    eintrag = BestellAusgang.query.filter_by(bestellung_id=bestellung_id).first_or_404()
+
+    if eintrag.status == "tot":
+        eintrag.status = "offen"
+        eintrag.versuche = 0
+        eintrag.naechster_versuch_am = datetime.utcnow()
+        db.session.commit()
+
+    return redirect(request.referrer or url_for("admin_bestellungen"))
 
-    # Commit nach allen Updates
+
+def cursor_lesen(wert):
+    """'<bestelldatum ISO>_<id>' → (datetime, id) oder None"""
+    if not wert:
+        return None
+    datum, _, bestell_id = wert.rpartition("_")
+    return datetime.fromisoformat(datum), int(bestell_id)
+
+
+# -----------------------------
+# Katalog-Sync im Hintergrund
+# -----------------------------
+
+SYNC_TIMEOUT = timedelta(minutes=5)
+
+
+def katalog_sync(lauf_id):
+    """Synchronisiert alle Katalog-EANs und speichert die Änderungen einmal am Ende"""
+
+    lauf = db.session.get(SyncLauf, lauf_id)
+    produkte = {p["ean"]: p for p in katalog if p.get("ean")}
+
+    lauf.gesamt = len(produkte)
     db.session.commit()
 
-    return render_template(
-        "admin_bestellungen.html",
-        bestellungen=alle
-    )
+    engine = SyncEngine(content_abrufen, bestand_abrufen)
+    aenderungen = {}
+    fehler_eans = []
+
+    try:
+        for ergebnis in engine.laden(produkte):
+            if ergebnis.fehler:
+                fehler_eans.append(ergebnis.ean)
+
+            # Dieselbe Feldzuordnung wie sync_buchbutler.py
+            produkt = produkte[ergebnis.ean]
+            diff = delta(produkt, sync_felder(ergebnis))
+            if diff:
+                aenderungen[produkt["id"]] = diff
+
+            lauf.erledigt += 1
+            lauf.geaendert = len(aenderungen)
+            lauf.fehlgeschlagen = len(fehler_eans)
+
+            # Fortschritt höchstens einmal pro Sekunde schreiben
+            jetzt = datetime.utcnow()
+            if (jetzt - lauf.aktualisiert_am).total_seconds() >= 1:
+                lauf.aktualisiert_am = jetzt
+                db.session.commit()
+
+        if aenderungen:
+            katalog.speichern(aenderungen)
 
+        lauf.status = "fertig"
 
-@app.route("/admin/sync-buchbutler/<int:index>")
-def sync_buchbutler(index):
+    except Exception as e:
+        logger.exception("Katalog-Sync fehlgeschlagen")
+        lauf.status = "fehler"
+        lauf.meldung = str(e)
+
+    lauf.fehler_eans = ",".join(fehler_eans) or None
+    lauf.aktualisiert_am = lauf.beendet_am = datetime.utcnow()
+    db.session.commit()
+
+
+@app.route("/admin/sync-buchbutler", methods=["POST"])
+def sync_buchbutler():
 
     if not session.get("admin"):
         abort(403)
 
-    if index >= len(produkte):
-        return "✅ Sync komplett"
+    if not check_auth():
+        return jsonify({"error": "Buchbutler Zugangsdaten fehlen"}), 500
 
-    produkt = produkte[index]
-    ean = produkt.get("ean")
+    # Läuft schon ein (nicht abgestürzter) Sync? Dann den zurückgeben.
+    laufend = SyncLauf.query.filter(
+        SyncLauf.status == "läuft",
+        SyncLauf.aktualisiert_am >= datetime.utcnow() - SYNC_TIMEOUT
+    ).first()
 
-    if ean:
-        print("SYNC:", ean)
+    if laufend:
+        return jsonify(laufend.als_dict()), 409
 
-        api = lade_produkt_von_api(ean)
-        movement = lade_bestand_von_api(ean)
+    lauf = SyncLauf()
+    db.session.add(lauf)
+    db.session.commit()
 
-        if api:
-            produkt["name"] = api.get("name")
-            produkt["autor"] = api.get("autor")
+    im_hintergrund(app, katalog_sync, lauf.id, name=f"katalog-sync-{lauf.id}")
 
-        if movement:
-            produkt["preis"] = movement.get("preis")
+    return jsonify(lauf.als_dict()), 202
 
-        # sofort speichern → kein RAM Wachstum
-        with open(json_path, "w", encoding="utf-8") as f:
-            json.dump(produkte, f, ensure_ascii=False, indent=2)
 
-    next_index = index + 1
+@app.route("/admin/cache-statistik")
+def cache_statistik():
+
+    if not session.get("admin"):
+        abort(403)
+
+    return jsonify({
+        "movement": movement_cache.statistik_kopie(),
+        "seiten": seiten_cache.statistik_kopie(),
+        "upstream": upstream_pool.statistik_kopie()
+    })
+
+
+@app.route("/admin/sync-buchbutler/status")
+def sync_buchbutler_status():
+
+    if not session.get("admin"):
+        abort(403)
+
+    lauf = SyncLauf.query.order_by(SyncLauf.id.desc()).first()
+
+    if not lauf:
+        return jsonify({"status": "keiner"})
+
+    if lauf.status == "läuft" and lauf.aktualisiert_am < datetime.utcnow() - SYNC_TIMEOUT:
+        lauf.status = "fehler"
+        lauf.meldung = "Sync-Prozess reagiert nicht mehr"
+        db.session.commit()
+
+    return jsonify(lauf.als_dict())
 
-    return redirect(url_for("sync_buchbutler", index=next_index))
-    
 # suche icon 
 @app.route("/suche", methods=["GET", "POST"])
 def suche():
-    query = ""
-    ergebnisse = []
 
+    # Alte POST-Formulare auf die cachebare GET-URL umleiten
     if request.method == "POST":
-        query = request.form.get("q", "").lower()
+        return redirect(url_for("suche", q=request.form.get("q", "")), code=303)
 
-        for produkt in produkte:
-            name = produkt.get("name", "").lower()
+    query = request.args.get("q", "").strip()
+    seite = request.args.get("seite", 1, type=int)
 
-            if query in name:
-                ergebnisse.append(produkt)
+    treffer = katalog.suchindex.suche(query, seite=seite) if query else None
 
-    return render_template(
+    response = make_response(render_template(
         "suche.html",
         query=query,
-        ergebnisse=ergebnisse
-    )
+        treffer=treffer,
+        ergebnisse=treffer.produkte if treffer else []
+    ))
+
+    if query:
+        response.headers["Cache-Control"] = "public, max-age=300"
+
+    return response
+
+
+@app.route("/api/suche/vorschlag")
+def suche_vorschlag():
+
+    praefix = praefix_normalisieren(request.args.get("q", ""))
+    anzahl = request.args.get("n", 8, type=int)
+
+    vorschlaege = []
+    for v in katalog.vorschlaege.vorschlagen(praefix, anzahl):
+        if v["typ"] == "autor":
+            url = url_for("suche", q=v["text"])
+        else:
+            url = url_for("produkt_detail", produkt_id=v["produkt_id"], slug=v["slug"])
+
+        vorschlaege.append({
+            "typ": v["typ"],
+            "text": v["text"],
+            "titel": v["name"],
+            "url": url
+        })
+
+    response = jsonify({"q": praefix, "vorschlaege": vorschlaege})
+
+    # Cache-Schlüssel ist das normalisierte Präfix, nicht die Rohanfrage
+    response.set_etag(f"{katalog.version}-{anzahl}-{praefix}")
+    response.headers["Cache-Control"] = "public, max-age=3600"
+
+    return response.make_conditional(request)
 
 # Produkt Detail
 
-  
-def slugify(text):
-    text = text.lower()
-    text = re.sub(r'[^a-z0-9äöüß ]', '', text)
-    return text.replace(" ", "-")
+# HTML ohne Preis/Bestand → lange cachebar; MOVEMENT lädt das JS nach
+PRODUKT_SEITE_TTL = int(os.getenv("PRODUKT_SEITE_TTL", "3600"))
+PRODUKT_SEITE_MAX_AGE = int(os.getenv("PRODUKT_SEITE_MAX_AGE", "600"))
+
 
-for p in produkte:
-    p["slug"] = slugify(p.get("name", "produkt"))
-    
 @app.route('/produkt/<int:produkt_id>/<slug>')
+@seiten_cache.seite(
+    seiten_version, seiten_variation,
+    ttl=PRODUKT_SEITE_TTL, max_age=PRODUKT_SEITE_MAX_AGE
+)
 def produkt_detail(produkt_id, slug):
 
-    lokale_daten = next(
-        (p.copy() for p in produkte if p["id"] == produkt_id),
-        None
-    )
+    lokale_daten = katalog.nach_id(produkt_id)
 
     if not lokale_daten:
         abort(404)
@@ -909,27 +1568,145 @@ def produkt_detail(produkt_id, slug):
     if not ean:
         abort(404)
 
-    produkt = cached_lade_produkt_von_api(ean)
+    # MOVEMENT schon anstoßen – die Verfügbarkeits-API findet es dann im Cache
+    upstream_pool.submit(("MOVEMENT", ean), cached_lade_bestand_von_api, ean)
+    content_future = upstream_pool.submit(("CONTENT", ean), cached_lade_produkt_von_api, ean)
 
-    if not produkt:
-        abort(404)
+    if content_future is not None:
+        wait([content_future], timeout=PRODUKT_DEADLINE)
 
-    movement = lade_bestand_von_api(ean)
-    if movement:
-        produkt.update(movement)
+    if content_future is not None and content_future.done():
+        # Gleichzeitige Aufrufe teilen sich die Future → eigene Kopie für update()
+        produkt = content_future.result()
 
-    produkt.update(lokale_daten)
+        if not produkt:
+            abort(404)
+        produkt = dict(produkt)
+    else:
+        # CONTENT zu spät oder Pool voll → mit lokalen Katalogdaten rendern;
+        # ein laufender Call füllt den Cache für den nächsten Aufruf
+        logger.warning("CONTENT für %s nicht innerhalb der Deadline", ean)
+        produkt = {}
+        nicht_cachen()
 
-    produkt.setdefault("bestand", "n/a")
-    produkt.setdefault("preis", 0)
-    produkt.setdefault("handling_zeit", "n/a")
-    produkt.setdefault("erfuellungsrate", "n/a")
+    produkt.update(lokale_daten)
 
     return render_template(
         "produkt.html",
         produkt=produkt
     )
 
+
+# Preis / Bestand (MOVEMENT) als JSON
+
+VERFUEGBARKEIT_MAX_AGE = int(os.getenv("VERFUEGBARKEIT_MAX_AGE", "30"))
+VERFUEGBARKEIT_MAX_EANS = 50
+
+
+def verfuegbarkeit(movement):
+    return {
+        "preis": movement.get("preis"),
+        "bestand": movement.get("bestand"),
+        "handling_zeit": movement.get("handling_zeit"),
+        "erfuellungsrate": movement.get("erfuellungsrate"),
+    }
+
+
+def verfuegbarkeit_antwort(daten, vollstaendig=True):
+    response = jsonify(daten)
+    response.set_etag(hashlib.sha1(response.get_data()).hexdigest())
+
+    # Lücken (Upstream-Fehler) nicht im Browser festhalten
+    if vollstaendig:
+        response.headers["Cache-Control"] = f"public, max-age={VERFUEGBARKEIT_MAX_AGE}"
+    else:
+        response.headers["Cache-Control"] = "no-cache"
+
+    return response.make_conditional(request)
+
+
+@app.route("/api/produkt/<ean>/verfuegbarkeit")
+def produkt_verfuegbarkeit(ean):
+
+    # Nur Katalog-EANs → keine beliebigen Upstream-Calls
+    if not katalog.nach_ean(ean):
+        abort(404)
+
+    future = upstream_pool.submit(("MOVEMENT", ean), cached_lade_bestand_von_api, ean)
+    if future is not None:
+        wait([future], timeout=PRODUKT_DEADLINE)
+
+    movement = future.result() if future is not None and future.done() else None
+
+    if not movement:
+        response = jsonify({"ean": ean, "fehler": "Verfügbarkeit gerade nicht abrufbar"})
+        response.status_code = 503
+        response.headers["Cache-Control"] = "no-store"
+        return response
+
+    return verfuegbarkeit_antwort({"ean": ean, **verfuegbarkeit(movement)})
+
+
+@app.route("/api/produkte/verfuegbarkeit")
+def produkte_verfuegbarkeit():
+    """?ean=…&ean=… (oder kommagetrennt) → {ean: {...} | null}"""
+
+    eans = []
+    for wert in request.args.getlist("ean"):
+        for ean in wert.split(","):
+            ean = ean.strip()
+            if ean and ean not in eans and katalog.nach_ean(ean):
+                eans.append(ean)
+
+    if len(eans) > VERFUEGBARKEIT_MAX_EANS:
+        return jsonify({"fehler": f"Höchstens {VERFUEGBARKEIT_MAX_EANS} EANs"}), 400
+
+    # Parallel, gemeinsame Deadline; Nachzügler füllen nur den Cache
+    futures = {
+        ean: upstream_pool.submit(("MOVEMENT", ean), cached_lade_bestand_von_api, ean)
+        for ean in eans
+    }
+    wait([f for f in futures.values() if f is not None], timeout=PRODUKT_DEADLINE)
+
+    ergebnis = {}
+    for ean, future in futures.items():
+        movement = future.result() if future is not None and future.done() else None
+        ergebnis[ean] = verfuegbarkeit(movement) if movement else None
+
+    return verfuegbarkeit_antwort(
+        {"produkte": ergebnis},
+        vollstaendig=all(v is not None for v in ergebnis.values())
+    )
+
+
+# Leseproben
+
+LESEPROBE_MAX_AGE = int(os.getenv("LESEPROBE_MAX_AGE", str(24 * 3600)))
+
+
+@app.route("/leseprobe/<path:dateiname>")
+def leseprobe(dateiname):
+    """PDF-Leseprobe mit starkem ETag (Content-Hash), 304 und Range-Requests.
+
+    Der PDF-Viewer im Browser holt so nur die Bytes, die er anzeigt;
+    der Body geht über wsgi.file_wrapper (gunicorn: sendfile).
+    """
+    if not dateiname.lower().endswith(".pdf"):
+        abort(404)
+
+    version = asset_manifest.version(f"{LESEPROBEN_ORDNER}/{dateiname}")
+    if not version:
+        abort(404)
+
+    return send_from_directory(
+        os.path.join(app.static_folder, LESEPROBEN_ORDNER),
+        dateiname,
+        mimetype="application/pdf",
+        etag=version,
+        max_age=LESEPROBE_MAX_AGE,
+        conditional=True
+    )
+
 # ============================
 # CART ROUTES
 # ============================
@@ -937,42 +1714,17 @@ def produkt_detail(produkt_id, slug):
 @app.route("/add-to-cart", methods=["POST"])
 def add_to_cart():
     produkt_id = int(request.form.get("produkt_id"))
-    produkt = next((p for p in produkte if p["id"] == produkt_id), None)
+    produkt = katalog.nach_id(produkt_id)
 
     if not produkt:
         abort(404)
 
-    # ✅ WICHTIG: Kopie machen (kein globales Update!)
-    produkt = produkt.copy()
-
-    # ✅ Preis + Bestand laden
-    if produkt.get("ean"):
-        movement = lade_bestand_von_api(produkt["ean"])
-        if movement:
-            produkt.update(movement)
-
-    cart = get_cart()
-
-    found = False
-    for item in cart:
-        if item["id"] == produkt_id:
-            item["quantity"] += 1
-            found = True
-            break
+    # Gespeichert wird nur {produkt_id: menge}; Preise ermittelt get_cart()
+    mengen = cart_mengen()
+    schluessel = str(produkt_id)
+    mengen[schluessel] = min(mengen.get(schluessel, 0) + 1, CART_MAX_MENGE)
 
-  
-
-    if not found:
-        cart.append({
-            "id": produkt["id"],
-            "title": produkt["name"],
-            "price": produkt.get("preis", 0),
-            "quantity": 1,
-            "ean": produkt["ean"]
-        })
-        
-
-    save_cart(cart)
+    save_cart(mengen)
     return redirect(url_for("cart"))
 
 
@@ -1001,26 +1753,59 @@ def cart():
 
 @app.route("/remove-from-cart/<int:produkt_id>")
 def remove_from_cart(produkt_id):
-    cart = get_cart()
-    cart = [item for item in cart if item["id"] != produkt_id]
-    save_cart(cart)
+    mengen = cart_mengen()
+    mengen.pop(str(produkt_id), None)
+    save_cart(mengen)
     return redirect(url_for("cart"))
 
 
 @app.route("/sync-cart", methods=["POST"])
 @csrf.exempt  
 def sync_cart():
-    data = request.get_json()
+    """Übernimmt den localStorage-Warenkorb – nur EAN und Menge, Preise kommen vom Server"""
+
+    if (request.content_length or 0) > CART_MAX_BYTES:
+        return {"status": "error", "message": "Warenkorb zu groß"}, 413
 
-    if not data:
+    data = request.get_json(silent=True)
+
+    if not isinstance(data, list) or len(data) > CART_MAX_POSITIONEN:
         return {"status": "error"}, 400
 
-    session["cart"] = data
-    session.modified = True
+    mengen = {}
+    abgelehnt = []
+    for item in data:
+        if not isinstance(item, dict):
+            continue
+
+        produkt = katalog.nach_ean(item.get("ean")) if item.get("ean") else None
+        try:
+            menge = int(item.get("quantity", 1))
+        except (TypeError, ValueError):
+            continue
+
+        if not produkt:
+            # Nur Katalogartikel – Gutscheine laufen über /gutschein
+            abgelehnt.append(item.get("ean"))
+            continue
+
+        if menge < 1:
+            continue
 
-    print("SYNCED CART:", session["cart"])
+        schluessel = str(produkt["id"])
+        mengen[schluessel] = min(mengen.get(schluessel, 0) + menge, CART_MAX_MENGE)
 
-    return {"status": "ok"}
+    save_cart(mengen)
+
+    if abgelehnt:
+        return {
+            "status": "abgelehnt",
+            "message": "Nicht im Katalog – Gutscheine bitte über die Gutschein-Seite kaufen",
+            "abgelehnt": abgelehnt,
+            "positionen": len(mengen)
+        }, 422
+
+    return {"status": "ok", "positionen": len(mengen)}
     
 # ============================
 # CHECKOUT
@@ -1041,6 +1826,10 @@ def checkout():
             flash("Bitte gültige Daten eingeben.", "error")
             return redirect(url_for("checkout"))
 
+        if ohne_preis(cart_items):
+            flash("Preise sind gerade nicht abrufbar – bitte versuche es gleich noch einmal.", "error")
+            return redirect(url_for("cart"))
+
 
          # Kunde erfassen / Punkte vergeben
         if "user_id" in session:
@@ -1056,8 +1845,9 @@ def checkout():
                 db.session.add(gutschein)
                 send_email(
                     subject="Dein Gutschein 🎁",
-                    body=f"Dein Code: {code}",
-                    recipient=user.email
+                    recipient=user.email,
+                    html=f"<p>Dein Code: <b>{code}</b></p>",
+                    plain_text=f"Dein Code: {code}"
                 )
             db.session.commit()
 
@@ -1123,26 +1913,135 @@ def submit():
 # ============================
 
 
+# -----------------------------
+# Mail-Warteschlange
+# -----------------------------
+
+MAIL_TAKT = int(os.getenv("MAIL_TAKT", "30"))                 # Sekunden zwischen Läufen ohne Weckruf
+MAIL_PARALLEL = int(os.getenv("MAIL_PARALLEL", "4"))
+MAIL_MAX_VERSUCHE = int(os.getenv("MAIL_MAX_VERSUCHE", "6"))
+MAIL_SPERRE = timedelta(minutes=2)
+MAIL_BATCH = 50
+
+# Weckt den Mail-Worker dieses Prozesses, sobald etwas eingereiht wurde
+mail_wecker = threading.Event()
+
+
 def send_email(subject, recipient, html, plain_text=None):
-    if not SENDGRID_API_KEY or not EMAIL_SENDER:
+    """Reiht die Mail ein – zugestellt wird im Hintergrund (mails_zustellen)"""
+
+    if not mail_konfiguriert():
         logger.warning("SendGrid nicht konfiguriert")
         return
 
-    
-    message = Mail(
-        from_email=EMAIL_SENDER,
-        to_emails=recipient,
-        subject=subject,
-        html_content=html,
-        plain_text_content=plain_text
+    db.session.add(
+        MailAuftrag(
+            empfaenger=recipient,
+            betreff=subject,
+            html=html,
+            text=plain_text
+        )
     )
+    db.session.commit()
+    mail_wecker.set()
 
-    sg = SendGridAPIClient(SENDGRID_API_KEY)
 
+def mail_zustellen(auftrag):
+    """Läuft im Thread-Pool – nur HTTP, keine DB-Zugriffe"""
     try:
-        sg.send(message)
-    except Exception:
-        logger.exception("Email Versand fehlgeschlagen")
+        email_senden(auftrag["betreff"], auftrag["empfaenger"], auftrag["html"], auftrag["text"])
+        return None
+    except Exception as e:
+        return str(e) or e.__class__.__name__
+
+
+def mails_zustellen():
+    """Stellt fällige Mails parallel über den geteilten SendGrid-Client zu"""
+
+    if not mail_konfiguriert():
+        return
+
+    jetzt = datetime.utcnow()
+    frei = MailAuftrag.naechster_versuch_am <= jetzt
+
+    faellig = MailAuftrag.query.filter(
+        MailAuftrag.status == "offen", frei
+    ).order_by(MailAuftrag.id).limit(MAIL_BATCH).all()
+
+    # Reservieren, damit kein anderer Worker dieselbe Mail verschickt
+    reserviert = []
+    for m in faellig:
+        ergebnis = db.session.execute(
+            update(MailAuftrag)
+            .where(MailAuftrag.id == m.id, MailAuftrag.status == "offen", frei)
+            .values(naechster_versuch_am=jetzt + MAIL_SPERRE)
+            .execution_options(synchronize_session=False)
+        )
+        if ergebnis.rowcount:
+            reserviert.append(m)
+    db.session.commit()
+
+    if not reserviert:
+        return
+
+    with ThreadPoolExecutor(max_workers=MAIL_PARALLEL) as pool:
+        fehler = list(pool.map(
+            mail_zustellen,
+            [
+                {"betreff": m.betreff, "empfaenger": m.empfaenger, "html": m.html, "text": m.text}
+                for m in reserviert
+            ]
+        ))
+
+    for m, f in zip(reserviert, fehler):
+        if f is None:
+            m.status = "gesendet"
+            m.gesendet_am = datetime.utcnow()
+            m.letzter_fehler = None
+            continue
+
+        m.versuche = (m.versuche or 0) + 1
+        m.letzter_fehler = f[:1000]
+        logger.warning("Mail %s an %s fehlgeschlagen (%s): %s", m.id, m.empfaenger, m.versuche, f)
+
+        if m.versuche >= MAIL_MAX_VERSUCHE:
+            m.status = "fehler"
+        else:
+            # 1 min, 2 min, 4 min …
+            m.naechster_versuch_am = datetime.utcnow() + timedelta(minutes=2 ** (m.versuche - 1))
+
+    db.session.commit()
+
+
+@app.route("/admin/mails")
+def admin_mails():
+    if not session.get("admin"):
+        abort(403)
+
+    fehlgeschlagen = MailAuftrag.query.filter_by(status="fehler").order_by(MailAuftrag.id.desc()).limit(200).all()
+    offen = MailAuftrag.query.filter_by(status="offen").count()
+
+    return render_template(
+        "admin_mails.html",
+        fehlgeschlagen=fehlgeschlagen,
+        offen=offen
+    )
+
+
+@app.route("/admin/mails/<int:mail_id>/erneut-senden", methods=["POST"])
+def mail_erneut_senden(mail_id):
+    if not session.get("admin"):
+        abort(403)
+
+    m = db.get_or_404(MailAuftrag, mail_id)
+    if m.status == "fehler":
+        m.status = "offen"
+        m.versuche = 0
+        m.naechster_versuch_am = datetime.utcnow()
+        db.session.commit()
+        mail_wecker.set()
+
+    return redirect(url_for("admin_mails"))
 
 
 @app.route("/admin/newsletter")
@@ -1154,9 +2053,12 @@ def admin_newsletter():
         NewsletterSubscriber.created_at.desc()
     ).all()
 
+    versand = NewsletterVersand.query.order_by(NewsletterVersand.id.desc()).limit(5).all()
+
     return render_template(
         "admin_newsletter.html",
-        subscribers=subscribers
+        subscribers=subscribers,
+        versand=versand
     )
 
 
@@ -1236,40 +2138,170 @@ def confirm_newsletter(token):
     return redirect("/danke")
 
 
-@app.route("/admin/send-newsletter", methods=["POST"])
-def send_newsletter():
-    if not session.get("admin"):
-        abort(403)
-
-    subject = request.form.get("subject")
-    content = request.form.get("content")  # HTML erlaubt
+# -----------------------------
+# Newsletter-Versand im Hintergrund
+# -----------------------------
 
-    subscribers = NewsletterSubscriber.query.filter_by(confirmed=True).all()
+NEWSLETTER_BATCH = min(int(os.getenv("NEWSLETTER_BATCH", str(BATCH_MAX))), BATCH_MAX)
+NEWSLETTER_PAUSE = float(os.getenv("NEWSLETTER_PAUSE", "1"))     # Sekunden zwischen Batches
+NEWSLETTER_TAKT = int(os.getenv("NEWSLETTER_TAKT", "30"))
+NEWSLETTER_SPERRE = timedelta(minutes=5)
+NEWSLETTER_VERSUCHE = 3
 
-    for sub in subscribers:
-        unsubscribe_url = url_for(
-            "unsubscribe_newsletter",
-            token=sub.token,
-            _external=True
-        )
 
-        html_body = f"""
+def newsletter_html(content):
+    return f"""
         <div style="font-family: Arial, sans-serif; padding: 20px;">
             {content}
 
             <p style="margin-top:20px; font-size:12px; color: gray;">
-                <a href="{unsubscribe_url}">Abmelden vom Newsletter</a>
+                <a href="{ABMELDE_PLATZHALTER}">Abmelden vom Newsletter</a>
             </p>
         </div>
         """
 
-        send_email(
-            subject=subject,
-            recipient=sub.email,
-            html=html_body
+
+def newsletter_versand_abarbeiten():
+    """Versendet den ältesten offenen Newsletter-Job in Batches ab dem gespeicherten Cursor"""
+
+    if not mail_konfiguriert():
+        return
+
+    jetzt = datetime.utcnow()
+    frei = or_(NewsletterVersand.gesperrt_bis.is_(None), NewsletterVersand.gesperrt_bis <= jetzt)
+
+    job = NewsletterVersand.query.filter(
+        NewsletterVersand.status.in_(("wartend", "läuft")),
+        frei
+    ).order_by(NewsletterVersand.id).first()
+
+    if job is None:
+        return
+
+    # Job reservieren – abgestürzte Worker geben ihn nach NEWSLETTER_SPERRE frei
+    reserviert = db.session.execute(
+        update(NewsletterVersand)
+        .where(NewsletterVersand.id == job.id, frei)
+        .values(status="läuft", gesperrt_bis=jetzt + NEWSLETTER_SPERRE)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.commit()
+
+    if not reserviert:
+        return
+
+    db.session.refresh(job)
+
+    bestaetigt = NewsletterSubscriber.query.filter_by(confirmed=True)
+    if not job.gesamt:
+        job.gesamt = bestaetigt.count()
+
+    html = newsletter_html(job.inhalt)
+    fehlversuche = 0
+
+    while True:
+        subs = (
+            bestaetigt
+            .filter(NewsletterSubscriber.id > job.letzte_subscriber_id)
+            .order_by(NewsletterSubscriber.id)
+            .limit(NEWSLETTER_BATCH)
+            .all()
         )
 
-    return f"{len(subscribers)} Emails gesendet ✅"
+        if not subs:
+            job.status = "fertig"
+            job.beendet_am = datetime.utcnow()
+            job.gesperrt_bis = None
+            db.session.commit()
+            logger.info("Newsletter %s versendet: %s Empfänger", job.id, job.gesendet)
+            return
+
+        # Bestätigte Abonnenten haben keinen Token mehr → für den Abmeldelink neu vergeben
+        for sub in subs:
+            if not sub.token:
+                sub.token = str(uuid.uuid4())
+        db.session.commit()
+
+        empfaenger = [
+            (sub.email, job.abmelde_vorlage.replace("__TOKEN__", sub.token))
+            for sub in subs
+        ]
+
+        try:
+            newsletter_batch_senden(job.betreff, html, empfaenger)
+        except Exception as e:
+            fehlversuche += 1
+            logger.warning("Newsletter %s: Batch fehlgeschlagen (%s): %s", job.id, fehlversuche, e)
+
+            if fehlversuche >= NEWSLETTER_VERSUCHE:
+                job.status = "fehler"
+                job.meldung = str(e)[:1000]
+                job.gesperrt_bis = None
+                db.session.commit()
+                return
+
+            job.gesperrt_bis = datetime.utcnow() + NEWSLETTER_SPERRE
+            db.session.commit()
+            time.sleep(NEWSLETTER_PAUSE * 2 ** fehlversuche)
+            continue
+
+        fehlversuche = 0
+        job.letzte_subscriber_id = subs[-1].id
+        job.gesendet += len(subs)
+        job.aktualisiert_am = datetime.utcnow()
+        job.gesperrt_bis = job.aktualisiert_am + NEWSLETTER_SPERRE
+        db.session.commit()
+
+        time.sleep(NEWSLETTER_PAUSE)
+
+
+@app.route("/admin/send-newsletter", methods=["POST"])
+def send_newsletter():
+    if not session.get("admin"):
+        abort(403)
+
+    subject = request.form.get("subject")
+    content = request.form.get("content")  # HTML erlaubt
+
+    if not subject or not content:
+        flash("Betreff und Text sind Pflicht.", "error")
+        return redirect(url_for("admin_newsletter"))
+
+    job = NewsletterVersand(
+        betreff=subject,
+        inhalt=content,
+        abmelde_vorlage=url_for("unsubscribe_newsletter", token="__TOKEN__", _external=True)
+    )
+    db.session.add(job)
+    db.session.commit()
+
+    # Sofort starten; der periodische Job setzt nach einem Absturz fort
+    im_hintergrund(app, newsletter_versand_abarbeiten, name="newsletter-versand")
+
+    return redirect(url_for("admin_newsletter"))
+
+
+@app.route("/admin/newsletter/versand/<int:versand_id>")
+def newsletter_versand_status(versand_id):
+    if not session.get("admin"):
+        abort(403)
+
+    return jsonify(db.get_or_404(NewsletterVersand, versand_id).als_dict())
+
+
+@app.route("/admin/newsletter/versand/<int:versand_id>/fortsetzen", methods=["POST"])
+def newsletter_versand_fortsetzen(versand_id):
+    if not session.get("admin"):
+        abort(403)
+
+    job = db.get_or_404(NewsletterVersand, versand_id)
+    if job.status == "fehler":
+        job.status = "wartend"
+        job.meldung = None
+        db.session.commit()
+        im_hintergrund(app, newsletter_versand_abarbeiten, name="newsletter-versand")
+
+    return redirect(url_for("admin_newsletter"))
 
 
 @app.route("/newsletter/unsubscribe/<token>")
@@ -1290,14 +2322,17 @@ def unsubscribe_newsletter(token):
 # ============================
 
 @app.route("/agb")
+@seite_cachen
 def agb():
     return render_template("agb.html", user_email=session.get("user_email"))
 
 @app.route("/datenschutz")
+@seite_cachen
 def datenschutz():
     return render_template("datenschutz.html", user_email=session.get("user_email"))
 
 @app.route("/impressum")
+@seite_cachen
 def impressum():
     return render_template("impressum.html", user_email=session.get("user_email"))
 
@@ -1308,26 +2343,32 @@ def impressum():
 # ============================
 
 @app.route("/danke")
+@seite_cachen
 def danke():
     return render_template("danke.html", user_email=session.get("user_email"))
 
 @app.route("/kontaktdanke")
+@seite_cachen
 def kontaktdanke():
     return render_template("kontaktdanke.html", user_email=session.get("user_email"))
 
 @app.route("/bestelldanke")
+@seite_cachen
 def bestelldanke():
     return render_template("bestelldanke.html", user_email=session.get("user_email"))
 
 @app.route("/newsletterbesteatigung")
+@seite_cachen
 def newsletterbesteatigung():
     return render_template("newsletterbesteatigung.html", user_email=session.get("user_email"))
     
 @app.route("/newsletteranmeldung")
+@seite_cachen
 def newsletteranmeldung():
     return render_template("newsletteranmeldung.html", user_email=session.get("user_email"))
 
 @app.route("/gutschein")
+@seite_cachen
 def gutschein():
     return render_template("gutschein.html", user_email=session.get("user_email"))
     
@@ -1336,6 +2377,7 @@ def gutschein():
 # ============================
 
 @app.route("/")
+@seite_cachen
 def index():
 
     kategorienamen = [
@@ -1353,7 +2395,7 @@ def index():
     }
 
     kategorien = [
-        (k, [p for p in produkte if p.get("kategorie") == k])
+        (k, katalog.kategorie(k))
         for k in kategorienamen
     ]
 
@@ -1364,6 +2406,37 @@ def index():
         user_email=session.get("user_email")
     )
 
+# =====================================================
+# HINTERGRUND-JOBS (nur in Web-Workern)
+# =====================================================
+
+def hintergrund_jobs():
+    if os.getenv("MAIL_WORKER", "1") == "1":
+        periodisch(app, MAIL_TAKT, mails_zustellen, name="mail-versand", wecker=mail_wecker)
+
+    # Ohne Zugangsdaten liefen beide Jobs nur ins Leere (und loggten pro Takt)
+    if not buchbutler.konfiguriert:
+        logger.warning("Buchbutler nicht konfiguriert – Bestellstatus-Poller und Bestellausgang laufen nicht")
+    else:
+        if os.getenv("BESTELLSTATUS_POLLER", "1") == "1":
+            periodisch(app, BESTELLSTATUS_TAKT, bestellstatus_pruefen, name="bestellstatus-poller")
+
+        if os.getenv("BESTELLAUSGANG_WORKER", "1") == "1":
+            periodisch(app, BESTELLAUSGANG_TAKT, bestellausgang_abarbeiten, name="bestellausgang")
+
+    if os.getenv("PAYPAL_WEBHOOK_WORKER", "1") == "1":
+        periodisch(app, PAYPAL_WEBHOOK_TAKT, paypal_ereignisse_verarbeiten, name="paypal-webhooks")
+
+    if os.getenv("NEWSLETTER_WORKER", "1") == "1":
+        periodisch(app, NEWSLETTER_TAKT, newsletter_versand_abarbeiten, name="newsletter-versand")
+
+    periodisch(app, 3600, sitzungen_aufraeumen, name="sitzungen-aufraeumen")
+
+    content_cache_aufwaermen()
+
+
+beim_ersten_request(app, hintergrund_jobs, name="hintergrund-jobs")
+
 # =====================================================
 # START (RENDER READY)
 # =====================================================
@@ -0,0 +1,142 @@
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+
+from flask import request, send_from_directory
+from werkzeug.exceptions import NotFound
+from werkzeug.security import safe_join
+
+
+logger = logging.getLogger(__name__)
+
+
+# =====================================================
+# STATISCHE DATEIEN: CONTENT-HASH + VORKOMPRIMIERT
+# =====================================================
+
+MANIFEST_NAME = os.path.join("build", "assets.json")         # relativ zu static/
+KOMPRIMIERT_ORDNER = os.path.join("build", "komprimiert")
+
+# Nur Textformate lohnen sich – Bilder/PDFs sind schon komprimiert
+KOMPRIMIERBAR = (".css", ".js", ".svg", ".json", ".txt", ".xml", ".ico")
+
+# Reihenfolge = Präferenz, wenn der Client beides akzeptiert
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+HASH_LAENGE = 12
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+def datei_hash(pfad):
+    h = hashlib.sha256()
+    with open(pfad, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()[:HASH_LAENGE]
+
+
+def datei_stand(pfad):
+    st = os.stat(pfad)
+    return st.st_size, st.st_mtime_ns
+
+
+class AssetManifest:
+    """Versionierte URLs und Auslieferung für static/.
+
+    `url_for('static', filename=…)` bekommt `?v=<hash>` angehängt. Der Hash
+    kommt aus static/build/assets.json (assets_bauen.py) oder wird beim
+    ersten Zugriff berechnet und gemerkt; ändert sich Größe oder mtime,
+    wird neu gerechnet. Anfragen mit aktuellem Hash sind `immutable`,
+    vorkomprimierte .br/.gz-Varianten werden bevorzugt ausgeliefert.
+    """
+
+    def __init__(self, static_ordner):
+        self.static_ordner = static_ordner
+        self.pfad = os.path.join(static_ordner, MANIFEST_NAME)
+        self._eintraege = None
+
+    @property
+    def eintraege(self):
+        if self._eintraege is None:
+            try:
+                with open(self.pfad, encoding="utf-8") as f:
+                    self._eintraege = json.load(f)
+            except FileNotFoundError:
+                logger.info("Kein Asset-Manifest unter %s – Hashes werden bei Bedarf berechnet", self.pfad)
+                self._eintraege = {}
+        return self._eintraege
+
+    def _eintrag(self, filename):
+        datei = safe_join(self.static_ordner, filename)
+        if datei is None:
+            return None
+
+        try:
+            groesse, mtime = datei_stand(datei)
+
+            eintrag = self.eintraege.get(filename)
+            if eintrag and eintrag["groesse"] == groesse and eintrag["mtime"] == mtime:
+                return eintrag
+
+            # Neu oder seit dem Build geändert → Varianten sind veraltet
+            eintrag = {
+                "hash": datei_hash(datei),
+                "groesse": groesse,
+                "mtime": mtime,
+                "varianten": [],
+            }
+        except OSError:
+            # Fehlt oder ist ein Verzeichnis
+            return None
+
+        self.eintraege[filename] = eintrag
+        return eintrag
+
+    def version(self, filename):
+        eintrag = self._eintrag(filename)
+        return eintrag["hash"] if eintrag else None
+
+    # -----------------------------
+    # Flask-Hooks
+    # -----------------------------
+
+    def url_defaults(self, endpoint, values):
+        """app.url_defaults: hängt ?v=<hash> an url_for('static', …)"""
+        if endpoint != "static" or "v" in values or "filename" not in values:
+            return
+
+        version = self.version(values["filename"])
+        if version:
+            values["v"] = version
+
+    def ausliefern(self, filename):
+        """Ersetzt die static-View von Flask"""
+        eintrag = self._eintrag(filename)
+        if eintrag is None:
+            raise NotFound()
+
+        response = None
+
+        if eintrag["varianten"]:
+            for encoding, endung in ENCODINGS:
+                if encoding in eintrag["varianten"] and request.accept_encodings[encoding]:
+                    response = send_from_directory(
+                        os.path.join(self.static_ordner, KOMPRIMIERT_ORDNER),
+                        filename + endung,
+                        mimetype=mimetypes.guess_type(filename)[0] or "application/octet-stream",
+                    )
+                    response.headers["Content-Encoding"] = encoding
+                    break
+            response = response or send_from_directory(self.static_ordner, filename)
+            response.vary.add("Accept-Encoding")
+        else:
+            response = send_from_directory(self.static_ordner, filename)
+
+        # Nur die aktuelle Version darf für immer gecacht werden; alte
+        # Hashes (HTML von vor dem Deploy) werden normal revalidiert
+        if request.args.get("v") == eintrag["hash"]:
+            response.headers["Cache-Control"] = IMMUTABLE
+
+        return response
@@ -0,0 +1,97 @@
+# assets_bauen.py
+"""Build-Schritt: Content-Hashes + gzip/brotli-Varianten für static/
+
+Aufruf (z.B. im Render-Build, nach bilder_bauen.py):  python assets_bauen.py
+"""
+import gzip
+import json
+import os
+
+from assets import (
+    ENCODINGS, KOMPRIMIERBAR, KOMPRIMIERT_ORDNER, MANIFEST_NAME, datei_hash, datei_stand
+)
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+BASIS = os.path.dirname(os.path.abspath(__file__))
+STATIC = os.path.join(BASIS, "static")
+
+# Manifest und komprimierte Kopien selbst nicht erfassen
+AUSLASSEN = (
+    os.path.join(STATIC, MANIFEST_NAME),
+    os.path.join(STATIC, KOMPRIMIERT_ORDNER),
+)
+
+KOMPRIMIERER = {
+    "gzip": lambda daten: gzip.compress(daten, compresslevel=9, mtime=0),
+    "br": lambda daten: brotli.compress(daten, quality=11) if brotli else None,
+}
+
+
+def dateien_finden():
+    for ordner, unterordner, dateien in os.walk(STATIC):
+        unterordner[:] = [u for u in unterordner if os.path.join(ordner, u) not in AUSLASSEN]
+        for name in dateien:
+            datei = os.path.join(ordner, name)
+            if datei not in AUSLASSEN and not name.startswith("."):
+                yield os.path.relpath(datei, STATIC).replace(os.sep, "/")
+
+
+def varianten_bauen(pfad):
+    """Schreibt .br/.gz neben static/build/komprimiert/<pfad>, wenn sie kleiner sind"""
+    with open(os.path.join(STATIC, pfad), "rb") as f:
+        daten = f.read()
+
+    varianten = []
+    for encoding, endung in ENCODINGS:
+        komprimiert = KOMPRIMIERER[encoding](daten)
+        if komprimiert is None or len(komprimiert) >= len(daten):
+            continue
+
+        ziel = os.path.join(STATIC, KOMPRIMIERT_ORDNER, pfad + endung)
+        os.makedirs(os.path.dirname(ziel), exist_ok=True)
+        with open(ziel, "wb") as f:
+            f.write(komprimiert)
+        varianten.append(encoding)
+
+    return varianten
+
+
+def main():
+    if brotli is None:
+        print("⚠️ brotli nicht installiert – nur gzip-Varianten")
+
+    manifest = {}
+    komprimiert = 0
+
+    for pfad in sorted(dateien_finden()):
+        datei = os.path.join(STATIC, pfad)
+        groesse, mtime = datei_stand(datei)
+
+        varianten = []
+        if pfad.lower().endswith(KOMPRIMIERBAR):
+            varianten = varianten_bauen(pfad)
+            komprimiert += bool(varianten)
+
+        manifest[pfad] = {
+            "hash": datei_hash(datei),
+            "groesse": groesse,
+            "mtime": mtime,
+            "varianten": varianten,
+        }
+
+    ziel = os.path.join(STATIC, MANIFEST_NAME)
+    os.makedirs(os.path.dirname(ziel), exist_ok=True)
+    with open(ziel + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(ziel + ".tmp", ziel)
+
+    print(f"✅ {len(manifest)} Dateien gehasht, {komprimiert} vorkomprimiert")
+
+
+if __name__ == "__main__":
+    main()
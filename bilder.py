@@ -0,0 +1,87 @@
+import json
+import logging
+import os
+
+from flask import url_for
+from markupsafe import Markup, escape
+
+
+logger = logging.getLogger(__name__)
+
+
+# =====================================================
+# RESPONSIVE BILDER (Manifest von bilder_bauen.py)
+# =====================================================
+
+BILD_ORDNER = os.path.join("build", "img")          # relativ zu static/
+MANIFEST_NAME = os.path.join("build", "bilder.json")
+
+# Reihenfolge = Präferenz des Browsers in <picture>
+FORMATE = (("avif", "image/avif"), ("webp", "image/webp"))
+
+
+class BildManifest:
+    """Liest static/build/bilder.json einmal und baut daraus <picture>-Tags.
+
+    Fehlt das Manifest oder ein Bild darin (z.B. lokal ohne Build-Schritt),
+    wird ein normales <img> auf das Original ausgegeben.
+    """
+
+    def __init__(self, static_ordner):
+        self.pfad = os.path.join(static_ordner, MANIFEST_NAME)
+        self._eintraege = None
+
+    @property
+    def eintraege(self):
+        if self._eintraege is None:
+            try:
+                with open(self.pfad, encoding="utf-8") as f:
+                    self._eintraege = json.load(f)
+            except FileNotFoundError:
+                logger.info("Kein Bild-Manifest unter %s – Originale werden ausgeliefert", self.pfad)
+                self._eintraege = {}
+        return self._eintraege
+
+    def _url(self, pfad):
+        if pfad.startswith(("http://", "https://", "/")):
+            return pfad
+        # über url_for → versioniert (assets.py)
+        return url_for("static", filename=pfad)
+
+    def bild(self, pfad, alt="", sizes="100vw", klasse=None, loading="lazy", **attribute):
+        """<picture> mit AVIF/WebP-srcset, Platzhalter und Original als Fallback"""
+
+        eintrag = self.eintraege.get(pfad)
+
+        img_attribute = {"src": self._url(pfad), "alt": alt, "class": klasse, "loading": loading}
+        img_attribute.update(attribute)
+
+        if not eintrag:
+            return Markup(f"<img{_attribute(img_attribute)}>")
+
+        img_attribute.setdefault("width", eintrag["breite"])
+        img_attribute.setdefault("height", eintrag["hoehe"])
+        img_attribute["decoding"] = "async"
+        if eintrag.get("platzhalter"):
+            img_attribute["style"] = (
+                f"background:url({eintrag['platzhalter']}) center/cover no-repeat;"
+                + img_attribute.get("style", "")
+            )
+
+        quellen = []
+        for endung, mime in FORMATE:
+            varianten = eintrag["varianten"].get(endung)
+            if not varianten:
+                continue
+            srcset = ", ".join(f"{self._url(datei)} {breite}w" for breite, datei in varianten)
+            quellen.append(f'<source type="{mime}" srcset="{escape(srcset)}" sizes="{escape(sizes)}">')
+
+        return Markup(f"<picture>{''.join(quellen)}<img{_attribute(img_attribute)}></picture>")
+
+
+def _attribute(werte):
+    return "".join(
+        f' {name.replace("_", "-")}="{escape(wert)}"'
+        for name, wert in werte.items()
+        if wert is not None and wert is not False
+    )
@@ -0,0 +1,147 @@
+# bilder_bauen.py
+"""Build-Schritt: verkleinerte AVIF/WebP-Varianten + Manifest für bilder.py
+
+Aufruf (z.B. im Render-Build):  python bilder_bauen.py
+"""
+import base64
+import io
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from bilder import BILD_ORDNER, MANIFEST_NAME
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:
+    Image = None
+
+
+BASIS = os.path.dirname(os.path.abspath(__file__))
+STATIC = os.path.join(BASIS, "static")
+TEMPLATES = os.path.join(BASIS, "templates")
+PRODUKTE = os.path.join(BASIS, "produkte.json")
+
+BREITEN = (320, 640, 960, 1440)
+# Speicher-Optionen pro Format (AVIF mit speed=8: ~3x schneller, kaum größer)
+OPTIONEN = {
+    "webp": {"quality": 78},
+    "avif": {"quality": 55, "speed": 8},
+}
+PLATZHALTER_BREITE = 24
+
+ENDUNGEN = (".jpg", ".jpeg", ".png", ".webp")
+
+# url_for('static', filename='images/…')
+TEMPLATE_BILD = re.compile(r"""filename\s*=\s*['"]([^'"]+)['"]""")
+
+
+def bilder_finden():
+    """Alle lokalen Bilder aus produkte.json und den Templates"""
+    pfade = set()
+
+    with open(PRODUKTE, encoding="utf-8") as f:
+        for produkt in json.load(f):
+            for bild in produkt.get("bilder") or []:
+                if not bild.startswith("http"):
+                    pfade.add(bild)
+
+    for name in os.listdir(TEMPLATES):
+        if name.endswith(".html"):
+            with open(os.path.join(TEMPLATES, name), encoding="utf-8") as f:
+                pfade.update(TEMPLATE_BILD.findall(f.read()))
+
+    return sorted(
+        p for p in pfade
+        if p.lower().endswith(ENDUNGEN) and os.path.isfile(os.path.join(STATIC, p))
+    )
+
+
+def _ziel(pfad, breite, endung):
+    stamm = os.path.splitext(pfad)[0]
+    return os.path.join(BILD_ORDNER, f"{stamm}-{breite}.{endung}").replace(os.sep, "/")
+
+
+def bild_bauen(pfad):
+    """Erzeugt die Varianten eines Bildes (überspringt bereits aktuelle)"""
+    quelle = os.path.join(STATIC, pfad)
+    stand = os.path.getmtime(quelle)
+
+    with Image.open(quelle) as original:
+        bild = ImageOps.exif_transpose(original)
+        if bild.mode not in ("RGB", "RGBA"):
+            bild = bild.convert("RGBA" if "transparency" in bild.info else "RGB")
+
+        breite, hoehe = bild.size
+        # Originalbreite (höchstens BREITEN[-1]) immer dabei, aber nicht doppelt
+        breiten = sorted({*(b for b in BREITEN if b < breite), min(breite, BREITEN[-1])})
+
+        eintrag = {"breite": breite, "hoehe": hoehe, "varianten": {}}
+
+        for endung in OPTIONEN:
+            # AVIF braucht ein Pillow mit libavif – sonst nur WebP
+            if not features.check(endung):
+                continue
+
+            varianten = []
+            for b in breiten:
+                ziel = _ziel(pfad, b, endung)
+                datei = os.path.join(STATIC, ziel)
+
+                if not (os.path.exists(datei) and os.path.getmtime(datei) >= stand):
+                    os.makedirs(os.path.dirname(datei), exist_ok=True)
+                    klein = bild.resize((b, round(hoehe * b / breite)), Image.LANCZOS)
+                    klein.save(datei, **OPTIONEN[endung])
+
+                varianten.append([b, ziel])
+            eintrag["varianten"][endung] = varianten
+
+        # Winziges, weichgezeichnetes Vorschaubild als data:-URI
+        mini = bild.resize(
+            (PLATZHALTER_BREITE, max(1, round(hoehe * PLATZHALTER_BREITE / breite))),
+            Image.BILINEAR
+        )
+        puffer = io.BytesIO()
+        mini.save(puffer, "WEBP", quality=30)
+        eintrag["platzhalter"] = "data:image/webp;base64," + base64.b64encode(puffer.getvalue()).decode()
+
+    return pfad, eintrag
+
+
+def main():
+    if Image is None:
+        print("⚠️ Pillow nicht installiert – Bilder werden nicht optimiert")
+        return
+
+    pfade = bilder_finden()
+    manifest = {}
+    fehler = 0
+
+    with ProcessPoolExecutor() as pool:
+        for pfad, ergebnis in zip(pfade, pool.map(_sicher_bauen, pfade)):
+            if ergebnis is None:
+                fehler += 1
+            else:
+                manifest[pfad] = ergebnis
+
+    ziel = os.path.join(STATIC, MANIFEST_NAME)
+    os.makedirs(os.path.dirname(ziel), exist_ok=True)
+    with open(ziel + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(ziel + ".tmp", ziel)
+
+    print(f"✅ {len(manifest)} Bilder optimiert, {fehler} fehlgeschlagen")
+
+
+def _sicher_bauen(pfad):
+    try:
+        return bild_bauen(pfad)[1]
+    except Exception as e:
+        print(f"   - {pfad}: {e}", file=sys.stderr)
+        return None
+
+
+if __name__ == "__main__":
+    main()
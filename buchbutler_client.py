@@ -0,0 +1,127 @@
+import logging
+import os
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+logger = logging.getLogger(__name__)
+
+
+# =====================================================
+# BUCHBUTLER HTTP CLIENT
+# =====================================================
+
+BASE_URL = "https://api.buchbutler.de"
+
+# (Connect, Read) pro Endpoint
+TIMEOUTS = {
+    "CONTENT": (3.05, 10),
+    "MOVEMENT": (3.05, 10),
+    "ORDER": (3.05, 20),
+    "ORDERRESPONSE": (3.05, 10),
+}
+
+# Bei diesen Statuscodes lohnt ein erneuter Versuch
+WIEDERHOLEN_BEI = {429, 500, 502, 503, 504}
+
+
+class BuchbutlerClient:
+    """Gemeinsamer Zugang zu allen Buchbutler-Endpoints.
+
+    Hält eine Keep-Alive-Session mit Connection-Pool (kein TCP/TLS-
+    Handshake pro Aufruf), setzt pro Endpoint eigene Timeouts und
+    wiederholt idempotente Requests mit Backoff + Jitter. ORDER wird nur
+    wiederholt, wenn die Verbindung gar nicht erst zustande kam.
+    """
+
+    def __init__(self, user=None, passwort=None, base_url=BASE_URL, pool_groesse=None, versuche=None):
+        self.user = user or os.getenv("BUCHBUTLER_USER")
+        self.passwort = passwort or os.getenv("BUCHBUTLER_PASSWORD")
+        self.base_url = base_url
+        self.versuche = versuche or int(os.getenv("BUCHBUTLER_VERSUCHE", "3"))
+
+        pool_groesse = pool_groesse or int(os.getenv("BUCHBUTLER_POOL", "16"))
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_groesse)
+
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    @property
+    def konfiguriert(self):
+        return bool(self.user and self.passwort)
+
+    def zugangsdaten(self):
+        return {"username": self.user, "passwort": self.passwort}
+
+    def _warten(self, versuch):
+        time.sleep(0.5 * (2 ** versuch) * (0.5 + random.random()))
+
+    def _anfrage(self, methode, endpoint, idempotent=True, **kwargs):
+        url = f"{self.base_url}/{endpoint}/"
+        timeout = TIMEOUTS.get(endpoint, (3.05, 10))
+
+        for versuch in range(self.versuche):
+            letzter = versuch == self.versuche - 1
+
+            try:
+                response = self.session.request(methode, url, timeout=timeout, **kwargs)
+            except requests.exceptions.ConnectTimeout:
+                # Request ist nie angekommen → auch für ORDER unkritisch
+                if letzter:
+                    raise
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if letzter or not idempotent:
+                    raise
+            else:
+                if response.status_code not in WIEDERHOLEN_BEI or letzter or not idempotent:
+                    return response
+
+            logger.info("Buchbutler %s: Versuch %s fehlgeschlagen, neuer Versuch", endpoint, versuch + 1)
+            self._warten(versuch)
+
+    # -----------------------------
+    # Endpoints
+    # -----------------------------
+
+    def abfragen(self, endpoint, ean):
+        """CONTENT / MOVEMENT: liefert data["response"] oder None"""
+        params = dict(self.zugangsdaten(), ean=ean)
+
+        response = self._anfrage("GET", endpoint, params=params)
+        response.raise_for_status()
+
+        data = response.json()
+
+        if not data or "response" not in data:
+            return None
+
+        return data["response"]
+
+    def bestellen(self, payload):
+        """ORDER: nicht idempotent – wird nur bei Verbindungsaufbau-Fehlern wiederholt"""
+        payload = dict(self.zugangsdaten(), **payload)
+        response = self._anfrage("POST", "ORDER", idempotent=False, json=payload)
+        return response.json()
+
+    def orderresponse(self, collectkey):
+        """ORDERRESPONSE: reiner Lesezugriff, darf wiederholt werden"""
+        payload = dict(self.zugangsdaten(), collectkey=collectkey)
+        return self._anfrage("POST", "ORDERRESPONSE", json=payload)
+
+
+_standard = None
+_standard_lock = threading.Lock()
+
+
+def standard_client():
+    """Prozessweit geteilte Client-Instanz (erst nach load_dotenv() aufrufen)"""
+    global _standard
+    with _standard_lock:
+        if _standard is None:
+            _standard = BuchbutlerClient()
+        return _standard
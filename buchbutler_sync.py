@@ -0,0 +1,119 @@
+import logging
+import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+
+logger = logging.getLogger(__name__)
+
+
+# =====================================================
+# BUCHBUTLER SYNC ENGINE
+# =====================================================
+
+SYNC_WORKERS = int(os.getenv("BUCHBUTLER_SYNC_WORKERS", "8"))
+SYNC_PRO_SEKUNDE = float(os.getenv("BUCHBUTLER_SYNC_RPS", "10"))
+
+SyncErgebnis = namedtuple("SyncErgebnis", "ean content movement fehler")
+
+
+class Drossel:
+    """Begrenzt Requests pro Sekunde über alle Threads hinweg"""
+
+    def __init__(self, pro_sekunde):
+        self._abstand = 1.0 / pro_sekunde if pro_sekunde > 0 else 0.0
+        self._naechster = time.monotonic()
+        self._lock = threading.Lock()
+
+    def warten(self):
+        if not self._abstand:
+            return
+
+        with self._lock:
+            jetzt = time.monotonic()
+            slot = max(self._naechster, jetzt)
+            self._naechster = slot + self._abstand
+
+        if slot > jetzt:
+            time.sleep(slot - jetzt)
+
+
+def sync_felder(ergebnis):
+    """Die Felder, die wir lokal aus CONTENT/MOVEMENT übernehmen"""
+    felder = {}
+
+    if ergebnis.content:
+        felder["name"] = ergebnis.content.get("name")
+        felder["autor"] = ergebnis.content.get("autor")
+
+    if ergebnis.movement:
+        felder["preis"] = ergebnis.movement.get("preis")
+        felder["lagerbestand"] = ergebnis.movement.get("bestand")
+
+    return felder
+
+
+def delta(alt, neu):
+    """Nur die Felder, deren Wert sich tatsächlich geändert hat"""
+    return {
+        k: v for k, v in neu.items()
+        if v is not None and alt.get(k) != v
+    }
+
+
+class SyncEngine:
+    """Lädt CONTENT und MOVEMENT für viele EANs parallel.
+
+    Beide Abrufe einer EAN laufen als eigene Tasks auf einem begrenzten
+    Thread-Pool; alle Threads teilen sich eine Drossel (Requests/Sekunde).
+    Wiederholungen mit Backoff übernimmt der BuchbutlerClient.
+    """
+
+    def __init__(
+        self,
+        lade_content,
+        lade_movement,
+        max_workers=SYNC_WORKERS,
+        pro_sekunde=SYNC_PRO_SEKUNDE
+    ):
+        self.lade_content = lade_content
+        self.lade_movement = lade_movement
+        self.max_workers = max_workers
+        self.drossel = Drossel(pro_sekunde)
+
+    def _abrufen(self, funktion, ean):
+        self.drossel.warten()
+        return funktion(ean)
+
+    def laden(self, eans):
+        """Liefert pro EAN ein SyncErgebnis, sobald beide Abrufe fertig sind"""
+        offen = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {}
+            for ean in eans:
+                offen[ean] = {}
+                futures[pool.submit(self._abrufen, self.lade_content, ean)] = (ean, "content")
+                futures[pool.submit(self._abrufen, self.lade_movement, ean)] = (ean, "movement")
+
+            for future in as_completed(futures):
+                ean, art = futures[future]
+                teil = offen[ean]
+
+                try:
+                    teil[art] = future.result()
+                except Exception as e:
+                    logger.warning("Sync %s %s fehlgeschlagen: %s", art.upper(), ean, e)
+                    teil[art] = None
+                    teil.setdefault("fehler", []).append(art)
+
+                if "content" in teil and "movement" in teil:
+                    del offen[ean]
+                    yield SyncErgebnis(
+                        ean=ean,
+                        content=teil["content"],
+                        movement=teil["movement"],
+                        fehler=teil.get("fehler")
+                    )
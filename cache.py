@@ -0,0 +1,255 @@
+import copy
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+logger = logging.getLogger(__name__)
+
+
+# =====================================================
+# GETEILTER CACHE (SQLite, alle Worker eines Hosts)
+# =====================================================
+
+class SqliteCache:
+    """TTL-Cache in einer SQLite-Datei mit stale-while-revalidate.
+
+    Werte werden als JSON gespeichert, jeder Lesezugriff liefert also
+    eine eigene Kopie – Aufrufer dürfen das Ergebnis verändern. Ist ein
+    Eintrag älter als `ttl`, aber jünger als `ttl + stale`, wird der alte
+    Wert sofort geliefert und im Hintergrund erneuert.
+    """
+
+    def __init__(self, pfad, ttl, stale=0, hintergrund_threads=2):
+        self.pfad = pfad
+        self.ttl = ttl
+        self.stale = stale
+        self._lokal = threading.local()
+        self._laufend = set()
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(
+            max_workers=hintergrund_threads,
+            thread_name_prefix="cache-refresh"
+        )
+
+        with self._verbindung() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " schluessel TEXT PRIMARY KEY,"
+                " wert TEXT NOT NULL,"
+                " gespeichert REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS marker ("
+                " name TEXT PRIMARY KEY,"
+                " zeit REAL NOT NULL)"
+            )
+
+    def _verbindung(self):
+        conn = getattr(self._lokal, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.pfad, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._lokal.conn = conn
+        return conn
+
+    def lesen(self, schluessel):
+        """(wert, alter_in_sekunden) oder (None, None)"""
+        row = self._verbindung().execute(
+            "SELECT wert, gespeichert FROM cache WHERE schluessel = ?",
+            (schluessel,)
+        ).fetchone()
+
+        if row is None:
+            return None, None
+
+        return json.loads(row[0]), time.time() - row[1]
+
+    def schreiben(self, schluessel, wert):
+        with self._verbindung() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (schluessel, wert, gespeichert) VALUES (?, ?, ?)",
+                (schluessel, json.dumps(wert, ensure_ascii=False), time.time())
+            )
+
+    def frisch(self, schluessel):
+        _, alter = self.lesen(schluessel)
+        return alter is not None and alter < self.ttl
+
+    def _erneuern(self, schluessel, laden):
+        try:
+            wert = laden(schluessel)
+            if wert is not None:
+                self.schreiben(schluessel, wert)
+        except Exception:
+            logger.exception("Cache-Erneuerung für %s fehlgeschlagen", schluessel)
+        finally:
+            with self._lock:
+                self._laufend.discard(schluessel)
+
+    def im_hintergrund_erneuern(self, schluessel, laden):
+        with self._lock:
+            if schluessel in self._laufend:
+                return
+            self._laufend.add(schluessel)
+        self._pool.submit(self._erneuern, schluessel, laden)
+
+    def holen(self, schluessel, laden):
+        """Wert aus dem Cache oder per laden(schluessel) nachladen"""
+        wert, alter = self.lesen(schluessel)
+
+        if wert is not None:
+            if alter < self.ttl:
+                return wert
+            if alter < self.ttl + self.stale:
+                self.im_hintergrund_erneuern(schluessel, laden)
+                return wert
+
+        wert = laden(schluessel)
+        if wert is not None:
+            self.schreiben(schluessel, wert)
+        return wert
+
+    def beanspruchen(self, name, intervall):
+        """True für genau einen Prozess pro `intervall` Sekunden (z.B. Aufwärmen)"""
+        jetzt = time.time()
+        with self._verbindung() as conn:
+            cursor = conn.execute(
+                "INSERT INTO marker (name, zeit) VALUES (?, ?)"
+                " ON CONFLICT (name) DO UPDATE SET zeit = excluded.zeit"
+                " WHERE marker.zeit <= ?",
+                (name, jetzt, jetzt - intervall)
+            )
+        return cursor.rowcount == 1
+
+    def aufwaermen(self, schluessel_liste, laden, parallel=4):
+        """Lädt alle nicht frischen Schlüssel vorab (z.B. beim Start)"""
+        offen = [s for s in schluessel_liste if not self.frisch(s)]
+
+        with ThreadPoolExecutor(max_workers=parallel, thread_name_prefix="cache-warmup") as pool:
+            for schluessel in offen:
+                pool.submit(self._erneuern_direkt, schluessel, laden)
+
+        return len(offen)
+
+    def _erneuern_direkt(self, schluessel, laden):
+        # Zwischenzeitlich von einem anderen Worker geladen?
+        if self.frisch(schluessel):
+            return
+        wert = laden(schluessel)
+        if wert is not None:
+            self.schreiben(schluessel, wert)
+
+
+# =====================================================
+# KURZZEIT-CACHE MIT REQUEST-COALESCING
+# =====================================================
+
+class _Flug:
+    __slots__ = ("fertig", "wert", "fehler")
+
+    def __init__(self):
+        self.fertig = threading.Event()
+        self.wert = None
+        self.fehler = None
+
+
+class KurzzeitCache:
+    """Prozess-lokaler TTL-Cache mit "single flight".
+
+    Fragen mehrere Threads gleichzeitig denselben fehlenden Schlüssel an,
+    macht nur der erste den Upstream-Call; die anderen warten auf dessen
+    Ergebnis. Mehr als `max_eintraege` Schlüssel werden nicht gehalten:
+    erst fallen abgelaufene weg, dann die am längsten nicht gelesenen.
+    Zähler für Treffer, Fehlschläge, gebündelte Anfragen und Verdrängungen
+    liegen in `statistik`.
+    """
+
+    def __init__(self, ttl, max_eintraege=10000):
+        self.ttl = ttl
+        self.max_eintraege = max_eintraege
+        self._daten = OrderedDict()
+        self._fluege = {}
+        self._lock = threading.Lock()
+        self._gefegt = time.monotonic()
+        self.statistik = {"treffer": 0, "verfehlt": 0, "gebuendelt": 0, "verdraengt": 0}
+
+    def _aufraeumen(self, jetzt):
+        # Vorne liegen die am längsten nicht gelesenen – dort abgelaufene
+        # entfernen und beim ersten gültigen Eintrag aufhören
+        while self._daten:
+            schluessel, (_, t) = next(iter(self._daten.items()))
+            if jetzt - t < self.ttl:
+                break
+            del self._daten[schluessel]
+
+        # Weiter hinten liegende abgelaufene nur einmal pro TTL einsammeln
+        if jetzt - self._gefegt >= self.ttl:
+            self._gefegt = jetzt
+            abgelaufen = [k for k, (_, t) in self._daten.items() if jetzt - t >= self.ttl]
+            for k in abgelaufen:
+                del self._daten[k]
+
+        # Immer noch voll → am längsten nicht gelesene Einträge verdrängen
+        while len(self._daten) >= self.max_eintraege:
+            self._daten.popitem(last=False)
+            self.statistik["verdraengt"] += 1
+
+    def ansehen(self, schluessel):
+        """Gecachter Wert ohne Nachladen (oder None)"""
+        with self._lock:
+            eintrag = self._daten.get(schluessel)
+            if eintrag and time.monotonic() - eintrag[1] < self.ttl:
+                self._daten.move_to_end(schluessel)
+                return copy.copy(eintrag[0])
+        return None
+
+    def holen(self, schluessel, laden):
+        jetzt = time.monotonic()
+
+        with self._lock:
+            eintrag = self._daten.get(schluessel)
+            if eintrag and jetzt - eintrag[1] < self.ttl:
+                self._daten.move_to_end(schluessel)
+                self.statistik["treffer"] += 1
+                return copy.copy(eintrag[0])
+
+            flug = self._fluege.get(schluessel)
+            fuehrend = flug is None
+            if fuehrend:
+                flug = self._fluege[schluessel] = _Flug()
+                self.statistik["verfehlt"] += 1
+            else:
+                self.statistik["gebuendelt"] += 1
+
+        if fuehrend:
+            try:
+                flug.wert = laden(schluessel)
+            except Exception as e:
+                flug.fehler = e
+            finally:
+                with self._lock:
+                    # Fehlschläge (None) nicht cachen – nur bündeln
+                    if flug.wert is not None:
+                        self._daten.pop(schluessel, None)
+                        if len(self._daten) >= self.max_eintraege:
+                            self._aufraeumen(time.monotonic())
+                        self._daten[schluessel] = (flug.wert, time.monotonic())
+                    del self._fluege[schluessel]
+                flug.fertig.set()
+        else:
+            flug.fertig.wait()
+
+        if flug.fehler is not None:
+            raise flug.fehler
+
+        return copy.copy(flug.wert)
+
+    def statistik_kopie(self):
+        with self._lock:
+            return dict(self.statistik, eintraege=len(self._daten), ttl=self.ttl)
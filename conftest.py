@@ -0,0 +1,132 @@
+import json
+import os
+import tempfile
+
+import pytest
+
+
+# app.py braucht einen Secret Key; Tests laufen gegen eine In-Memory-DB,
+# einen eigenen CONTENT-Cache und ohne periodische Hintergrund-Jobs
+os.environ["FLASK_SECRET_KEY"] = os.environ.get("FLASK_SECRET_KEY") or "test"
+os.environ["DATABASE_URL"] = "sqlite://"
+os.environ["CONTENT_CACHE_PFAD"] = os.path.join(tempfile.mkdtemp(), "content.sqlite3")
+for name in ("MAIL_WORKER", "BESTELLSTATUS_POLLER", "BESTELLAUSGANG_WORKER",
+             "PAYPAL_WEBHOOK_WORKER", "NEWSLETTER_WORKER"):
+    os.environ[name] = "0"
+
+
+@pytest.fixture
+def shop(monkeypatch, tmp_path):
+    """app.py mit leerer Datenbank, leeren Caches und ohne CSRF/Rate-Limit"""
+    import app as shop
+    from cache import KurzzeitCache, SqliteCache
+    from hintergrund import UpstreamPool
+
+    with shop.app.app_context():
+        shop.db.drop_all()
+        shop.db.create_all()
+
+    monkeypatch.setitem(shop.app.config, "WTF_CSRF_ENABLED", False)
+    monkeypatch.setattr(shop.limiter, "enabled", False)
+    monkeypatch.setattr(shop, "movement_cache", KurzzeitCache(ttl=60))
+    monkeypatch.setattr(shop, "content_cache", SqliteCache(str(tmp_path / "content.sqlite3"), ttl=60))
+    # Eigener Pool: Nachzügler eines Tests teilen ihre Futures nicht mit dem nächsten
+    monkeypatch.setattr(shop, "upstream_pool", UpstreamPool(max_threads=4, max_wartend=8))
+    shop.seiten_cache.leeren()
+
+    yield shop
+
+    with shop.app.app_context():
+        shop.db.session.remove()
+
+
+@pytest.fixture
+def katalog(shop, tmp_path, monkeypatch):
+    """Kleiner Katalog in tmp_path statt produkte.json"""
+    from katalog import Katalog
+
+    pfad = tmp_path / "produkte.json"
+    pfad.write_text(json.dumps([
+        {"id": 1, "ean": "9783000000011", "name": "Die Brücke", "autor": "Anna Fluss",
+         "kategorie": "Kinderbuch"},
+        {"id": 2, "ean": "9783000000028", "name": "Jacominus", "autor": "Rebecca Dautremer",
+         "preis": 24.0, "kategorie": "Bilderbuch"},
+        {"id": 3, "ean": "9783000000035", "name": "Am Fluss", "kategorie": "Roman"},
+    ], ensure_ascii=False), encoding="utf-8")
+
+    katalog = Katalog.laden(str(pfad))
+    monkeypatch.setattr(shop, "katalog", katalog)
+    return katalog
+
+
+@pytest.fixture
+def client(shop):
+    return shop.app.test_client()
+
+
+@pytest.fixture
+def admin(client):
+    with client.session_transaction() as sitzung:
+        sitzung["admin"] = True
+    return client
+
+
+class BuchbutlerAttrappe:
+    """Ersetzt den Buchbutler-Client: ORDER zählt mit, ORDERRESPONSE aus `antworten`"""
+
+    konfiguriert = True
+
+    def __init__(self):
+        self.bestellungen = []
+        self.abfragen = []
+        self.antworten = {}
+        self.fehler = None
+
+    def bestellen(self, payload):
+        self.bestellungen.append(payload)
+        if self.fehler:
+            raise self.fehler
+        return {"import_hash": f"HASH-{len(self.bestellungen)}"}
+
+    def orderresponse(self, collectkey):
+        self.abfragen.append(collectkey)
+        antwort = self.antworten.get(collectkey)
+        return HttpAntwort(json.dumps(antwort) if antwort else "", antwort)
+
+
+class HttpAntwort:
+    status_code = 200
+
+    def __init__(self, text, daten):
+        self.text = text
+        self._daten = daten
+
+    def json(self):
+        return self._daten
+
+
+@pytest.fixture
+def buchbutler(shop, monkeypatch):
+    attrappe = BuchbutlerAttrappe()
+    monkeypatch.setattr(shop, "buchbutler", attrappe)
+    monkeypatch.setattr(shop, "BUCHBUTLER_MOL_KUNDE_ID", "1")
+    return attrappe
+
+
+@pytest.fixture
+def paypal_orders(shop, monkeypatch):
+    """Angelegte PayPal-Orders als (daten, headers)"""
+    angelegt = []
+
+    def bestellung_anlegen(daten, headers=None):
+        angelegt.append((daten, headers))
+        return {"id": f"ORDER-{len(angelegt)}"}
+
+    monkeypatch.setattr(shop.paypal, "bestellung_anlegen", bestellung_anlegen)
+    return angelegt
+
+
+@pytest.fixture
+def kontext(shop):
+    with shop.app.app_context():
+        yield shop.db.session
@@ -0,0 +1,124 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+logger = logging.getLogger(__name__)
+
+
+# =====================================================
+# HINTERGRUND-THREADS
+# =====================================================
+
+def im_hintergrund(app, funktion, *args, name=None):
+    """Startet funktion in einem Daemon-Thread mit App-Kontext"""
+
+    def lauf():
+        with app.app_context():
+            try:
+                funktion(*args)
+            except Exception:
+                logger.exception("Hintergrund-Job %s fehlgeschlagen", name or funktion.__name__)
+
+    thread = threading.Thread(target=lauf, name=name or funktion.__name__, daemon=True)
+    thread.start()
+    return thread
+
+
+def beim_ersten_request(app, funktion, *args, name=None):
+    """Startet funktion einmal pro Prozess beim ersten Request.
+
+    So laufen Hintergrund-Jobs nur in Web-Workern und nicht in Skripten,
+    die `app` nur importieren (import_produkte.py, sync_buchbutler.py …).
+    """
+    gestartet = False
+    lock = threading.Lock()
+
+    @app.before_request
+    def starten():
+        nonlocal gestartet
+        if gestartet:
+            return
+        with lock:
+            if gestartet:
+                return
+            gestartet = True
+        im_hintergrund(app, funktion, *args, name=name)
+
+
+def periodisch(app, intervall, funktion, name=None, wecker=None):
+    """Ruft funktion alle `intervall` Sekunden auf – jeder Lauf mit frischem App-Kontext.
+
+    Mit `wecker` (threading.Event) startet wecker.set() den nächsten Lauf sofort.
+    """
+    name = name or funktion.__name__
+
+    def schleife():
+        while True:
+            with app.app_context():
+                try:
+                    funktion()
+                except Exception:
+                    logger.exception("Periodischer Job %s fehlgeschlagen", name)
+
+            if wecker is None:
+                time.sleep(intervall)
+            else:
+                wecker.wait(intervall)
+                wecker.clear()
+
+    thread = threading.Thread(target=schleife, name=name, daemon=True)
+    thread.start()
+    return thread
+
+
+# =====================================================
+# UPSTREAM-POOL (begrenzt, ein Auftrag pro Schlüssel)
+# =====================================================
+
+class UpstreamPool:
+    """ThreadPoolExecutor mit begrenzter Warteschlange.
+
+    Angenommen werden höchstens `max_threads + max_wartend` Aufträge
+    gleichzeitig. Ist der Pool voll, liefert `submit()` None. Der Aufrufer
+    arbeitet dann ohne das Ergebnis weiter, und bei langsamem Upstream
+    wächst kein Rückstau an. Läuft für denselben Schlüssel schon ein
+    Auftrag, bekommen alle dessen Future.
+    """
+
+    def __init__(self, max_threads, max_wartend, name="upstream"):
+        self._pool = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix=name)
+        self._plaetze = threading.BoundedSemaphore(max_threads + max_wartend)
+        self._laufend = {}
+        self._lock = threading.Lock()
+        self.statistik = {"angenommen": 0, "geteilt": 0, "abgelehnt": 0}
+
+    def submit(self, schluessel, funktion, *args):
+        """Future des (ggf. schon laufenden) Auftrags oder None, wenn voll"""
+        with self._lock:
+            future = self._laufend.get(schluessel)
+            if future is not None:
+                self.statistik["geteilt"] += 1
+                return future
+
+            if not self._plaetze.acquire(blocking=False):
+                self.statistik["abgelehnt"] += 1
+                return None
+
+            future = self._pool.submit(funktion, *args)
+            self._laufend[schluessel] = future
+            self.statistik["angenommen"] += 1
+
+        future.add_done_callback(lambda f: self._fertig(schluessel, f))
+        return future
+
+    def _fertig(self, schluessel, future):
+        with self._lock:
+            if self._laufend.get(schluessel) is future:
+                del self._laufend[schluessel]
+        self._plaetze.release()
+
+    def statistik_kopie(self):
+        with self._lock:
+            return dict(self.statistik, laufend=len(self._laufend))
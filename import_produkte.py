@@ -1,31 +1,168 @@
-import os
 import json
-from app import app, db, Produkt, json_path
+import os
+from datetime import datetime
 
-with app.app_context():
-    if os.path.exists(json_path):
-        with open(json_path, encoding="utf-8") as f:
-            produkte = json.load(f)
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
 
-        for p in produkte:
-            ean = p.get("ean")
-            if not ean:
-                continue
+from app import app, db, json_path
+from katalog import KatalogSpeicher, slugify
+from models import Produkt
+
+
+# Produkte pro IN-Abfrage / Upsert-Statement
+CHUNK = int(os.getenv("IMPORT_CHUNK", "500"))
+
+FELDER = ("name", "autor", "beschreibung", "preis", "kategorie", "bild_url", "slug")
+
+
+def produkte_streamen(pfad, blockgroesse=1 << 16):
+    """Liest das Produkt-Array aus der JSON-Datei Element für Element"""
+    decoder = json.JSONDecoder()
+
+    with open(pfad, encoding="utf-8") as f:
+        puffer = f.read(blockgroesse).lstrip()
+        if not puffer.startswith("["):
+            raise ValueError("produkte.json muss ein JSON-Array enthalten")
+        pos = 1
+
+        while True:
+            while pos < len(puffer) and puffer[pos] in " \t\r\n,":
+                pos += 1
 
-            existing = Produkt.query.filter_by(ean=ean).first()
-            if existing:
+            if pos < len(puffer) and puffer[pos] == "]":
+                return
+
+            try:
+                produkt, ende = decoder.raw_decode(puffer, pos)
+            except ValueError:
+                block = f.read(blockgroesse)
+                if not block:
+                    raise
+                # Verbrauchten Teil verwerfen → konstanter Speicher
+                puffer = puffer[pos:] + block
+                pos = 0
                 continue
 
-            db.session.add(
-                Produkt(
-                    ean=ean,
-                    name=p.get("name"),
-                    autor=p.get("autor"),
-                    preis=p.get("preis", 0),
-                    json_data=p
-                )
-            )
+            yield produkt
+            pos = ende
+
+
+def bild_url(produkt):
+    bilder = produkt.get("bilder") or []
+    if not bilder:
+        return None
+    if bilder[0].startswith("http"):
+        return bilder[0]
+    return f"/static/{bilder[0]}"
+
+
+def zeile(produkt):
+    return {
+        "ean": str(produkt["ean"]),
+        "name": produkt.get("name"),
+        "autor": produkt.get("autor"),
+        "beschreibung": produkt.get("beschreibung"),
+        "preis": produkt.get("preis") or 0,
+        "kategorie": produkt.get("kategorie"),
+        "bild_url": bild_url(produkt),
+        "slug": slugify(produkt.get("name") or "produkt"),
+    }
+
+
+def upsert(zeilen):
+    """INSERT ... ON CONFLICT (ean) DO UPDATE – SQLite und Postgres"""
+    dialekt = db.engine.dialect.name
+    insert = postgresql.insert if dialekt == "postgresql" else sqlite.insert
+
+    stmt = insert(Produkt).values(zeilen)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Produkt.ean],
+        set_={f: stmt.excluded[f] for f in FELDER + ("zuletzt_aktualisiert",)}
+    )
+    db.session.execute(stmt)
+
+
+def chunk_importieren(produkte, gesehene_slugs):
+    eans = [str(p["ean"]) for p in produkte]
+
+    vorhanden = {
+        row.ean: row
+        for row in db.session.execute(
+            select(Produkt.ean, *(getattr(Produkt, f) for f in FELDER))
+            .where(Produkt.ean.in_(eans))
+        )
+    }
+
+    zeilen = {}
+    for p in produkte:
+        z = zeile(p)
+        zeilen[z["ean"]] = z
+
+    # Slugs sind unique – Kollisionen mit anderen EANs bekommen die EAN angehängt
+    slug_besitzer = dict(db.session.execute(
+        select(Produkt.slug, Produkt.ean)
+        .where(Produkt.slug.in_([z["slug"] for z in zeilen.values()]))
+    ).all())
+
+    for z in zeilen.values():
+        besitzer = gesehene_slugs.get(z["slug"]) or slug_besitzer.get(z["slug"])
+        if besitzer and besitzer != z["ean"]:
+            z["slug"] = f"{z['slug']}-{z['ean']}"
+        gesehene_slugs[z["slug"]] = z["ean"]
+
+    neu = [z for ean, z in zeilen.items() if ean not in vorhanden]
+    geaendert = [
+        z for ean, z in zeilen.items()
+        if ean in vorhanden and any(getattr(vorhanden[ean], f) != z[f] for f in FELDER)
+    ]
+
+    jetzt = datetime.utcnow()
+    for z in neu + geaendert:
+        z["zuletzt_aktualisiert"] = jetzt
+
+    if neu or geaendert:
+        upsert(neu + geaendert)
         db.session.commit()
-        print("✅ Produkte importiert")
-    else:
-        print("❌ JSON-Datei nicht gefunden")
+
+    return len(neu), len(geaendert), len(zeilen) - len(neu) - len(geaendert)
+
+
+def importieren(pfad):
+    journal = KatalogSpeicher(pfad).journal()
+    gesehene_slugs = {}
+    summe = [0, 0, 0]
+    chunk = []
+
+    def abarbeiten():
+        for i, n in enumerate(chunk_importieren(chunk, gesehene_slugs)):
+            summe[i] += n
+        chunk.clear()
+
+    for p in produkte_streamen(pfad):
+        if not p.get("ean"):
+            continue
+        # Noch nicht kompaktierte Journal-Änderungen berücksichtigen
+        if p.get("id") in journal:
+            p.update(journal[p["id"]])
+
+        chunk.append(p)
+        if len(chunk) >= CHUNK:
+            abarbeiten()
+
+    if chunk:
+        abarbeiten()
+
+    return summe
+
+
+if __name__ == "__main__":
+    with app.app_context():
+        if os.path.exists(json_path):
+            neu, geaendert, unveraendert = importieren(json_path)
+            print("✅ Produkte importiert")
+            print(f"   neu:          {neu}")
+            print(f"   aktualisiert: {geaendert}")
+            print(f"   unverändert:  {unveraendert}")
+        else:
+            print("❌ JSON-Datei nicht gefunden")
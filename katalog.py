@@ -0,0 +1,411 @@
+import fcntl
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from types import MappingProxyType
+
+from suchindex import SuchIndex, Vorschlaege
+
+
+# =====================================================
+# KATALOG
+# =====================================================
+
+def slugify(text):
+    text = text.lower()
+    text = re.sub(r'[^a-z0-9äöüß ]', '', text)
+    return text.replace(" ", "-")
+
+
+def einfrieren(wert):
+    """Macht Produktdaten rekursiv schreibgeschützt"""
+    if isinstance(wert, dict):
+        return MappingProxyType({k: einfrieren(v) for k, v in wert.items()})
+    if isinstance(wert, list):
+        return tuple(einfrieren(v) for v in wert)
+    return wert
+
+
+def auftauen(wert):
+    """Gegenstück zu einfrieren() – z.B. für json.dump"""
+    if isinstance(wert, MappingProxyType):
+        return {k: auftauen(v) for k, v in wert.items()}
+    if isinstance(wert, tuple):
+        return [auftauen(v) for v in wert]
+    return wert
+
+
+# =====================================================
+# KATALOG-SPEICHER (Snapshot + Journal)
+# =====================================================
+
+# Ab so vielen Journal-Einträgen wird ein neuer Snapshot geschrieben
+KOMPAKTIEREN_AB = int(os.getenv("KATALOG_KOMPAKTIEREN_AB", "500"))
+
+
+def zusammenfassen(eintraege):
+    """Journal-Einträge → {produkt_id: felder}, spätere Einträge gewinnen"""
+    aenderungen = {}
+    for eintrag in eintraege:
+        aenderungen.setdefault(eintrag["id"], {}).update(eintrag["felder"])
+    return aenderungen
+
+
+class KatalogSpeicher:
+    """Persistiert den Katalog als Snapshot (produkte.json) plus Journal.
+
+    Änderungen werden als einzelne JSON-Zeilen an produkte.json.journal
+    angehängt – ein Schreibvorgang kostet nur die geänderten Produkte.
+    Ab KOMPAKTIEREN_AB Einträgen wird ein neuer Snapshot in eine
+    Temp-Datei geschrieben und per os.replace atomar getauscht. Leser
+    halten eine geteilte Sperre, sehen also nie einen halben Stand.
+    """
+
+    def __init__(self, pfad):
+        self.pfad = pfad
+        self.journal_pfad = pfad + ".journal"
+        self.lock_pfad = pfad + ".lock"
+
+    @contextmanager
+    def _sperre(self, art):
+        with open(self.lock_pfad, "a") as f:
+            fcntl.flock(f, art)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _stat(self, pfad):
+        try:
+            st = os.stat(pfad)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def stand(self):
+        """Billiger Änderungsmarker: (Snapshot-Stat, Journal-Stat)"""
+        return (self._stat(self.pfad), self._stat(self.journal_pfad))
+
+    def _journal_lesen(self, ab=0):
+        """Journal-Einträge ab Byte-Offset; halb geschriebene Zeilen werden übersprungen"""
+        eintraege = []
+        try:
+            with open(self.journal_pfad, "rb") as f:
+                f.seek(ab)
+                for zeile in f:
+                    if not zeile.endswith(b"\n"):
+                        break
+                    try:
+                        eintraege.append(json.loads(zeile))
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            pass
+        return eintraege
+
+    def journal(self):
+        """Alle Journal-Änderungen zusammengefasst als {produkt_id: felder}"""
+        with self._sperre(fcntl.LOCK_SH):
+            return zusammenfassen(self._journal_lesen())
+
+    @staticmethod
+    def anwenden(produkte, eintraege):
+        """Spielt Journal-Einträge auf eine Produktliste ein"""
+        position = {p.get("id"): i for i, p in enumerate(produkte)}
+        for eintrag in eintraege:
+            i = position.get(eintrag["id"])
+            if i is not None:
+                produkte[i] = dict(produkte[i], **eintrag["felder"])
+        return produkte
+
+    def lesen(self):
+        """Snapshot + Journal als Produktliste"""
+        with self._sperre(fcntl.LOCK_SH):
+            stand = self.stand()
+            if not os.path.exists(self.pfad):
+                return [], stand
+
+            with open(self.pfad, encoding="utf-8") as f:
+                produkte = json.load(f)
+
+            return self.anwenden(produkte, self._journal_lesen()), stand
+
+    def _seit(self, stand):
+        neu = self.stand()
+        if neu[0] != stand[0] or (stand[1] and neu[1] and neu[1][0] != stand[1][0]):
+            return None
+        return self._journal_lesen(stand[1][2] if stand[1] else 0)
+
+    def nachlesen(self, stand):
+        """Nur die seit `stand` angehängten Journal-Einträge.
+
+        Gibt None zurück, wenn inzwischen ein neuer Snapshot geschrieben
+        wurde und komplett neu geladen werden muss.
+        """
+        with self._sperre(fcntl.LOCK_SH):
+            return self._seit(stand), self.stand()
+
+    def schreiben(self, aenderungen, stand):
+        """Hängt {produkt_id: felder} ans Journal an.
+
+        Liefert wie nachlesen() die Einträge anderer Worker seit `stand`
+        mit, damit der Aufrufer keinen fremden Stand überspringt.
+        """
+        with self._sperre(fcntl.LOCK_EX):
+            fremde = self._seit(stand)
+
+            daten = "".join(
+                json.dumps({"id": pid, "felder": felder}, ensure_ascii=False) + "\n"
+                for pid, felder in aenderungen.items()
+            ).encode("utf-8")
+
+            fd = os.open(self.journal_pfad, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                # Nach einem Absturz mitten im Schreiben: Rest-Zeile abschließen
+                groesse = os.fstat(fd).st_size
+                if groesse and os.pread(fd, 1, groesse - 1) != b"\n":
+                    daten = b"\n" + daten
+                os.write(fd, daten)
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+            if len(self._journal_lesen()) >= KOMPAKTIEREN_AB:
+                self._kompaktieren()
+
+            return fremde, self.stand()
+
+    def kompaktieren(self):
+        with self._sperre(fcntl.LOCK_EX):
+            self._kompaktieren()
+
+    def _kompaktieren(self):
+        produkte = []
+        if os.path.exists(self.pfad):
+            with open(self.pfad, encoding="utf-8") as f:
+                produkte = json.load(f)
+        produkte = self.anwenden(produkte, self._journal_lesen())
+
+        verzeichnis = os.path.dirname(os.path.abspath(self.pfad))
+        fd, tmp = tempfile.mkstemp(dir=verzeichnis, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(produkte, f, ensure_ascii=False, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.pfad)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+        # Stürzen wir genau hier ab, wird das Journal beim nächsten Lesen
+        # einfach noch einmal eingespielt – die Einträge sind idempotent.
+        if os.path.exists(self.journal_pfad):
+            os.unlink(self.journal_pfad)
+
+
+# Alle Indizes eines Katalogstands – wird nur als Ganzes ausgetauscht,
+# damit kein Leser den neuen ID-Index neben dem alten Slug-Index sieht.
+# `pruefsummen` gehört zu `produkte` (gleiche Reihenfolge) und ergibt `version`.
+KatalogIndex = namedtuple(
+    "KatalogIndex",
+    "produkte pruefsummen nach_id nach_ean nach_slug kategorien suchindex vorschlaege version"
+)
+
+
+class Katalog:
+    """Produktkatalog mit Indizes nach ID, EAN, Slug und Kategorie.
+
+    Alle Produkte werden als schreibgeschützte Views herausgegeben,
+    Routen müssen also nichts mehr kopieren. Suchindex und
+    Typeahead-Trie werden beim Laden mitgebaut; `version` ist ein
+    Inhalts-Hash und ändert sich mit jeder Katalogänderung. Alle Indizes
+    liegen in einem KatalogIndex, der mit einer einzigen Zuweisung ersetzt
+    wird. Bei Änderungen werden nur die betroffenen Produkte neu
+    vorbereitet; Änderungen anderer Worker zieht ein Hintergrund-Thread
+    nach, Requests warten nie auf den Neuaufbau.
+    """
+
+    # Wie oft höchstens auf Änderungen anderer Worker geprüft wird (Sekunden)
+    PRUEF_INTERVALL = 2.0
+
+    def __init__(self, produkte=(), speicher=None, stand=None):
+        self.speicher = speicher
+        self._stand = stand
+        self._geprueft = time.monotonic()
+        self._lock = threading.Lock()
+        self._index = self._index_bauen([self._vorbereiten(p) for p in produkte])
+
+    @classmethod
+    def laden(cls, pfad):
+        speicher = KatalogSpeicher(pfad)
+        produkte, stand = speicher.lesen()
+        return cls(produkte, speicher=speicher, stand=stand)
+
+    def _vorbereiten(self, produkt):
+        """(eingefrorenes Produkt, Prüfsumme)"""
+        produkt = dict(produkt)
+        produkt["slug"] = slugify(produkt.get("name") or "produkt")
+        pruefsumme = hashlib.sha1(json.dumps(produkt, sort_keys=True).encode("utf-8")).digest()
+        return einfrieren(produkt), pruefsumme
+
+    def _index_bauen(self, vorbereitet):
+        """KatalogIndex aus [(produkt, prüfsumme)] – verändert `self` nicht"""
+        liste = [p for p, _ in vorbereitet]
+        pruefsummen = tuple(s for _, s in vorbereitet)
+
+        nach_id = {}
+        nach_ean = {}
+        nach_slug = {}
+        kategorien = {}
+
+        for p in liste:
+            nach_id.setdefault(p.get("id"), p)
+            if p.get("ean"):
+                nach_ean.setdefault(str(p["ean"]), p)
+            nach_slug.setdefault(p["slug"], p)
+            kategorien.setdefault(p.get("kategorie"), []).append(p)
+
+        produkte = tuple(liste)
+
+        return KatalogIndex(
+            produkte=produkte,
+            pruefsummen=pruefsummen,
+            nach_id=MappingProxyType(nach_id),
+            nach_ean=MappingProxyType(nach_ean),
+            nach_slug=MappingProxyType(nach_slug),
+            kategorien=MappingProxyType({k: tuple(v) for k, v in kategorien.items()}),
+            suchindex=SuchIndex(produkte),
+            vorschlaege=Vorschlaege(produkte),
+            version=hashlib.sha1(b"".join(pruefsummen)).hexdigest()[:12],
+        )
+
+    def _mit_aenderungen(self, index, aenderungen):
+        """Neuer KatalogIndex; nur geänderte Produkte werden neu vorbereitet"""
+        return self._index_bauen([
+            self._vorbereiten(dict(auftauen(p), **aenderungen[p.get("id")]))
+            if p.get("id") in aenderungen else (p, summe)
+            for p, summe in zip(index.produkte, index.pruefsummen)
+        ])
+
+    # -----------------------------
+    # Lookups
+    # -----------------------------
+
+    @property
+    def index(self):
+        """Aktueller KatalogIndex – für mehrere Lookups auf demselben Stand"""
+        return self._index
+
+    @property
+    def produkte(self):
+        return self._index.produkte
+
+    @property
+    def suchindex(self):
+        return self._index.suchindex
+
+    @property
+    def vorschlaege(self):
+        return self._index.vorschlaege
+
+    @property
+    def version(self):
+        return self._index.version
+
+    def __len__(self):
+        return len(self._index.produkte)
+
+    def __iter__(self):
+        return iter(self._index.produkte)
+
+    def nach_id(self, produkt_id):
+        return self._index.nach_id.get(produkt_id)
+
+    def nach_ean(self, ean):
+        return self._index.nach_ean.get(str(ean))
+
+    def nach_slug(self, slug):
+        return self._index.nach_slug.get(slug)
+
+    def kategorie(self, name):
+        return self._index.kategorien.get(name, ())
+
+    # -----------------------------
+    # Änderungen
+    # -----------------------------
+
+    def aktualisieren(self, produkt_id, **felder):
+        """Setzt Felder eines Produkts und baut die Indizes neu auf"""
+        self.aktualisieren_viele({produkt_id: felder})
+        return self.nach_id(produkt_id)
+
+    def aktualisieren_viele(self, aenderungen):
+        """Übernimmt {produkt_id: felder} für viele Produkte in einem Durchgang"""
+        index = self._index
+        aenderungen = {k: v for k, v in aenderungen.items() if k in index.nach_id}
+        if aenderungen:
+            self._index = self._mit_aenderungen(index, aenderungen)
+
+    def speichern(self, aenderungen):
+        """Übernimmt Änderungen und hängt sie ans Journal an (O(geänderte Produkte))"""
+        with self._lock:
+            if not self.speicher:
+                self.aktualisieren_viele(aenderungen)
+                return
+
+            fremde, stand = self.speicher.schreiben(aenderungen, self._stand)
+            self._nachziehen(fremde, aenderungen)
+            self._stand = stand
+
+    def neu_laden_falls_geaendert(self):
+        """Request-Hook: startet `nachladen()` im Hintergrund, wenn sich der Stand geändert hat"""
+        if not self.speicher or time.monotonic() - self._geprueft < self.PRUEF_INTERVALL:
+            return False
+
+        self._geprueft = time.monotonic()
+        if self.speicher.stand() == self._stand or self._lock.locked():
+            return False
+
+        threading.Thread(target=self.nachladen, name="katalog-nachladen", daemon=True).start()
+        return True
+
+    def nachladen(self):
+        """Holt Änderungen anderer Worker nach – liest nur neue Journal-Zeilen"""
+        # Läuft schon ein Nachladen oder Speichern, bringt das den Stand mit
+        if not self._lock.acquire(blocking=False):
+            return False
+
+        try:
+            if self.speicher.stand() == self._stand:
+                return False
+
+            eintraege, stand = self.speicher.nachlesen(self._stand)
+            self._nachziehen(eintraege)
+            self._stand = stand
+            return True
+        finally:
+            self._lock.release()
+
+    def _nachziehen(self, eintraege, eigene=None):
+        if eintraege is None:
+            # Neuer Snapshot → komplett neu laden (enthält auch `eigene`)
+            produkte, _ = self.speicher.lesen()
+            self._index = self._index_bauen([self._vorbereiten(p) for p in produkte])
+            return
+
+        aenderungen = zusammenfassen(eintraege)
+        for pid, felder in (eigene or {}).items():
+            aenderungen.setdefault(pid, {}).update(felder)
+
+        self.aktualisieren_viele(aenderungen)
+
+    def als_liste(self):
+        """Veränderbare Kopie aller Produkte (für produkte.json)"""
+        return [auftauen(p) for p in self._index.produkte]
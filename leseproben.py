@@ -0,0 +1,61 @@
+import json
+import logging
+import os
+
+from flask import url_for
+from markupsafe import Markup
+
+from bilder import _attribute
+
+
+logger = logging.getLogger(__name__)
+
+
+# =====================================================
+# LESEPROBEN (PDF + Vorschaubild der ersten Seite)
+# =====================================================
+
+LESEPROBEN_ORDNER = "leseproben"                               # relativ zu static/
+VORSCHAU_ORDNER = os.path.join("build", "leseproben")
+MANIFEST_NAME = os.path.join("build", "leseproben.json")
+
+VORSCHAU_BREITE = 480
+
+
+class LeseprobenVorschau:
+    """Liest static/build/leseproben.json (leseproben_bauen.py).
+
+    Ohne Manifest oder Eintrag gibt `vorschau()` nichts aus – die Seite
+    zeigt dann nur den Link auf das PDF.
+    """
+
+    def __init__(self, static_ordner):
+        self.pfad = os.path.join(static_ordner, MANIFEST_NAME)
+        self._eintraege = None
+
+    @property
+    def eintraege(self):
+        if self._eintraege is None:
+            try:
+                with open(self.pfad, encoding="utf-8") as f:
+                    self._eintraege = json.load(f)
+            except FileNotFoundError:
+                logger.info("Kein Leseproben-Manifest unter %s – keine Vorschaubilder", self.pfad)
+                self._eintraege = {}
+        return self._eintraege
+
+    def vorschau(self, dateiname, alt="Leseprobe", klasse="leseprobe-vorschau"):
+        """<img> der ersten PDF-Seite (lazy, mit festen Maßen)"""
+        eintrag = self.eintraege.get(dateiname)
+        if not eintrag:
+            return ""
+
+        return Markup("<img{}>".format(_attribute({
+            "src": url_for("static", filename=eintrag["bild"]),
+            "alt": alt,
+            "class": klasse,
+            "width": eintrag["breite"],
+            "height": eintrag["hoehe"],
+            "loading": "lazy",
+            "decoding": "async",
+        })))
@@ -0,0 +1,83 @@
+# leseproben_bauen.py
+"""Build-Schritt: Vorschaubild der ersten Seite jeder Leseprobe
+
+Aufruf (z.B. im Render-Build, vor assets_bauen.py):  python leseproben_bauen.py
+"""
+import json
+import os
+import sys
+
+from leseproben import LESEPROBEN_ORDNER, MANIFEST_NAME, VORSCHAU_BREITE, VORSCHAU_ORDNER
+
+try:
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
+
+
+BASIS = os.path.dirname(os.path.abspath(__file__))
+STATIC = os.path.join(BASIS, "static")
+QUALITAET = 75
+
+
+def vorschau_bauen(dateiname):
+    """Rendert Seite 1 als WebP (überspringt bereits aktuelle)"""
+    quelle = os.path.join(STATIC, LESEPROBEN_ORDNER, dateiname)
+    ziel = os.path.join(VORSCHAU_ORDNER, os.path.splitext(dateiname)[0] + ".webp").replace(os.sep, "/")
+    datei = os.path.join(STATIC, ziel)
+
+    pdf = pdfium.PdfDocument(quelle)
+    try:
+        seite = pdf[0]
+        breite, hoehe = seite.get_size()
+
+        if not (os.path.exists(datei) and os.path.getmtime(datei) >= os.path.getmtime(quelle)):
+            os.makedirs(os.path.dirname(datei), exist_ok=True)
+            bild = seite.render(scale=VORSCHAU_BREITE / breite).to_pil()
+            bild.convert("RGB").save(datei, "WEBP", quality=QUALITAET)
+
+        return {
+            "bild": ziel,
+            "breite": VORSCHAU_BREITE,
+            "hoehe": round(hoehe * VORSCHAU_BREITE / breite),
+            "seiten": len(pdf),
+        }
+    finally:
+        pdf.close()
+
+
+def main():
+    if pdfium is None:
+        print("⚠️ pypdfium2 nicht installiert – keine Leseproben-Vorschau")
+        return
+
+    ordner = os.path.join(STATIC, LESEPROBEN_ORDNER)
+    manifest = {}
+    fehler = 0
+
+    # Auch Unterordner; Schlüssel = Pfad relativ zu leseproben/ (wie leseprobe_pdf)
+    dateinamen = sorted(
+        os.path.relpath(os.path.join(pfad, name), ordner).replace(os.sep, "/")
+        for pfad, _, namen in os.walk(ordner)
+        for name in namen
+        if name.lower().endswith(".pdf")
+    )
+
+    for dateiname in dateinamen:
+        try:
+            manifest[dateiname] = vorschau_bauen(dateiname)
+        except Exception as e:
+            print(f"   - {dateiname}: {e}", file=sys.stderr)
+            fehler += 1
+
+    ziel = os.path.join(STATIC, MANIFEST_NAME)
+    os.makedirs(os.path.dirname(ziel), exist_ok=True)
+    with open(ziel + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(ziel + ".tmp", ziel)
+
+    print(f"✅ {len(manifest)} Leseproben-Vorschauen, {fehler} fehlgeschlagen")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import logging
+import os
+import threading
+
+from sendgrid import SendGridAPIClient
+from sendgrid.helpers.mail import Mail, Personalization, To, Substitution
+
+
+logger = logging.getLogger(__name__)
+
+
+# =====================================================
+# MAILVERSAND (SendGrid)
+# =====================================================
+
+# SendGrid erlaubt höchstens 1000 Personalizations pro Request
+BATCH_MAX = 1000
+
+# Platzhalter im Newsletter-HTML, pro Empfänger ersetzt
+ABMELDE_PLATZHALTER = "-abmelde_url-"
+
+# Sekunden pro API-Call
+TIMEOUT = int(os.getenv("SENDGRID_TIMEOUT", "15"))
+
+
+# Umgebung erst beim Aufruf lesen – app.py importiert vor load_dotenv()
+def absender():
+    return os.getenv("EMAIL_SENDER")
+
+
+def konfiguriert():
+    return bool(os.getenv("SENDGRID_API_KEY") and absender())
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def sendgrid_client():
+    """Prozessweit geteilter SendGrid-Client mit Timeout (statt neuem Client pro Mail)"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = SendGridAPIClient(os.getenv("SENDGRID_API_KEY"))
+            _client.client.timeout = TIMEOUT
+        return _client
+
+
+def email_senden(subject, recipient, html, plain_text=None):
+    """Einzelne Mail – Fehler werden an den Aufrufer weitergegeben"""
+    message = Mail(
+        from_email=absender(),
+        to_emails=recipient,
+        subject=subject,
+        html_content=html,
+        plain_text_content=plain_text
+    )
+    return sendgrid_client().send(message)
+
+
+def newsletter_batch_senden(subject, html, empfaenger):
+    """Ein API-Call für bis zu BATCH_MAX Empfänger.
+
+    `empfaenger` ist eine Liste von (email, abmelde_url); jeder Empfänger
+    bekommt eine eigene Personalization, sieht also nur sich selbst und
+    seinen eigenen Abmeldelink.
+    """
+    if len(empfaenger) > BATCH_MAX:
+        raise ValueError(f"Höchstens {BATCH_MAX} Empfänger pro Batch")
+
+    message = Mail(from_email=absender(), subject=subject, html_content=html)
+
+    for email, abmelde_url in empfaenger:
+        p = Personalization()
+        p.add_to(To(email))
+        p.add_substitution(Substitution(ABMELDE_PLATZHALTER, abmelde_url))
+        message.add_personalization(p)
+
+    return sendgrid_client().send(message)
@@ -67,7 +67,7 @@ class Bestellung(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(120), nullable=False)
 
-    collectkey = db.Column(db.String(100))   
+    collectkey = db.Column(db.String(100), index=True)
 
 
     # ⭐ PERSONENDATEN
@@ -83,13 +83,23 @@ class Bestellung(db.Model):
     paymentmethod = db.Column(db.String(50))
 
        # ⭐ MOLUNA-FELDER
-    moluna_status = db.Column(db.String(50))         # Status der Bestellung bei Moluna
+    moluna_status = db.Column(db.String(50), index=True)  # Status der Bestellung bei Moluna
     moluna_order_id = db.Column(db.String(100))      # Moluna Order-ID
     trackingnummer = db.Column(db.String(100))       # Trackingnummer
     logistiker = db.Column(db.String(200))          # Logistiker z.B. DHL, kommagetrennt
     paketart = db.Column(db.String(200))            # z.B. Paket, Grossbrief, kommagetrennt
     eans = db.Column(db.String(500))       
 
+    # ⭐ PAYPAL (Abgleich mit Webhooks)
+    paypal_order_id = db.Column(db.String(50), index=True)
+    paypal_capture_id = db.Column(db.String(50))
+    bezahlt_am = db.Column(db.DateTime)
+
+    # ⭐ STATUS-POLLER (ORDERRESPONSE im Hintergrund)
+    status_geprueft_am = db.Column(db.DateTime)
+    naechste_pruefung_am = db.Column(db.DateTime)
+    pruef_fehler = db.Column(db.Integer, default=0)
+
     bestelldatum = db.Column(
         db.DateTime,
         default=datetime.utcnow,
@@ -101,11 +111,16 @@ class Bestellung(db.Model):
         cascade="all, delete-orphan"
     )
 
+    # Admin-Liste blättert per Keyset über (bestelldatum, id)
+    __table_args__ = (
+        db.Index("ix_bestellungen_bestelldatum_id", "bestelldatum", "id"),
+    )
+
 class BestellPosition(db.Model):
     __tablename__ = "bestellpositionen"
 
     id = db.Column(db.Integer, primary_key=True)
-    bestellung_id = db.Column(db.Integer, db.ForeignKey("bestellungen.id"))
+    bestellung_id = db.Column(db.Integer, db.ForeignKey("bestellungen.id"), index=True)
     ean = db.Column(db.String(50))
     bezeichnung = db.Column(db.String(200))
     menge = db.Column(db.Integer)
@@ -147,3 +162,155 @@ class Produkt(db.Model):
 
     def __repr__(self):
         return f"<Produkt {self.name}>"
+
+
+# ----------------------
+# Buchbutler Sync-Läufe
+# ----------------------
+
+class SyncLauf(db.Model):
+    __tablename__ = "sync_laeufe"
+
+    id = db.Column(db.Integer, primary_key=True)
+
+    status = db.Column(db.String(20), default="läuft")   # läuft / fertig / fehler
+    gesamt = db.Column(db.Integer, default=0)
+    erledigt = db.Column(db.Integer, default=0)
+    geaendert = db.Column(db.Integer, default=0)
+    fehlgeschlagen = db.Column(db.Integer, default=0)
+    fehler_eans = db.Column(db.Text)
+    meldung = db.Column(db.Text)
+
+    gestartet_am = db.Column(db.DateTime, default=datetime.utcnow)
+    aktualisiert_am = db.Column(db.DateTime, default=datetime.utcnow)
+    beendet_am = db.Column(db.DateTime)
+
+    def als_dict(self):
+        return {
+            "id": self.id,
+            "status": self.status,
+            "gesamt": self.gesamt,
+            "erledigt": self.erledigt,
+            "geaendert": self.geaendert,
+            "fehlgeschlagen": self.fehlgeschlagen,
+            "fehler_eans": self.fehler_eans.split(",") if self.fehler_eans else [],
+            "meldung": self.meldung,
+            "gestartet_am": self.gestartet_am.isoformat() if self.gestartet_am else None,
+            "beendet_am": self.beendet_am.isoformat() if self.beendet_am else None,
+        }
+
+
+# ----------------------
+# Outbox: Bestellungen an Buchbutler
+# ----------------------
+
+class BestellAusgang(db.Model):
+    __tablename__ = "bestell_ausgang"
+
+    id = db.Column(db.Integer, primary_key=True)
+    bestellung_id = db.Column(db.Integer, db.ForeignKey("bestellungen.id"), unique=True, nullable=False)
+
+    status = db.Column(db.String(20), default="offen", index=True)   # offen / gesendet / tot
+    versuche = db.Column(db.Integer, default=0)
+    letzter_fehler = db.Column(db.Text)
+
+    naechster_versuch_am = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    erstellt_am = db.Column(db.DateTime, default=datetime.utcnow)
+    gesendet_am = db.Column(db.DateTime)
+
+    bestellung = db.relationship("Bestellung", backref=db.backref("ausgang", uselist=False))
+
+
+# ----------------------
+# PayPal Webhook-Ereignisse
+# ----------------------
+
+class PayPalEreignis(db.Model):
+    __tablename__ = "paypal_ereignisse"
+
+    id = db.Column(db.Integer, primary_key=True)
+    event_id = db.Column(db.String(100), unique=True, nullable=False)   # Wiederholungen → gleicher Schlüssel
+    event_type = db.Column(db.String(100))
+
+    body = db.Column(db.Text, nullable=False)
+    headers = db.Column(db.Text)            # Transmission-Header als JSON (für die Signaturprüfung)
+
+    status = db.Column(db.String(20), default="offen", index=True)   # offen / verarbeitet / übersprungen / ungültig / fehler
+    versuche = db.Column(db.Integer, default=0)
+    letzter_fehler = db.Column(db.Text)
+
+    naechster_versuch_am = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    empfangen_am = db.Column(db.DateTime, default=datetime.utcnow)
+    verarbeitet_am = db.Column(db.DateTime)
+
+
+# ----------------------
+# Newsletter-Versand (Hintergrund-Job)
+# ----------------------
+
+class NewsletterVersand(db.Model):
+    __tablename__ = "newsletter_versand"
+
+    id = db.Column(db.Integer, primary_key=True)
+
+    betreff = db.Column(db.String(255), nullable=False)
+    inhalt = db.Column(db.Text, nullable=False)
+    abmelde_vorlage = db.Column(db.String(500), nullable=False)   # Abmelde-URL mit __TOKEN__
+
+    status = db.Column(db.String(20), default="wartend", index=True)   # wartend / läuft / fertig / fehler
+    gesamt = db.Column(db.Integer, default=0)
+    gesendet = db.Column(db.Integer, default=0)
+    letzte_subscriber_id = db.Column(db.Integer, default=0)   # Wiederaufnahme nach Absturz
+    meldung = db.Column(db.Text)
+
+    gesperrt_bis = db.Column(db.DateTime)      # solange gehört der Job einem Worker
+    erstellt_am = db.Column(db.DateTime, default=datetime.utcnow)
+    aktualisiert_am = db.Column(db.DateTime, default=datetime.utcnow)
+    beendet_am = db.Column(db.DateTime)
+
+    def als_dict(self):
+        return {
+            "id": self.id,
+            "betreff": self.betreff,
+            "status": self.status,
+            "gesamt": self.gesamt,
+            "gesendet": self.gesendet,
+            "meldung": self.meldung,
+            "erstellt_am": self.erstellt_am.isoformat() if self.erstellt_am else None,
+            "beendet_am": self.beendet_am.isoformat() if self.beendet_am else None,
+        }
+
+
+# ----------------------
+# Mail-Warteschlange
+# ----------------------
+
+class MailAuftrag(db.Model):
+    __tablename__ = "mail_auftraege"
+
+    id = db.Column(db.Integer, primary_key=True)
+
+    empfaenger = db.Column(db.String(255), nullable=False)
+    betreff = db.Column(db.String(255), nullable=False)
+    html = db.Column(db.Text)
+    text = db.Column(db.Text)
+
+    status = db.Column(db.String(20), default="offen", index=True)   # offen / gesendet / fehler
+    versuche = db.Column(db.Integer, default=0)
+    letzter_fehler = db.Column(db.Text)
+
+    naechster_versuch_am = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    erstellt_am = db.Column(db.DateTime, default=datetime.utcnow)
+    gesendet_am = db.Column(db.DateTime)
+
+
+# ----------------------
+# Server-seitige Sessions
+# ----------------------
+
+class Sitzung(db.Model):
+    __tablename__ = "sitzungen"
+
+    id = db.Column(db.String(64), primary_key=True)      # = Cookie-Wert (zufällig, nicht ableitbar)
+    daten = db.Column(db.Text, nullable=False)
+    ablauf = db.Column(db.DateTime, nullable=False, index=True)
@@ -1,12 +1,10 @@
-import requests
+from buchbutler_client import standard_client
 
 
 def send_order_to_moluna(payload):
 
-    url = "https://api.buchbutler.de/ORDER/"
+    data = standard_client().bestellen(payload)
 
-    response = requests.post(url, json=payload)
+    print("Moluna Antwort:", data)
 
-    print("Moluna Antwort:", response.text)
-
-    return response.json()
+    return data
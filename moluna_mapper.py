@@ -1,14 +1,19 @@
 import uuid
 
+from buchbutler_client import standard_client
 
-def build_moluna_payload(order, moluna_user, moluna_pass):
+
+def build_moluna_payload(order, moluna_user=None, moluna_pass=None):
 
     # collectkey generieren (Moluna Pflichtfeld)
     collectkey = str(uuid.uuid4())
 
+    # Ohne explizite Zugangsdaten die des gemeinsamen Clients verwenden
+    client = standard_client()
+
     payload = {
-        "username": moluna_user,
-        "passwort": moluna_pass,
+        "username": moluna_user or client.user,
+        "passwort": moluna_pass or client.passwort,
 
         "auftrag_kopf": {
             "mol_kunde_id": order["bestellung"]["mol_kunde_id"],
@@ -0,0 +1,139 @@
+import logging
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from cache import SqliteCache
+
+
+logger = logging.getLogger(__name__)
+
+
+# =====================================================
+# PAYPAL HTTP CLIENT
+# =====================================================
+
+# (Connect, Read) pro Aufrufart
+TIMEOUTS = {
+    "token": (3.05, 10),
+    "bestellung": (3.05, 15),
+    "capture": (3.05, 30),
+    "webhook": (3.05, 10),
+}
+
+# Token so lange vor Ablauf erneuern (Sekunden)
+TOKEN_VORLAUF = int(os.getenv("PAYPAL_TOKEN_VORLAUF", "300"))
+
+
+class PayPalClient:
+    """Gemeinsamer Zugang zur PayPal REST-API.
+
+    Das OAuth-Token wird nicht pro Request neu geholt: es liegt im
+    Prozess und in einem SqliteCache, den alle Worker eines Hosts teilen,
+    und wird `TOKEN_VORLAUF` Sekunden vor `expires_in` erneuert. Alle
+    Aufrufe laufen über eine Keep-Alive-Session mit festen Timeouts.
+    """
+
+    def __init__(self, client_id, secret, base_url, token_cache=None, pool_groesse=8):
+        self.client_id = client_id
+        self.secret = secret
+        self.base_url = base_url
+        self.token_cache = token_cache
+        self._schluessel = f"paypal-token:{base_url}:{client_id}"
+        self._token = None
+        self._lock = threading.Lock()
+
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_groesse)
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+
+    # -----------------------------
+    # OAuth-Token
+    # -----------------------------
+
+    def _gueltig(self, token):
+        return token is not None and token["ablauf"] - TOKEN_VORLAUF > time.time()
+
+    def _token_holen(self):
+        response = self.session.post(
+            f"{self.base_url}/v1/oauth2/token",
+            auth=(self.client_id, self.secret),
+            data={"grant_type": "client_credentials"},
+            timeout=TIMEOUTS["token"]
+        )
+        response.raise_for_status()
+        data = response.json()
+
+        return {
+            "access_token": data["access_token"],
+            "ablauf": time.time() + int(data.get("expires_in", 3600))
+        }
+
+    def access_token(self):
+        token = self._token
+        if self._gueltig(token):
+            return token["access_token"]
+
+        with self._lock:
+            # Ein anderer Thread kann inzwischen erneuert haben
+            token = self._token
+            if not self._gueltig(token) and self.token_cache:
+                token, _ = self.token_cache.lesen(self._schluessel)
+
+            if not self._gueltig(token):
+                token = self._token_holen()
+                if self.token_cache:
+                    self.token_cache.schreiben(self._schluessel, token)
+                logger.info("PayPal Token erneuert")
+
+            self._token = token
+            return token["access_token"]
+
+    def token_verwerfen(self):
+        with self._lock:
+            self._token = None
+            if self.token_cache:
+                self.token_cache.schreiben(self._schluessel, None)
+
+    # -----------------------------
+    # Requests
+    # -----------------------------
+
+    def post(self, pfad, art, json=None, headers=None):
+        """POST mit Bearer-Token; bei 401 einmal mit frischem Token wiederholen"""
+
+        for versuch in range(2):
+            response = self.session.post(
+                f"{self.base_url}{pfad}",
+                headers={
+                    "Content-Type": "application/json",
+                    "Authorization": f"Bearer {self.access_token()}",
+                    **(headers or {})
+                },
+                json=json,
+                timeout=TIMEOUTS[art]
+            )
+
+            if response.status_code != 401 or versuch:
+                return response
+
+            self.token_verwerfen()
+
+    def bestellung_anlegen(self, daten, headers=None):
+        return self.post("/v2/checkout/orders", "bestellung", json=daten, headers=headers).json()
+
+    def bestellung_erfassen(self, order_id):
+        return self.post(f"/v2/checkout/orders/{order_id}/capture", "capture").json()
+
+    def webhook_verifizieren(self, daten):
+        return self.post("/v1/notifications/verify-webhook-signature", "webhook", json=daten).json()
+
+
+def token_cache(pfad):
+    """SqliteCache für das Token – Datei nur für den eigenen Benutzer lesbar"""
+    os.close(os.open(pfad, os.O_CREAT | os.O_RDWR, 0o600))
+    # ttl spielt keine Rolle, das Ablaufdatum steht im Token selbst
+    return SqliteCache(pfad, ttl=0, hintergrund_threads=1)
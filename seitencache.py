@@ -0,0 +1,185 @@
+import functools
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, g, make_response, request, session
+from flask_wtf.csrf import generate_csrf
+
+
+logger = logging.getLogger(__name__)
+
+
+# =====================================================
+# SEITEN-CACHE (fertiges HTML, prozess-lokal, LRU)
+# =====================================================
+
+class _Seite:
+    __slots__ = ("body", "mimetype", "etag", "ablauf")
+
+    def __init__(self, body, mimetype, ablauf):
+        self.body = body
+        self.mimetype = mimetype
+        self.etag = hashlib.sha256(body).hexdigest()[:32]
+        self.ablauf = ablauf
+
+
+class SeitenCache:
+    """Gerenderte Seiten, Schlüssel = (Endpoint, Argumente, Version, Variation).
+
+    Begrenzt auf `max_eintraege` und `max_bytes`, verdrängt wird der am
+    längsten nicht gelesene Eintrag. Jede Antwort hat einen starken ETag
+    und beantwortet If-None-Match mit 304. Gecachte Seiten enthalten kein
+    CSRF-Token (Formulare holen es per /csrf-token beim Absenden) und sind
+    damit für alle gleich. Mit ausstehenden Flash-Meldungen oder nach
+    `nicht_cachen()` wird normal gerendert bzw. nicht gespeichert.
+    """
+
+    def __init__(self, max_eintraege=256, max_bytes=32 * 1024 * 1024):
+        self.max_eintraege = max_eintraege
+        self.max_bytes = max_bytes
+        self._daten = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.statistik = {"treffer": 0, "verfehlt": 0, "umgangen": 0, "verdraengt": 0}
+
+    # -----------------------------
+    # Speicher
+    # -----------------------------
+
+    def _zaehlen(self, name):
+        with self._lock:
+            self.statistik[name] += 1
+
+    def _lesen(self, schluessel):
+        """Eintrag oder None – zählt Treffer/Fehlschlag unter dem Lock mit"""
+        with self._lock:
+            seite = self._daten.get(schluessel)
+            if seite is not None and seite.ablauf is not None and seite.ablauf <= time.monotonic():
+                self._entfernen(schluessel)
+                seite = None
+
+            if seite is None:
+                self.statistik["verfehlt"] += 1
+                return None
+
+            self._daten.move_to_end(schluessel)
+            self.statistik["treffer"] += 1
+            return seite
+
+    def _entfernen(self, schluessel):
+        seite = self._daten.pop(schluessel)
+        self._bytes -= len(seite.body)
+
+    def _schreiben(self, schluessel, seite):
+        groesse = len(seite.body)
+        if groesse > self.max_bytes:
+            return
+
+        with self._lock:
+            if schluessel in self._daten:
+                self._entfernen(schluessel)
+
+            while self._daten and (
+                len(self._daten) >= self.max_eintraege
+                or self._bytes + groesse > self.max_bytes
+            ):
+                self._entfernen(next(iter(self._daten)))
+                self.statistik["verdraengt"] += 1
+
+            self._daten[schluessel] = seite
+            self._bytes += groesse
+
+    def leeren(self):
+        with self._lock:
+            self._daten.clear()
+            self._bytes = 0
+
+    def statistik_kopie(self):
+        with self._lock:
+            return dict(
+                self.statistik,
+                eintraege=len(self._daten),
+                bytes=self._bytes,
+                max_eintraege=self.max_eintraege,
+                max_bytes=self.max_bytes,
+            )
+
+    # -----------------------------
+    # Flask
+    # -----------------------------
+
+    def csrf_token(self):
+        """Ersatz für das Jinja-Global `csrf_token` von Flask-WTF"""
+        if g.get("seitencache_rendert"):
+            # Das Token gehört zur Session – im geteilten HTML wäre es falsch
+            raise RuntimeError(
+                "csrf_token() in einer gecachten Seite – Formular mit data-csrf verwenden"
+            )
+        return generate_csrf()
+
+    def seite(self, version, variation=None, ttl=None, max_age=None):
+        """Decorator für GET-Views, deren HTML nur von `version()`,
+        den URL-Argumenten und `variation()` abhängt.
+
+        `ttl` (Sekunden) begrenzt zusätzlich das Alter eines Eintrags,
+        `max_age` erlaubt Browsern, die Seite so lange ohne Rückfrage zu
+        verwenden. Der Query-String gehört bewusst nicht zum Schlüssel.
+        """
+        def dekorator(view):
+            @functools.wraps(view)
+            def gecacht(**kwargs):
+                if request.method not in ("GET", "HEAD") or "_flashes" in session:
+                    self._zaehlen("umgangen")
+                    return view(**kwargs)
+
+                wert = variation() if variation else None
+                schluessel = (request.endpoint, tuple(sorted(kwargs.items())), version(), wert)
+
+                seite = self._lesen(schluessel)
+                if seite is not None:
+                    return self._ausliefern(seite, privat=wert is not None, max_age=max_age)
+
+                g.seitencache_rendert = True
+                try:
+                    response = make_response(view(**kwargs))
+                finally:
+                    g.seitencache_rendert = False
+
+                # Redirects, Fehler, Streams → unverändert durchreichen
+                if response.status_code != 200 or response.is_streamed:
+                    return response
+
+                seite = _Seite(
+                    response.get_data(),
+                    response.mimetype,
+                    ablauf=time.monotonic() + ttl if ttl else None,
+                )
+
+                # Unvollständige Seiten weder speichern noch im Browser halten
+                if g.pop("seitencache_aus", False):
+                    return self._ausliefern(seite, privat=wert is not None)
+
+                self._schreiben(schluessel, seite)
+                return self._ausliefern(seite, privat=wert is not None, max_age=max_age)
+
+            return gecacht
+
+        return dekorator
+
+    def _ausliefern(self, seite, privat, max_age=None):
+        response = current_app.response_class(seite.body, mimetype=seite.mimetype)
+        response.set_etag(seite.etag)
+        if max_age:
+            response.headers["Cache-Control"] = f"{'private' if privat else 'public'}, max-age={max_age}"
+        else:
+            response.headers["Cache-Control"] = "private, no-cache" if privat else "no-cache"
+
+        return response.make_conditional(request)
+
+
+def nicht_cachen():
+    """Aktuelle Antwort nicht in den Seiten-Cache legen (z.B. unvollständige Daten)"""
+    g.seitencache_aus = True
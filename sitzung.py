@@ -0,0 +1,162 @@
+import logging
+import secrets
+from datetime import datetime
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from sqlalchemy import delete, insert, select, update
+from werkzeug.datastructures import CallbackDict
+
+from models import db, Sitzung
+
+
+logger = logging.getLogger(__name__)
+
+# Eine Session nur mit diesen Schlüsseln wird nicht angelegt (Crawler,
+# Seitenaufrufe ohne Formular) – außer die View verlangt es (`behalten`)
+NUR_TECHNISCH = frozenset({"csrf_token"})
+
+
+# =====================================================
+# SERVER-SEITIGE SESSIONS
+# =====================================================
+
+class DbSitzung(CallbackDict, SessionMixin):
+    """Session-Inhalt liegt in der Tabelle `sitzungen`, im Cookie nur die ID"""
+
+    def __init__(self, daten=None, sid=None, ablauf=None):
+        def geaendert(_):
+            self.modified = True
+
+        super().__init__(daten or {}, geaendert)
+        self.sid = sid
+        self.ablauf = ablauf
+        self.verworfen = None
+        self.behalten = False
+        self.modified = False
+
+    def clear(self):
+        # Neue ID nach clear() (z.B. beim Login) – keine Session-Fixation
+        if self.sid:
+            self.verworfen = self.sid
+            self.sid = None
+        super().clear()
+
+
+class DbSitzungInterface(SessionInterface):
+    """Flask-SessionInterface auf Basis von SQLAlchemy.
+
+    Statt des ganzen signierten Inhalts trägt der Cookie nur eine zufällige
+    ID. Ohne Cookie und für statische Dateien wird die DB gar nicht
+    gefragt; geschrieben wird nur bei Änderungen oder wenn mehr als die
+    Hälfte der Laufzeit verstrichen ist (gleitender Ablauf).
+    """
+
+    session_class = DbSitzung
+    serializer = TaggedJSONSerializer()
+
+    def _laufzeit(self, app):
+        return app.permanent_session_lifetime
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+
+        if not sid or request.path.startswith(app.static_url_path + "/"):
+            return self.session_class()
+
+        with db.engine.connect() as conn:
+            row = conn.execute(
+                select(Sitzung.daten, Sitzung.ablauf).where(Sitzung.id == sid)
+            ).first()
+
+        if row is None or row.ablauf <= datetime.utcnow():
+            return self.session_class()
+
+        try:
+            daten = self.serializer.loads(row.daten)
+        except ValueError:
+            logger.warning("Session %s… nicht lesbar", sid[:8])
+            return self.session_class()
+
+        return self.session_class(daten, sid=sid, ablauf=row.ablauf)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if session.verworfen:
+            with db.engine.begin() as conn:
+                conn.execute(delete(Sitzung).where(Sitzung.id == session.verworfen))
+
+        # Leer geworden → Zeile und Cookie entfernen
+        if not session:
+            if session.sid:
+                with db.engine.begin() as conn:
+                    conn.execute(delete(Sitzung).where(Sitzung.id == session.sid))
+            if session.sid or session.verworfen:
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        # Neue Session ohne echten Inhalt → keine Zeile, kein Cookie
+        if not session.sid and not session.behalten and NUR_TECHNISCH.issuperset(session):
+            return
+
+        jetzt = datetime.utcnow()
+        laufzeit = self._laufzeit(app)
+        auffrischen = session.ablauf is None or session.ablauf - jetzt < laufzeit / 2
+
+        # Öffentlich cachebare Antworten (Seiten-Cache, Suche) dürfen kein
+        # Set-Cookie tragen – ein geteilter Cache gäbe die ID an andere weiter.
+        # Der gleitende Ablauf wartet dann auf die nächste private Antwort.
+        oeffentlich = response.cache_control.public
+
+        if not session.modified and (not auffrischen or oeffentlich):
+            return
+
+        if oeffentlich:
+            response.cache_control.public = False
+            response.cache_control.private = True
+
+        ablauf = jetzt + laufzeit
+        daten = self.serializer.dumps(dict(session))
+
+        with db.engine.begin() as conn:
+            if session.sid:
+                geschrieben = conn.execute(
+                    update(Sitzung)
+                    .where(Sitzung.id == session.sid)
+                    .values(daten=daten, ablauf=ablauf)
+                ).rowcount
+            else:
+                geschrieben = 0
+
+            if not geschrieben:
+                # Neue oder inzwischen abgelaufene Session → neue ID
+                session.sid = secrets.token_urlsafe(32)
+                conn.execute(insert(Sitzung).values(id=session.sid, daten=daten, ablauf=ablauf))
+
+        session.ablauf = ablauf
+
+        response.set_cookie(
+            name,
+            session.sid,
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+        )
+        response.vary.add("Cookie")
+
+
+def sitzungen_aufraeumen():
+    """Abgelaufene Sessions löschen"""
+    with db.engine.begin() as conn:
+        geloescht = conn.execute(
+            delete(Sitzung).where(Sitzung.ablauf <= datetime.utcnow())
+        ).rowcount
+
+    if geloescht:
+        logger.info("%s abgelaufene Sessions gelöscht", geloescht)
@@ -142,7 +142,7 @@ function setupCheckoutButton(buttonId = "checkout-btn") {
 
       const cart = JSON.parse(localStorage.getItem('cart')) || [];
 
-      await fetch("/sync-cart", {
+      const res = await fetch("/sync-cart", {
         method: "POST",
         headers: {
           "Content-Type": "application/json"
@@ -150,6 +150,17 @@ function setupCheckoutButton(buttonId = "checkout-btn") {
         body: JSON.stringify(cart)
       });
 
+      // Positionen, die der Server nicht kennt, nicht still verschwinden lassen
+      if (res.status === 422) {
+        const antwort = await res.json();
+        const abgelehnt = antwort.abgelehnt || [];
+        localStorage.setItem('cart', JSON.stringify(cart.filter(item => !abgelehnt.includes(item.ean))));
+        loadCart();
+        updateCartCountIfPossible();
+        alert(antwort.message);
+        return;
+      }
+
       window.location.href = "/checkout";
     });
   }
@@ -165,33 +176,3 @@ window.addEventListener('DOMContentLoaded', () => {
 window.loadCart = loadCart;
 window.setupCheckoutButton = setupCheckoutButton;
 
-
-
-function addVoucher(amount) {
-
-  const voucher = {
-    id: crypto.randomUUID(),
-    title: `Gutschein ${amount}€`,
-    price: amount,
-    quantity: 1,
-    ean: "GUTSCHEIN_CUSTOM",
-    image: "" // optional
-  };
-
-  let cart = JSON.parse(localStorage.getItem('cart')) || [];
-
-  cart.push(voucher);
-
-  localStorage.setItem('cart', JSON.stringify(cart));
-
-  // 🔥 WICHTIG: an Flask schicken
-  fetch("/sync-cart", {
-    method: "POST",
-    headers: {
-      "Content-Type": "application/json"
-    },
-    body: JSON.stringify(cart)
-  }).then(() => {
-    window.location.href = "/cart";
-  });
-}
@@ -0,0 +1,25 @@
+// csrf.js
+
+// --- CSRF-Token erst beim Absenden holen ---
+// Formulare mit data-csrf kommen ohne Token aus dem (gecachten) HTML.
+// So bleibt die Seite für alle gleich, und eine Session entsteht erst,
+// wenn wirklich jemand ein Formular abschickt.
+
+document.addEventListener("submit", async event => {
+  const form = event.target;
+  if (!form.matches("form[data-csrf]")) return;
+
+  event.preventDefault();
+
+  try {
+    const res = await fetch("/csrf-token", { credentials: "same-origin", cache: "no-store" });
+    if (!res.ok) throw new Error(res.status);
+    form.querySelector('input[name="csrf_token"]').value = (await res.json()).csrf_token;
+  } catch (err) {
+    console.error("CSRF-Token konnte nicht geladen werden:", err);
+    return;
+  }
+
+  // submit() löst kein neues submit-Event aus
+  HTMLFormElement.prototype.submit.call(form);
+});
@@ -0,0 +1,59 @@
+// verfuegbarkeit.js
+
+// --- Preis/Bestand nachladen ---
+// Jedes Element mit data-verfuegbarkeit="<ean>" bekommt die MOVEMENT-Daten
+// in seine [data-feld="…"]-Kinder. Eine EAN → Einzel-Endpoint, mehrere →
+// ein gebündelter Request.
+
+function verfuegbarkeitAnzeigen(container, daten) {
+  const formate = {
+    preis: wert => wert != null ? Number(wert).toFixed(2) + " €" : null,
+    bestand: wert => wert ? String(wert) : "–",
+    handling_zeit: wert => wert != null ? String(wert) : "n/a",
+    erfuellungsrate: wert => wert != null ? String(wert) : "n/a",
+  };
+
+  Object.keys(formate).forEach(feld => {
+    const text = formate[feld](daten[feld]);
+    if (text == null) return;
+    container.querySelectorAll(`[data-feld="${feld}"]`).forEach(el => {
+      el.textContent = text;
+    });
+  });
+
+  if (daten.preis != null) {
+    container.querySelectorAll("[data-preis]").forEach(el => {
+      el.dataset.preis = daten.preis;
+    });
+  }
+}
+
+async function verfuegbarkeitLaden() {
+  const container = document.querySelectorAll("[data-verfuegbarkeit]");
+  const eans = [...new Set([...container].map(el => el.dataset.verfuegbarkeit).filter(Boolean))];
+  if (eans.length === 0) return;
+
+  let ergebnis = {};
+
+  try {
+    if (eans.length === 1) {
+      const res = await fetch(`/api/produkt/${encodeURIComponent(eans[0])}/verfuegbarkeit`);
+      if (res.ok) ergebnis[eans[0]] = await res.json();
+    } else {
+      const params = new URLSearchParams();
+      eans.forEach(ean => params.append("ean", ean));
+      const res = await fetch(`/api/produkte/verfuegbarkeit?${params}`);
+      if (res.ok) ergebnis = (await res.json()).produkte;
+    }
+  } catch (err) {
+    console.error("Verfügbarkeit konnte nicht geladen werden:", err);
+    return;
+  }
+
+  container.forEach(el => {
+    const daten = ergebnis[el.dataset.verfuegbarkeit];
+    if (daten) verfuegbarkeitAnzeigen(el, daten);
+  });
+}
+
+document.addEventListener("DOMContentLoaded", verfuegbarkeitLaden);
@@ -0,0 +1,280 @@
+import heapq
+import math
+import re
+import unicodedata
+from bisect import bisect_left
+from collections import namedtuple
+
+
+# =====================================================
+# VOLLTEXTSUCHE
+# =====================================================
+
+# Gewichtung der Felder (BM25F: Feld-Häufigkeiten werden gewichtet addiert)
+FELDER = {
+    "name": 3.0,
+    "autor": 2.0,
+    "ean": 2.0,
+    "kategorie": 1.5,
+    "beschreibung": 1.0,
+}
+
+STOPPWOERTER = {
+    "der", "die", "das", "den", "dem", "des", "ein", "eine", "einer", "eines",
+    "einem", "einen", "und", "oder", "mit", "von", "vom", "zu", "zum", "zur",
+    "im", "in", "am", "an", "auf", "fur", "ist", "es", "sich", "nicht", "auch",
+}
+
+SUFFIXE = ("ern", "en", "er", "es", "em", "e", "n", "s")
+
+K1 = 1.2
+B = 0.75
+
+Treffer = namedtuple("Treffer", "produkte gesamt seite seiten")
+
+
+# Umschrift für Wörter mit Umlaut: Brücke wird zusätzlich als "bruecke" indiziert
+UMSCHRIFT = str.maketrans({"ä": "ae", "ö": "oe", "ü": "ue"})
+
+
+def falten(text):
+    """Kleinschreibung + Umlaut/ß-Faltung: Brücke und Brucke → brucke.
+
+    "ae"/"oe"/"ue" bleiben unverändert (Poet, Feuer) – die Umschrift
+    deckt `umschreiben()` beim Indizieren ab.
+    """
+    text = text.lower().replace("ß", "ss")
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    # ISBN/EAN mit Bindestrichen zusammenziehen
+    return re.sub(r"(?<=\d)[-\s](?=\d)", "", text)
+
+
+def stamm(wort):
+    """Sehr einfaches Stemming: ein deutsches Flexionssuffix abschneiden"""
+    if wort.isdigit():
+        return wort
+    for suffix in SUFFIXE:
+        if wort.endswith(suffix) and len(wort) - len(suffix) >= 3:
+            return wort[: -len(suffix)]
+    return wort
+
+
+def umschreiben(text):
+    """Wörter mit Umlaut in ae/oe/ue-Schreibweise (leer, wenn es keine gibt)"""
+    woerter = re.findall(r"\w*[äöü]\w*", unicodedata.normalize("NFC", str(text or "").lower()))
+    return " ".join(w.translate(UMSCHRIFT) for w in woerter)
+
+
+def tokenisieren(text, umschrift=False):
+    """Suchbegriffe; mit `umschrift` (Index) auch die ae/oe/ue-Varianten"""
+    if umschrift:
+        text = f"{text or ''} {umschreiben(text)}"
+
+    return [
+        stamm(w)
+        for w in re.findall(r"[a-z0-9]+", falten(str(text or "")))
+        if w not in STOPPWOERTER
+    ]
+
+
+class SuchIndex:
+    """Invertierter Index über Name, Autor, Beschreibung, Kategorie und EAN.
+
+    Wird einmal beim Laden des Katalogs gebaut; eine Suche kostet danach
+    nur noch die Postings der Suchbegriffe.
+    """
+
+    def __init__(self, produkte):
+        self._produkte = tuple(produkte)
+        self._postings = {}
+        laengen = []
+
+        for nr, produkt in enumerate(self._produkte):
+            haeufigkeit = {}
+            laenge = 0.0
+
+            for feld, gewicht in FELDER.items():
+                tokens = tokenisieren(produkt.get(feld), umschrift=True)
+                laenge += gewicht * len(tokens)
+                for t in tokens:
+                    haeufigkeit[t] = haeufigkeit.get(t, 0.0) + gewicht
+
+            laengen.append(laenge)
+            for t, tf in haeufigkeit.items():
+                self._postings.setdefault(t, []).append((nr, tf))
+
+        anzahl = len(self._produkte)
+        mittel = (sum(laengen) / anzahl) if anzahl else 0.0
+        self._norm = [
+            K1 * (1 - B + B * (l / mittel)) if mittel else K1
+            for l in laengen
+        ]
+        self._idf = {
+            t: math.log(1 + (anzahl - len(p) + 0.5) / (len(p) + 0.5))
+            for t, p in self._postings.items()
+        }
+        self._vokabular = sorted(self._postings)
+
+    def _mit_praefix(self, praefix):
+        start = bisect_left(self._vokabular, praefix)
+        for t in self._vokabular[start:]:
+            if not t.startswith(praefix):
+                break
+            yield t
+
+    def _bewerten(self, anfrage):
+        begriffe = tokenisieren(anfrage)
+        if not begriffe:
+            return {}
+
+        # Letzten Begriff auch als Präfix behandeln ("jacom" → "jacominus")
+        letzter = begriffe[-1]
+        if len(letzter) >= 3 and letzter not in self._postings:
+            begriffe[-1:] = list(self._mit_praefix(letzter))
+
+        punkte = {}
+        for t in set(begriffe):
+            idf = self._idf.get(t)
+            if idf is None:
+                continue
+            for nr, tf in self._postings[t]:
+                punkte[nr] = punkte.get(nr, 0.0) + idf * tf * (K1 + 1) / (tf + self._norm[nr])
+        return punkte
+
+    def suche(self, anfrage, seite=1, pro_seite=24):
+        """BM25-Ranking mit Seitenaufteilung"""
+        punkte = self._bewerten(anfrage)
+
+        gesamt = len(punkte)
+        seiten = max(1, math.ceil(gesamt / pro_seite))
+        seite = min(max(1, seite), seiten)
+        start = (seite - 1) * pro_seite
+
+        # Nur so viele Treffer sortieren, wie für die Seite nötig sind
+        beste = heapq.nsmallest(
+            start + pro_seite, punkte, key=lambda nr: (-punkte[nr], nr)
+        )
+
+        return Treffer(
+            produkte=[self._produkte[nr] for nr in beste[start:]],
+            gesamt=gesamt,
+            seite=seite,
+            seiten=seiten,
+        )
+
+
+# =====================================================
+# VORSCHLÄGE (TYPEAHEAD)
+# =====================================================
+
+# Bis zu dieser Tiefe hat jeder Trie-Knoten fertige Top-N-Listen,
+# darunter wird nur noch die (kleine) Restliste gefiltert.
+MAX_TIEFE = 12
+TYPEN = ("titel", "autor", "ean")
+
+
+def praefix_normalisieren(text):
+    return " ".join(re.findall(r"[a-z0-9]+", falten(str(text or ""))))
+
+
+class _Knoten:
+    __slots__ = ("kinder", "top", "rest")
+
+    def __init__(self):
+        self.kinder = {}
+        self.top = []
+        self.rest = None
+
+
+class Vorschlaege:
+    """Präfix-Trie für Titel-, Autor- und EAN-Vervollständigung.
+
+    Jeder Knoten hält die besten N Vorschläge für sein Präfix bereits
+    sortiert vor – eine Abfrage kostet nur len(praefix) Dict-Zugriffe.
+    """
+
+    def __init__(self, produkte, anzahl=10):
+        self.anzahl = anzahl
+        self._wurzel = _Knoten()
+        self._eintraege = []
+
+        for produkt in produkte:
+            for typ in TYPEN:
+                text = produkt.get("name" if typ == "titel" else typ)
+                if text:
+                    self._einfuegen(typ, str(text), produkt)
+
+        self._abschliessen(self._wurzel)
+
+    def _einfuegen(self, typ, text, produkt):
+        nr = len(self._eintraege)
+        self._eintraege.append({
+            "typ": typ,
+            "text": text,
+            "produkt_id": produkt.get("id"),
+            "slug": produkt.get("slug"),
+            "name": produkt.get("name"),
+        })
+
+        # Mit Umlaut zusätzlich in Umschrift ("brue" → "Die Brücke")
+        schluessel = {
+            praefix_normalisieren(text),
+            praefix_normalisieren(unicodedata.normalize("NFC", text.lower()).translate(UMSCHRIFT)),
+        }
+
+        for variante in schluessel:
+            woerter = variante.split(" ")
+
+            # Jeder Wortanfang ist ein Einstiegspunkt ("bru" → "Die Brücke")
+            for pos in range(len(woerter)):
+                rest = " ".join(woerter[pos:])
+                rang = (pos > 0, TYPEN.index(typ), len(text), text)
+                knoten = self._wurzel
+
+                for zeichen in rest[:MAX_TIEFE]:
+                    knoten = knoten.kinder.setdefault(zeichen, _Knoten())
+                    knoten.top.append((rang, nr))
+
+                if len(rest) > MAX_TIEFE:
+                    if knoten.rest is None:
+                        knoten.rest = []
+                    knoten.rest.append((rest, rang, nr))
+
+    def _abschliessen(self, knoten):
+        knoten.top = self._beste(knoten.top)
+        for kind in knoten.kinder.values():
+            self._abschliessen(kind)
+
+    def _beste(self, kandidaten, anzahl=None):
+        ergebnis = []
+        gesehen = set()
+        for _, nr in sorted(kandidaten):
+            if nr not in gesehen:
+                gesehen.add(nr)
+                ergebnis.append(nr)
+                if len(ergebnis) == (anzahl or self.anzahl):
+                    break
+        return ergebnis
+
+    def vorschlagen(self, praefix, anzahl=None):
+        """Die besten Vervollständigungen für ein (normalisiertes) Präfix"""
+        anzahl = self.anzahl if anzahl is None else max(1, min(anzahl, self.anzahl))
+        if not praefix:
+            return []
+
+        knoten = self._wurzel
+        for zeichen in praefix[:MAX_TIEFE]:
+            knoten = knoten.kinder.get(zeichen)
+            if knoten is None:
+                return []
+
+        if len(praefix) <= MAX_TIEFE:
+            treffer = knoten.top[:anzahl]
+        else:
+            treffer = self._beste(
+                [(rang, nr) for rest, rang, nr in knoten.rest or () if rest.startswith(praefix)],
+                anzahl
+            )
+
+        return [self._eintraege[nr] for nr in treffer]
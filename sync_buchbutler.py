@@ -1,21 +1,58 @@
 # sync_buchbutler.py
-import os
-from app import app, db, lade_produkt_von_api, lade_bestand_von_api
+from datetime import datetime
+
+from sqlalchemy import update
+
+from app import app, db, check_auth, content_abrufen, bestand_abrufen
+from buchbutler_sync import SyncEngine, sync_felder, delta
 from models import Produkt
 
-with app.app_context():
-    alle_produkte = Produkt.query.all()
-    for produkt in alle_produkte:
-        api = lade_produkt_von_api(produkt.ean)
-        movement = lade_bestand_von_api(produkt.ean)
 
-        if api:
-            produkt.name = api.get("name")
-            produkt.autor = api.get("autor")
-        if movement:
-            produkt.preis = movement.get("preis")
+def main():
+    if not check_auth():
+        return
+
+    with app.app_context():
+        bestand = {
+            row.ean: row
+            for row in db.session.query(
+                Produkt.id, Produkt.ean, Produkt.name,
+                Produkt.autor, Produkt.preis, Produkt.lagerbestand
+            )
+        }
+
+        engine = SyncEngine(content_abrufen, bestand_abrufen)
+
+        aenderungen = []
+        unveraendert = []
+        fehlgeschlagen = []
+
+        for ergebnis in engine.laden(bestand):
+            if ergebnis.fehler:
+                fehlgeschlagen.append(ergebnis.ean)
+
+            row = bestand[ergebnis.ean]
+            diff = delta(row._asdict(), sync_felder(ergebnis))
+
+            if diff:
+                diff["id"] = row.id
+                diff["zuletzt_aktualisiert"] = datetime.utcnow()
+                aenderungen.append(diff)
+            elif not ergebnis.fehler:
+                unveraendert.append(ergebnis.ean)
+
+        # Nur geänderte Zeilen schreiben – ein Bulk-UPDATE pro Feldkombination
+        if aenderungen:
+            db.session.execute(update(Produkt), aenderungen)
+            db.session.commit()
+
+        print(f"✅ Sync abgeschlossen: {len(bestand)} Produkte")
+        print(f"   geändert:       {len(aenderungen)}")
+        print(f"   unverändert:    {len(unveraendert)}")
+        print(f"   fehlgeschlagen: {len(fehlgeschlagen)}")
+        for ean in fehlgeschlagen:
+            print(f"     - {ean}")
 
-        db.session.add(produkt)
 
-    db.session.commit()
-    print("✅ Sync abgeschlossen")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import html
+import re
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import Bestellung
+
+
+@pytest.fixture
+def seiten(shop, admin, kontext, monkeypatch):
+    """Blättert die Admin-Liste durch – [[ids der Seite], …] mit 2 pro Seite"""
+    monkeypatch.setattr(shop, "ADMIN_PRO_SEITE", 2)
+
+    def blaettern(url="/admin/bestellungen"):
+        ergebnis = []
+        while url:
+            antwort = admin.get(url)
+            assert antwort.status_code == 200
+            text = antwort.get_data(as_text=True)
+            ergebnis.append([int(i) for i in re.findall(r"Bestellung #(\d+)", text)])
+            weiter = re.search(r'<a href="([^"]+)">Ältere', text)
+            url = html.unescape(weiter.group(1)) if weiter else None
+        return ergebnis
+
+    return blaettern
+
+
+def bestellungen_anlegen(session, *daten, **felder):
+    for datum in daten:
+        session.add(Bestellung(email="kunde@example.org", bestelldatum=datum, **felder))
+    session.commit()
+
+
+def test_cursor_lesen(shop):
+    datum = datetime(2024, 5, 1, 12, 30, 15, 123456)
+
+    assert shop.cursor_lesen(f"{datum.isoformat()}_42") == (datum, 42)
+    assert shop.cursor_lesen("") is None
+    assert shop.cursor_lesen(None) is None
+    for kaputt in ("gestern_1", "2024-05-01T12:00:00_x", "42"):
+        with pytest.raises(ValueError):
+            shop.cursor_lesen(kaputt)
+
+
+def test_kaputter_cursor_400(admin):
+    assert admin.get("/admin/bestellungen?nach=quatsch").status_code == 400
+
+
+def test_neueste_zuerst(seiten, kontext):
+    start = datetime(2024, 5, 1)
+    bestellungen_anlegen(kontext, *(start + timedelta(hours=i) for i in (3, 1, 4, 2, 5)))
+
+    # ids 1…5 mit den Stunden 3, 1, 4, 2, 5
+    assert seiten() == [[5, 3], [1, 4], [2]]
+
+
+def test_gleiche_zeitstempel_ueber_seitengrenzen(seiten, kontext):
+    # Mit Mikrosekunden, wie sie datetime.utcnow() liefert
+    gleich = datetime(2024, 5, 1, 12, 0, 0, 250000)
+    bestellungen_anlegen(kontext, *[gleich] * 5)
+
+    assert seiten() == [[5, 4], [3, 2], [1]]
+
+
+def test_volle_letzte_seite_ohne_weiter_link(seiten, kontext):
+    gleich = datetime(2024, 5, 1, 12, 0, 0)
+    bestellungen_anlegen(kontext, *[gleich] * 4)
+
+    assert seiten() == [[4, 3], [2, 1]]
+
+
+def test_filter_bleibt_beim_blaettern(seiten, kontext):
+    gleich = datetime(2024, 5, 1, 12, 0, 0)
+    bestellungen_anlegen(kontext, *[gleich] * 3, paymentmethod="paypal")
+    bestellungen_anlegen(kontext, *[gleich] * 2, paymentmethod="gutschein")
+
+    assert seiten("/admin/bestellungen?zahlung=paypal") == [[3, 2], [1]]
@@ -0,0 +1,152 @@
+import gzip
+import json
+import os
+
+import pytest
+from flask import Flask, url_for
+
+import assets_bauen
+from assets import IMMUTABLE, KOMPRIMIERT_ORDNER, MANIFEST_NAME, AssetManifest, datei_hash
+
+
+SKRIPT = b"console.log('Warenkorb');\n" * 50
+
+
+@pytest.fixture
+def static(tmp_path):
+    ordner = tmp_path / "static"
+    (ordner / "js").mkdir(parents=True)
+    (ordner / "js" / "cart.js").write_bytes(SKRIPT)
+    (ordner / "ibk.png").write_bytes(b"\x89PNG bild")
+    return ordner
+
+
+@pytest.fixture
+def umgebung(static):
+    """Mini-App, deren static-View das AssetManifest übernimmt"""
+    app = Flask(__name__, static_folder=str(static))
+    manifest = AssetManifest(app.static_folder)
+    app.url_defaults(manifest.url_defaults)
+    app.view_functions["static"] = manifest.ausliefern
+    return app
+
+
+def bauen(static, monkeypatch):
+    monkeypatch.setattr(assets_bauen, "STATIC", str(static))
+    monkeypatch.setattr(assets_bauen, "AUSLASSEN", (
+        os.path.join(str(static), MANIFEST_NAME),
+        os.path.join(str(static), KOMPRIMIERT_ORDNER),
+    ))
+    assets_bauen.main()
+    with open(static / MANIFEST_NAME, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def static_url(app, filename):
+    with app.test_request_context():
+        return url_for("static", filename=filename)
+
+
+# -----------------------------
+# Versionierte URLs
+# -----------------------------
+
+def test_url_mit_content_hash(umgebung, static):
+    assert static_url(umgebung, "js/cart.js") == f"/static/js/cart.js?v={datei_hash(static / 'js' / 'cart.js')}"
+    # Fehlende Dateien bekommen keinen Hash
+    assert static_url(umgebung, "js/fehlt.js") == "/static/js/fehlt.js"
+
+
+def test_geaenderte_datei_neuer_hash(umgebung, static):
+    alt = static_url(umgebung, "js/cart.js")
+
+    datei = static / "js" / "cart.js"
+    datei.write_bytes(SKRIPT + b"// neu\n")
+    os.utime(datei, ns=(1, 1))
+
+    assert static_url(umgebung, "js/cart.js") != alt
+
+
+def test_nur_aktuelle_version_immutable(umgebung):
+    client = umgebung.test_client()
+
+    aktuell = client.get(static_url(umgebung, "js/cart.js"))
+    alt = client.get("/static/js/cart.js?v=000000000000")
+    ohne = client.get("/static/js/cart.js")
+
+    assert aktuell.headers["Cache-Control"] == IMMUTABLE
+    assert aktuell.data == SKRIPT
+    assert "immutable" not in alt.headers.get("Cache-Control", "")
+    assert "immutable" not in ohne.headers.get("Cache-Control", "")
+
+
+def test_ausserhalb_von_static_404(umgebung):
+    client = umgebung.test_client()
+
+    assert client.get("/static/../test_assets.py").status_code == 404
+    assert client.get("/static/js").status_code == 404
+    assert client.get("/static/js/fehlt.js").status_code == 404
+
+
+# -----------------------------
+# Vorkomprimierte Varianten
+# -----------------------------
+
+def test_build_nur_fuer_textformate(static, monkeypatch):
+    manifest = bauen(static, monkeypatch)
+
+    assert set(manifest) == {"js/cart.js", "ibk.png"}
+    assert "gzip" in manifest["js/cart.js"]["varianten"]
+    assert manifest["ibk.png"]["varianten"] == []
+    komprimiert = static / KOMPRIMIERT_ORDNER / "js" / "cart.js.gz"
+    assert gzip.decompress(komprimiert.read_bytes()) == SKRIPT
+
+
+def test_gzip_wenn_akzeptiert(umgebung, static, monkeypatch):
+    bauen(static, monkeypatch)
+    client = umgebung.test_client()
+    url = static_url(umgebung, "js/cart.js")
+
+    antwort = client.get(url, headers={"Accept-Encoding": "gzip"})
+
+    assert antwort.headers["Content-Encoding"] == "gzip"
+    assert "javascript" in antwort.headers["Content-Type"]
+    assert "Accept-Encoding" in antwort.headers["Vary"]
+    assert antwort.headers["Cache-Control"] == IMMUTABLE
+    assert gzip.decompress(antwort.data) == SKRIPT
+
+
+def test_ohne_accept_encoding_unkomprimiert(umgebung, static, monkeypatch):
+    bauen(static, monkeypatch)
+
+    antwort = umgebung.test_client().get("/static/js/cart.js")
+
+    assert "Content-Encoding" not in antwort.headers
+    assert "Accept-Encoding" in antwort.headers["Vary"]
+    assert antwort.data == SKRIPT
+
+
+def test_brotli_bevorzugt(umgebung, static, monkeypatch):
+    bauen(static, monkeypatch)
+    # Variante von Hand, damit der Test ohne das brotli-Paket läuft
+    (static / KOMPRIMIERT_ORDNER / "js" / "cart.js.br").write_bytes(b"brotli")
+    manifest = json.loads((static / MANIFEST_NAME).read_text(encoding="utf-8"))
+    manifest["js/cart.js"]["varianten"] = ["br", "gzip"]
+    (static / MANIFEST_NAME).write_text(json.dumps(manifest), encoding="utf-8")
+
+    antwort = umgebung.test_client().get("/static/js/cart.js", headers={"Accept-Encoding": "gzip, br"})
+
+    assert antwort.headers["Content-Encoding"] == "br"
+    assert antwort.data == b"brotli"
+
+
+def test_nach_build_geaendert_keine_veraltete_variante(umgebung, static, monkeypatch):
+    bauen(static, monkeypatch)
+    datei = static / "js" / "cart.js"
+    datei.write_bytes(b"console.log('neu');\n")
+    os.utime(datei, ns=(1, 1))
+
+    antwort = umgebung.test_client().get("/static/js/cart.js", headers={"Accept-Encoding": "gzip"})
+
+    assert "Content-Encoding" not in antwort.headers
+    assert antwort.data == b"console.log('neu');\n"
@@ -0,0 +1,179 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import Bestellung, BestellAusgang, BestellPosition
+
+
+def bestellung_anlegen(session):
+    b = Bestellung(email="kunde@example.org", collectkey=str(uuid.uuid4()), paymentmethod="paypal")
+    session.add(b)
+    session.flush()
+    session.add(BestellPosition(bestellung_id=b.id, ean="9783000000011", bezeichnung="Die Brücke", menge=1, preis=15.0))
+    session.add(BestellAusgang(bestellung_id=b.id))
+    session.commit()
+    return b
+
+
+def ausgang(session, bestellung):
+    session.expire_all()
+    return BestellAusgang.query.filter_by(bestellung_id=bestellung.id).one()
+
+
+def wieder_faellig(session, bestellung):
+    """Backoff bzw. Sperre überspringen"""
+    ausgang(session, bestellung).naechster_versuch_am = datetime.utcnow() - timedelta(seconds=1)
+    session.commit()
+
+
+# -----------------------------
+# Senden und Retry
+# -----------------------------
+
+def test_erfolg_beim_ersten_versuch(shop, buchbutler, kontext):
+    b = bestellung_anlegen(kontext)
+
+    shop.bestellausgang_abarbeiten()
+
+    eintrag = ausgang(kontext, b)
+    assert (eintrag.status, eintrag.versuche) == ("gesendet", 1)
+    assert eintrag.bestellung.moluna_order_id == "HASH-1"
+    assert buchbutler.bestellungen[0]["auftrag_kopf"]["bestellreferenz"] == f"IBK-{b.id}"
+    # Erster Versuch → keine Nachfrage per collectkey
+    assert buchbutler.abfragen == []
+
+
+def test_fehler_mit_backoff(shop, buchbutler, kontext):
+    b = bestellung_anlegen(kontext)
+    buchbutler.fehler = RuntimeError("Buchbutler weg")
+
+    shop.bestellausgang_abarbeiten()
+
+    eintrag = ausgang(kontext, b)
+    assert (eintrag.status, eintrag.versuche) == ("offen", 1)
+    assert "Buchbutler weg" in eintrag.letzter_fehler
+    assert timedelta(seconds=50) < eintrag.naechster_versuch_am - datetime.utcnow() <= timedelta(minutes=1)
+
+    # Noch nicht fällig → kein zweiter POST
+    shop.bestellausgang_abarbeiten()
+    assert len(buchbutler.bestellungen) == 1
+
+    wieder_faellig(kontext, b)
+    shop.bestellausgang_abarbeiten()
+
+    eintrag = ausgang(kontext, b)
+    assert eintrag.versuche == 2
+    assert timedelta(seconds=110) < eintrag.naechster_versuch_am - datetime.utcnow() <= timedelta(minutes=2)
+
+
+def test_reservierter_eintrag_wird_nicht_gesendet(shop, buchbutler, kontext):
+    b = bestellung_anlegen(kontext)
+    # Ein anderer Worker hat den Eintrag gerade reserviert
+    eintrag = ausgang(kontext, b)
+    eintrag.versuche = 1
+    eintrag.naechster_versuch_am = datetime.utcnow() + shop.BESTELLAUSGANG_SPERRE
+    kontext.commit()
+
+    shop.bestellausgang_abarbeiten()
+
+    assert buchbutler.bestellungen == []
+    assert ausgang(kontext, b).versuche == 1
+
+
+# -----------------------------
+# Kein doppeltes Bestellen
+# -----------------------------
+
+def test_nach_absturz_erst_orderresponse(shop, buchbutler, kontext):
+    b = bestellung_anlegen(kontext)
+    # Worker nach dem POST abgestürzt: Versuch gezählt, Sperre abgelaufen
+    ausgang(kontext, b).versuche = 1
+    kontext.commit()
+    buchbutler.antworten[b.collectkey] = {"response": {"status": "in Bearbeitung"}}
+
+    shop.bestellausgang_abarbeiten()
+
+    eintrag = ausgang(kontext, b)
+    assert buchbutler.abfragen == [b.collectkey]
+    assert buchbutler.bestellungen == []
+    assert eintrag.status == "gesendet"
+    assert eintrag.bestellung.moluna_status == "in Bearbeitung"
+
+
+def test_retry_ohne_orderresponse_bestellt_erneut(shop, buchbutler, kontext):
+    b = bestellung_anlegen(kontext)
+    buchbutler.fehler = RuntimeError("Read-Timeout")
+    shop.bestellausgang_abarbeiten()
+
+    buchbutler.fehler = None
+    wieder_faellig(kontext, b)
+    shop.bestellausgang_abarbeiten()
+
+    assert buchbutler.abfragen == [b.collectkey]
+    assert len(buchbutler.bestellungen) == 2
+    assert ausgang(kontext, b).status == "gesendet"
+
+
+# -----------------------------
+# Dead-Letter und "erneut senden"
+# -----------------------------
+
+@pytest.fixture
+def aufgegeben(shop, buchbutler, kontext, monkeypatch):
+    monkeypatch.setattr(shop, "BESTELLAUSGANG_MAX_VERSUCHE", 2)
+    b = bestellung_anlegen(kontext)
+    buchbutler.fehler = RuntimeError("Buchbutler weg")
+
+    shop.bestellausgang_abarbeiten()
+    wieder_faellig(kontext, b)
+    shop.bestellausgang_abarbeiten()
+
+    buchbutler.fehler = None
+    buchbutler.bestellungen.clear()
+    buchbutler.abfragen.clear()
+    return b
+
+
+def test_nach_max_versuchen_tot(shop, buchbutler, kontext, aufgegeben):
+    eintrag = ausgang(kontext, aufgegeben)
+    assert (eintrag.status, eintrag.versuche) == ("tot", 2)
+    assert eintrag.bestellung.moluna_status == "Übermittlung fehlgeschlagen"
+
+    wieder_faellig(kontext, aufgegeben)
+    shop.bestellausgang_abarbeiten()
+    assert buchbutler.bestellungen == []
+
+
+def test_erneut_senden_nur_als_admin(shop, client, kontext, aufgegeben):
+    antwort = client.post(f"/admin/bestellungen/{aufgegeben.id}/erneut-senden")
+
+    assert antwort.status_code == 302
+    assert "/ibk-control-8471" in antwort.headers["Location"]
+    assert ausgang(kontext, aufgegeben).status == "tot"
+
+
+def test_erneut_senden_fragt_vorher_nach(shop, buchbutler, admin, kontext, aufgegeben):
+    antwort = admin.post(f"/admin/bestellungen/{aufgegeben.id}/erneut-senden")
+
+    assert antwort.status_code == 302
+    eintrag = ausgang(kontext, aufgegeben)
+    assert (eintrag.status, eintrag.versuche) == ("offen", 0)
+
+    shop.bestellausgang_abarbeiten()
+
+    # letzter_fehler steht noch → erst ORDERRESPONSE, dann ORDER
+    assert buchbutler.abfragen == [aufgegeben.collectkey]
+    assert len(buchbutler.bestellungen) == 1
+    eintrag = ausgang(kontext, aufgegeben)
+    assert (eintrag.status, eintrag.letzter_fehler) == ("gesendet", None)
+
+
+def test_erneut_senden_schon_angekommen(shop, buchbutler, admin, kontext, aufgegeben):
+    buchbutler.antworten[aufgegeben.collectkey] = {"response": {"status": "versendet"}}
+
+    admin.post(f"/admin/bestellungen/{aufgegeben.id}/erneut-senden")
+    shop.bestellausgang_abarbeiten()
+
+    assert buchbutler.bestellungen == []
+    assert ausgang(kontext, aufgegeben).status == "gesendet"
@@ -0,0 +1,105 @@
+import uuid
+from datetime import datetime, timedelta
+
+from models import Bestellung, BestellAusgang
+
+
+def bestellung_anlegen(session, ausgang=None, **felder):
+    felder.setdefault("collectkey", str(uuid.uuid4()))
+    b = Bestellung(email="kunde@example.org", **felder)
+    session.add(b)
+    session.flush()
+    if ausgang:
+        session.add(BestellAusgang(bestellung_id=b.id, status=ausgang))
+    session.commit()
+    return b
+
+
+def neu_lesen(session, bestellung):
+    session.expire_all()
+    return session.get(Bestellung, bestellung.id)
+
+
+def wieder_faellig(session, bestellung):
+    neu_lesen(session, bestellung).naechste_pruefung_am = datetime.utcnow() - timedelta(seconds=1)
+    session.commit()
+
+
+# -----------------------------
+# Auswahl
+# -----------------------------
+
+def test_nur_bei_buchbutler_angekommene(shop, buchbutler, kontext):
+    gesendet = bestellung_anlegen(kontext, ausgang="gesendet")
+    alt = bestellung_anlegen(kontext, moluna_order_id="HASH-alt")      # vor der Outbox
+    bestellung_anlegen(kontext, ausgang="offen")
+    bestellung_anlegen(kontext, ausgang="tot")
+    bestellung_anlegen(kontext, moluna_order_id="HASH-fertig", moluna_status="Versendet")
+    bestellung_anlegen(kontext, moluna_order_id="HASH-ohne", collectkey=None)
+
+    shop.bestellstatus_pruefen()
+
+    assert sorted(buchbutler.abfragen) == sorted([gesendet.collectkey, alt.collectkey])
+
+
+def test_reservierte_werden_nicht_doppelt_abgefragt(shop, buchbutler, kontext):
+    b = bestellung_anlegen(kontext, ausgang="gesendet")
+    buchbutler.antworten[b.collectkey] = {"response": {"status": "in Bearbeitung"}}
+
+    shop.bestellstatus_pruefen()
+    shop.bestellstatus_pruefen()
+
+    assert buchbutler.abfragen == [b.collectkey]
+
+
+# -----------------------------
+# Antwort und Backoff
+# -----------------------------
+
+def test_antwort_wird_uebernommen(shop, buchbutler, kontext):
+    b = bestellung_anlegen(kontext, ausgang="gesendet", pruef_fehler=2)
+    buchbutler.antworten[b.collectkey] = {"response": {
+        "status": "versendet",
+        "lieferungen": [
+            {"trackingnummer": "T1", "logistiker": "DHL", "logistik_produkt": "Paket", "ean": "9783000000011"},
+            {"trackingnummer": "T2", "logistiker": "DPD"},
+        ],
+    }}
+
+    shop.bestellstatus_pruefen()
+
+    b = neu_lesen(kontext, b)
+    assert (b.moluna_status, b.pruef_fehler) == ("versendet", 0)
+    assert (b.trackingnummer, b.logistiker, b.paketart) == ("T1, T2", "DHL, DPD", "Paket")
+
+    # Endstatus → nie wieder abgefragt
+    wieder_faellig(kontext, b)
+    shop.bestellstatus_pruefen()
+    assert buchbutler.abfragen == [b.collectkey]
+
+
+def test_keine_antwort_mit_backoff(shop, buchbutler, kontext):
+    b = bestellung_anlegen(kontext, ausgang="gesendet")
+    intervall = shop.BESTELLSTATUS_INTERVALL
+
+    shop.bestellstatus_pruefen()
+
+    b = neu_lesen(kontext, b)
+    assert (b.moluna_status, b.pruef_fehler) == ("keine Antwort", 1)
+    assert intervall * 2 - timedelta(seconds=10) < b.naechste_pruefung_am - datetime.utcnow() <= intervall * 2
+
+    wieder_faellig(kontext, b)
+    shop.bestellstatus_pruefen()
+
+    b = neu_lesen(kontext, b)
+    assert b.pruef_fehler == 2
+    assert intervall * 4 - timedelta(seconds=10) < b.naechste_pruefung_am - datetime.utcnow() <= intervall * 4
+
+
+def test_backoff_begrenzt(shop, buchbutler, kontext):
+    b = bestellung_anlegen(kontext, ausgang="gesendet", pruef_fehler=10)
+
+    shop.bestellstatus_pruefen()
+
+    b = neu_lesen(kontext, b)
+    assert b.naechste_pruefung_am - datetime.utcnow() <= shop.BESTELLSTATUS_MAX_BACKOFF
@@ -0,0 +1,59 @@
+import pytest
+
+from buchbutler_sync import SyncEngine, SyncErgebnis, delta, sync_felder
+from models import SyncLauf
+
+
+def test_sync_felder():
+    ergebnis = SyncErgebnis(
+        ean="1",
+        content={"name": "Die Brücke", "autor": "Anna Fluss", "verlag": "egal"},
+        movement={"preis": 15.0, "bestand": 4, "handling_zeit": 2},
+        fehler=None,
+    )
+
+    assert sync_felder(ergebnis) == {
+        "name": "Die Brücke", "autor": "Anna Fluss", "preis": 15.0, "lagerbestand": 4,
+    }
+    assert sync_felder(ergebnis._replace(content=None, movement=None)) == {}
+
+
+def test_delta_nur_geaenderte_und_keine_none():
+    alt = {"name": "A", "preis": 10.0, "autor": "X"}
+
+    assert delta(alt, {"name": "A", "preis": 12.0, "autor": None}) == {"preis": 12.0}
+
+
+def test_engine_meldet_fehler_pro_ean():
+    def content(ean):
+        if ean == "kaputt":
+            raise RuntimeError("Upstream weg")
+        return {"name": ean}
+
+    engine = SyncEngine(content, lambda ean: {"preis": 1.0}, max_workers=2, pro_sekunde=0)
+    ergebnisse = {e.ean: e for e in engine.laden(["gut", "kaputt"])}
+
+    assert ergebnisse["gut"].fehler is None
+    assert ergebnisse["kaputt"].fehler == ["content"]
+    assert ergebnisse["kaputt"].movement == {"preis": 1.0}
+
+
+def test_admin_sync_schreibt_dieselben_felder(shop, katalog, monkeypatch):
+    monkeypatch.setattr(shop, "content_abrufen", lambda ean: {"name": f"Titel {ean[-2:]}", "autor": "A"})
+    monkeypatch.setattr(shop, "bestand_abrufen", lambda ean: {"preis": 9.0, "bestand": 7})
+
+    with shop.app.app_context():
+        lauf = SyncLauf()
+        shop.db.session.add(lauf)
+        shop.db.session.commit()
+
+        shop.katalog_sync(lauf.id)
+
+        lauf = shop.db.session.get(SyncLauf, lauf.id)
+        assert (lauf.status, lauf.erledigt, lauf.geaendert) == ("fertig", 3, 3)
+
+    produkt = katalog.nach_ean("9783000000011")
+    assert (produkt["name"], produkt["preis"], produkt["lagerbestand"]) == ("Titel 11", 9.0, 7)
+
+    # Auch im Journal (für die anderen Worker)
+    assert katalog.speicher.journal()[1]["lagerbestand"] == 7
@@ -0,0 +1,170 @@
+import threading
+import time
+
+import pytest
+
+import cache
+from cache import KurzzeitCache, SqliteCache
+
+
+@pytest.fixture
+def uhr(monkeypatch):
+    """Steuerbare Zeit für time.monotonic() in cache.py"""
+    jetzt = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: jetzt[0])
+    return jetzt
+
+
+def test_single_flight_ein_upstream_call():
+    c = KurzzeitCache(ttl=60)
+    freigabe = threading.Event()
+    aufrufe = []
+
+    def laden(schluessel):
+        aufrufe.append(schluessel)
+        freigabe.wait(5)
+        return {"preis": 9.5}
+
+    ergebnisse = []
+    threads = [
+        threading.Thread(target=lambda: ergebnisse.append(c.holen("ean", laden)))
+        for _ in range(8)
+    ]
+    for t in threads:
+        t.start()
+
+    # Warten, bis alle außer dem ersten am laufenden Flug hängen
+    frist = time.monotonic() + 5
+    while c.statistik_kopie()["gebuendelt"] < 7 and time.monotonic() < frist:
+        time.sleep(0.01)
+
+    freigabe.set()
+    for t in threads:
+        t.join(5)
+
+    assert aufrufe == ["ean"]
+    assert ergebnisse == [{"preis": 9.5}] * 8
+    assert c.statistik_kopie()["verfehlt"] == 1
+    assert c.statistik_kopie()["gebuendelt"] == 7
+
+
+def test_treffer_liefert_kopie():
+    c = KurzzeitCache(ttl=60)
+    c.holen("a", lambda s: {"bestand": 3})
+
+    wert = c.holen("a", lambda s: pytest.fail("darf nicht nachladen"))
+    wert["bestand"] = 0
+
+    assert c.ansehen("a") == {"bestand": 3}
+    assert c.statistik_kopie()["treffer"] == 1
+
+
+def test_none_und_fehler_werden_nicht_gecacht():
+    c = KurzzeitCache(ttl=60)
+
+    assert c.holen("a", lambda s: None) is None
+
+    def kaputt(schluessel):
+        raise RuntimeError("Upstream weg")
+
+    with pytest.raises(RuntimeError):
+        c.holen("a", kaputt)
+
+    assert c.ansehen("a") is None
+    assert c.holen("a", lambda s: 1) == 1
+
+
+def test_ttl_abgelaufen(uhr):
+    c = KurzzeitCache(ttl=60)
+    c.holen("a", lambda s: 1)
+
+    uhr[0] += 59
+    assert c.ansehen("a") == 1
+
+    uhr[0] += 1
+    assert c.ansehen("a") is None
+    assert c.holen("a", lambda s: 2) == 2
+
+
+def test_lru_grenze():
+    c = KurzzeitCache(ttl=60, max_eintraege=2)
+    c.holen("a", lambda s: 1)
+    c.holen("b", lambda s: 2)
+
+    # "a" zuletzt gelesen → "b" wird verdrängt
+    c.holen("a", lambda s: pytest.fail("darf nicht nachladen"))
+    c.holen("c", lambda s: 3)
+
+    assert c.ansehen("a") == 1
+    assert c.ansehen("b") is None
+    assert c.ansehen("c") == 3
+    assert c.statistik_kopie()["eintraege"] == 2
+    assert c.statistik_kopie()["verdraengt"] == 1
+
+
+def test_abgelaufene_zuerst_entfernt(uhr):
+    c = KurzzeitCache(ttl=60, max_eintraege=2)
+    c.holen("alt", lambda s: 1)
+    uhr[0] += 30
+    c.holen("frisch", lambda s: 2)
+    c.ansehen("alt")
+
+    # "alt" ist zwar zuletzt gelesen, aber abgelaufen
+    uhr[0] += 40
+    c.holen("neu", lambda s: 3)
+
+    assert c.ansehen("frisch") == 2
+    assert c.ansehen("neu") == 3
+    assert c.statistik_kopie()["verdraengt"] == 0
+
+
+def test_abgelaufene_vorne_ohne_volle_suche(uhr):
+    c = KurzzeitCache(ttl=60, max_eintraege=3)
+    c.holen("a", lambda s: 1)
+    c.holen("b", lambda s: 2)
+    uhr[0] += 30
+    c.holen("c", lambda s: 3)
+    uhr[0] += 30
+    c.holen("d", lambda s: 4)           # räumt a und b ab
+    uhr[0] += 5
+    c.holen("e", lambda s: 5)
+
+    # c ist abgelaufen und liegt vorne – kein LRU-Opfer nötig
+    uhr[0] += 30
+    c.holen("f", lambda s: 6)
+
+    assert c.ansehen("c") is None
+    assert [c.ansehen(k) for k in "def"] == [4, 5, 6]
+    assert c.statistik_kopie()["verdraengt"] == 0
+
+
+# -----------------------------
+# SqliteCache (geteilt zwischen Workern)
+# -----------------------------
+
+def test_aufwaermen_nur_ein_worker(tmp_path):
+    pfad = str(tmp_path / "cache.sqlite3")
+    worker_a = SqliteCache(pfad, ttl=60)
+    worker_b = SqliteCache(pfad, ttl=60)
+
+    assert worker_a.beanspruchen("aufwaermen", 3600) is True
+    assert worker_b.beanspruchen("aufwaermen", 3600) is False
+    assert worker_a.beanspruchen("aufwaermen", 3600) is False
+
+    # Intervall abgelaufen → der nächste darf wieder
+    assert worker_b.beanspruchen("aufwaermen", 0) is True
+
+
+def test_aufwaermen_laedt_nur_fehlende(tmp_path):
+    pfad = str(tmp_path / "cache.sqlite3")
+    SqliteCache(pfad, ttl=60).schreiben("1", {"name": "schon da"})
+    geladen = []
+
+    def laden(ean):
+        geladen.append(ean)
+        return {"name": ean}
+
+    cache = SqliteCache(pfad, ttl=60)
+    assert cache.aufwaermen(["1", "2", "3"], laden) == 2
+    assert sorted(geladen) == ["2", "3"]
+    assert cache.lesen("3")[0] == {"name": "3"}
@@ -0,0 +1,63 @@
+import threading
+import time
+
+from hintergrund import UpstreamPool
+
+
+def abgeschlossen(pool):
+    """Wartet, bis die Done-Callbacks die Plätze freigegeben haben"""
+    frist = time.monotonic() + 5
+    while pool.statistik_kopie()["laufend"] and time.monotonic() < frist:
+        time.sleep(0.01)
+
+
+def test_gleicher_schluessel_teilt_future():
+    pool = UpstreamPool(max_threads=2, max_wartend=0)
+    freigabe = threading.Event()
+    aufrufe = []
+
+    def laden(ean):
+        aufrufe.append(ean)
+        freigabe.wait(5)
+        return {"ean": ean}
+
+    erste = pool.submit(("MOVEMENT", "1"), laden, "1")
+    zweite = pool.submit(("MOVEMENT", "1"), laden, "1")
+    freigabe.set()
+
+    assert erste is zweite
+    assert erste.result(5) == {"ean": "1"}
+    assert aufrufe == ["1"]
+    assert pool.statistik_kopie()["geteilt"] == 1
+
+
+def test_voller_pool_lehnt_ab():
+    pool = UpstreamPool(max_threads=1, max_wartend=1)
+    freigabe = threading.Event()
+
+    laufend = pool.submit("a", freigabe.wait, 5)
+    wartend = pool.submit("b", freigabe.wait, 5)
+
+    assert pool.submit("c", freigabe.wait, 5) is None
+    assert pool.statistik_kopie()["abgelehnt"] == 1
+
+    freigabe.set()
+    laufend.result(5)
+    wartend.result(5)
+    abgeschlossen(pool)
+
+    # Plätze sind nach Abschluss wieder frei
+    assert pool.submit("c", lambda: 1).result(5) == 1
+
+
+def test_fehler_gibt_platz_frei():
+    pool = UpstreamPool(max_threads=1, max_wartend=0)
+
+    def kaputt():
+        raise RuntimeError("Upstream weg")
+
+    future = pool.submit("a", kaputt)
+    assert isinstance(future.exception(5), RuntimeError)
+    abgeschlossen(pool)
+
+    assert pool.submit("a", lambda: 2).result(5) == 2
@@ -0,0 +1,122 @@
+import json
+
+import pytest
+
+import import_produkte
+from app import app, db
+from import_produkte import importieren, produkte_streamen
+from katalog import slugify
+from models import Produkt
+
+
+PRODUKTE = [
+    {"id": 1, "ean": "9783000000011", "name": "Die Brücke", "autor": "Anna Fluss",
+     "preis": 15.0, "kategorie": "Kinderbuch", "bilder": ["images/bruecke.jpg"]},
+    {"id": 2, "ean": "9783000000028", "name": "Jacominus", "autor": "Rebecca Dautremer",
+     "preis": 24.0, "beschreibung": "Text mit ] und , und \"Zitat\""},
+    {"id": 3, "ean": 9783000000035, "name": "Am Fluss", "preis": 12.5,
+     "bilder": ["https://example.org/fluss.jpg"]},
+    {"id": 4, "name": "Ohne EAN"},
+]
+
+
+@pytest.fixture
+def datei(tmp_path):
+    pfad = tmp_path / "produkte.json"
+    pfad.write_text(json.dumps(PRODUKTE, ensure_ascii=False, indent=2), encoding="utf-8")
+    return str(pfad)
+
+
+@pytest.fixture
+def kontext(monkeypatch):
+    # Kleine Chunks, damit mehrere Upsert-Runden durchlaufen
+    monkeypatch.setattr(import_produkte, "CHUNK", 2)
+
+    with app.app_context():
+        db.session.query(Produkt).delete()
+        db.session.commit()
+        yield
+        db.session.rollback()
+
+
+# -----------------------------
+# Streaming-Parser
+# -----------------------------
+
+def test_streamen_ueber_blockgrenzen(datei):
+    assert list(produkte_streamen(datei, blockgroesse=7)) == PRODUKTE
+
+
+def test_streamen_leeres_array(tmp_path):
+    pfad = tmp_path / "leer.json"
+    pfad.write_text(" [ ] ", encoding="utf-8")
+
+    assert list(produkte_streamen(str(pfad))) == []
+
+
+def test_streamen_nur_arrays(tmp_path):
+    pfad = tmp_path / "objekt.json"
+    pfad.write_text('{"ean": "1"}', encoding="utf-8")
+
+    with pytest.raises(ValueError):
+        list(produkte_streamen(str(pfad)))
+
+
+def test_streamen_abgeschnittene_datei(tmp_path):
+    pfad = tmp_path / "kaputt.json"
+    pfad.write_text('[{"ean": "1"}, {"ean": ', encoding="utf-8")
+
+    with pytest.raises(ValueError):
+        list(produkte_streamen(str(pfad), blockgroesse=4))
+
+
+# -----------------------------
+# Upsert
+# -----------------------------
+
+def test_import_legt_produkte_an(datei, kontext):
+    assert importieren(datei) == [3, 0, 0]
+
+    produkte = {p.ean: p for p in Produkt.query.all()}
+    assert sorted(produkte) == ["9783000000011", "9783000000028", "9783000000035"]
+    assert produkte["9783000000011"].slug == slugify("Die Brücke")
+    assert produkte["9783000000011"].bild_url == "/static/images/bruecke.jpg"
+    assert produkte["9783000000035"].bild_url == "https://example.org/fluss.jpg"
+
+
+def test_erneuter_import_ist_idempotent(datei, kontext):
+    importieren(datei)
+    vorher = {p.ean: p.zuletzt_aktualisiert for p in Produkt.query.all()}
+
+    assert importieren(datei) == [0, 0, 3]
+
+    nachher = {p.ean: p.zuletzt_aktualisiert for p in Produkt.query.all()}
+    assert nachher == vorher
+
+
+def test_import_aktualisiert_nur_geaenderte(datei, kontext):
+    importieren(datei)
+
+    geaendert = [dict(p) for p in PRODUKTE]
+    geaendert[1]["preis"] = 19.0
+    with open(datei, "w", encoding="utf-8") as f:
+        json.dump(geaendert, f)
+
+    assert importieren(datei) == [0, 1, 2]
+    assert Produkt.query.filter_by(ean="9783000000028").one().preis == 19.0
+    assert Produkt.query.count() == 3
+
+
+def test_slug_kollision_bekommt_ean(tmp_path, kontext):
+    pfad = tmp_path / "produkte.json"
+    pfad.write_text(json.dumps([
+        {"ean": "111", "name": "Gleicher Titel"},
+        {"ean": "222", "name": "Gleicher Titel"},
+    ]), encoding="utf-8")
+
+    assert importieren(str(pfad)) == [2, 0, 0]
+    assert importieren(str(pfad)) == [0, 0, 2]
+    assert {p.ean: p.slug for p in Produkt.query.all()} == {
+        "111": "gleicher-titel",
+        "222": "gleicher-titel-222",
+    }
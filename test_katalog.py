@@ -0,0 +1,176 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+import katalog as katalog_modul
+from katalog import Katalog, KatalogSpeicher
+
+
+PRODUKTE = [
+    {"id": 1, "ean": "9783000000011", "name": "Die Brücke", "kategorie": "Kinderbuch"},
+    {"id": 2, "ean": "9783000000028", "name": "Jacominus", "kategorie": "Bilderbuch"},
+    {"id": 3, "ean": "9783000000035", "name": "Am Fluss", "kategorie": "Roman"},
+]
+
+
+@pytest.fixture
+def pfad(tmp_path):
+    pfad = tmp_path / "produkte.json"
+    pfad.write_text(json.dumps(PRODUKTE, ensure_ascii=False), encoding="utf-8")
+    return str(pfad)
+
+
+def warten_bis(bedingung):
+    frist = time.monotonic() + 5
+    while not bedingung() and time.monotonic() < frist:
+        time.sleep(0.01)
+    return bedingung()
+
+
+# -----------------------------
+# Lookups und Änderungen
+# -----------------------------
+
+def test_lookups(pfad):
+    katalog = Katalog.laden(pfad)
+
+    assert katalog.nach_id(2)["name"] == "Jacominus"
+    assert katalog.nach_ean(9783000000035)["id"] == 3
+    assert katalog.nach_slug("jacominus")["id"] == 2
+    assert [p["id"] for p in katalog.kategorie("Roman")] == [3]
+
+    with pytest.raises(TypeError):
+        katalog.nach_id(1)["name"] = "schreibgeschützt"
+
+
+def test_aenderung_baut_nur_betroffene_neu(pfad):
+    katalog = Katalog.laden(pfad)
+    vorher = katalog.index
+
+    katalog.aktualisieren(3, name="Am großen Fluss")
+
+    assert katalog.nach_slug("am-großen-fluss")["id"] == 3
+    assert katalog.nach_slug("am-fluss") is None
+    assert katalog.suchindex.suche("großen").produkte[0]["id"] == 3
+    assert katalog.version != vorher.version
+    # Unveränderte Produkte sind dieselben Objekte
+    assert katalog.nach_id(1) is vorher.nach_id[1]
+    assert katalog.index.pruefsummen[0] == vorher.pruefsummen[0]
+
+
+def test_version_wie_frisch_geladen(pfad):
+    katalog = Katalog.laden(pfad)
+    katalog.speichern({2: {"preis": 24.0}})
+
+    assert katalog.version == Katalog.laden(pfad).version
+    assert katalog.version == Katalog([dict(p, preis=24.0) if p["id"] == 2 else p for p in PRODUKTE]).version
+
+
+# -----------------------------
+# Journal und Snapshot
+# -----------------------------
+
+def test_speichern_haengt_an_journal(pfad):
+    katalog = Katalog.laden(pfad)
+    katalog.speichern({1: {"preis": 15.0}, 3: {"preis": 9.5}})
+    katalog.speichern({1: {"preis": 16.0}})
+
+    with open(pfad + ".journal", encoding="utf-8") as f:
+        assert len(f.readlines()) == 3
+
+    # Snapshot unverändert, Journal gewinnt beim Lesen
+    with open(pfad, encoding="utf-8") as f:
+        assert "preis" not in json.load(f)[0]
+    assert KatalogSpeicher(pfad).journal() == {1: {"preis": 16.0}, 3: {"preis": 9.5}}
+    assert Katalog.laden(pfad).nach_id(1)["preis"] == 16.0
+
+
+def test_kompaktieren_schreibt_snapshot(pfad, monkeypatch):
+    monkeypatch.setattr(katalog_modul, "KOMPAKTIEREN_AB", 3)
+    katalog = Katalog.laden(pfad)
+    anderer = Katalog.laden(pfad)
+
+    katalog.speichern({1: {"preis": 1.0}})
+    katalog.speichern({2: {"preis": 2.0}})
+    assert os.path.exists(pfad + ".journal")
+
+    katalog.speichern({3: {"preis": 3.0}})
+
+    assert not os.path.exists(pfad + ".journal")
+    with open(pfad, encoding="utf-8") as f:
+        assert [p.get("preis") for p in json.load(f)] == [1.0, 2.0, 3.0]
+
+    # Anderer Worker: neuer Snapshot → komplett neu laden
+    assert anderer.nachladen() is True
+    assert [p.get("preis") for p in anderer] == [1.0, 2.0, 3.0]
+    assert anderer.version == katalog.version
+
+
+def test_halbe_journal_zeile_wird_uebersprungen(pfad):
+    katalog = Katalog.laden(pfad)
+    katalog.speichern({1: {"preis": 15.0}})
+
+    # Absturz mitten im Schreiben eines anderen Workers
+    with open(pfad + ".journal", "a", encoding="utf-8") as f:
+        f.write('{"id": 2, "felder": {"pre')
+
+    assert Katalog.laden(pfad).nach_id(2).get("preis") is None
+
+    katalog.speichern({3: {"preis": 9.5}})
+    assert KatalogSpeicher(pfad).journal() == {1: {"preis": 15.0}, 3: {"preis": 9.5}}
+
+
+# -----------------------------
+# Andere Worker
+# -----------------------------
+
+def test_zwei_worker_sehen_gegenseitige_aenderungen(pfad):
+    a = Katalog.laden(pfad)
+    b = Katalog.laden(pfad)
+
+    a.speichern({1: {"preis": 15.0}})
+    b.speichern({2: {"preis": 24.0}})
+
+    # b hat beim Schreiben die Änderung von a mitgenommen
+    assert b.nach_id(1)["preis"] == 15.0
+
+    assert a.nachladen() is True
+    assert a.nach_id(2)["preis"] == 24.0
+    assert a.version == b.version
+    assert a.nachladen() is False
+
+
+def test_neu_laden_im_hintergrund(pfad, monkeypatch):
+    monkeypatch.setattr(Katalog, "PRUEF_INTERVALL", 0)
+    a = Katalog.laden(pfad)
+    b = Katalog.laden(pfad)
+
+    assert a.neu_laden_falls_geaendert() is False
+
+    b.speichern({3: {"name": "Am Meer"}})
+
+    assert a.neu_laden_falls_geaendert() is True
+    assert warten_bis(lambda: a.nach_slug("am-meer") is not None)
+    assert a.version == b.version
+
+
+def test_nachladen_aus_anderem_prozess(pfad):
+    katalog = Katalog.laden(pfad)
+
+    skript = (
+        "import sys; from katalog import Katalog; "
+        "Katalog.laden(sys.argv[1]).speichern({1: {'preis': 12.5}})"
+    )
+    subprocess.run(
+        [sys.executable, "-c", skript, pfad],
+        check=True,
+        cwd=os.path.dirname(os.path.abspath(katalog_modul.__file__)),
+    )
+
+    assert katalog.nachladen() is True
+    assert katalog.nach_id(1)["preis"] == 12.5
+    assert katalog.version == Katalog.laden(pfad).version
@@ -0,0 +1,79 @@
+import os
+
+import pytest
+
+from assets import AssetManifest, datei_hash
+from leseproben import LESEPROBEN_ORDNER
+
+
+PDF = b"%PDF-1.4\n" + b"0123456789" * 100 + b"\n%%EOF\n"
+
+
+@pytest.fixture
+def leseproben(shop, tmp_path, monkeypatch):
+    """static/ in tmp_path mit einer Leseprobe"""
+    static = tmp_path / "static"
+    (static / LESEPROBEN_ORDNER).mkdir(parents=True)
+    (static / LESEPROBEN_ORDNER / "bruecke.pdf").write_bytes(PDF)
+    (static / LESEPROBEN_ORDNER / "notiz.txt").write_bytes(b"intern")
+
+    monkeypatch.setattr(shop.app, "static_folder", str(static))
+    monkeypatch.setattr(shop, "asset_manifest", AssetManifest(str(static)))
+    return static / LESEPROBEN_ORDNER
+
+
+def test_pdf_mit_etag_und_caching(shop, client, leseproben):
+    antwort = client.get("/leseprobe/bruecke.pdf")
+
+    assert antwort.status_code == 200
+    assert antwort.data == PDF
+    assert antwort.mimetype == "application/pdf"
+    assert antwort.headers["ETag"] == f'"{datei_hash(leseproben / "bruecke.pdf")}"'
+    assert antwort.headers["Accept-Ranges"] == "bytes"
+    assert f"max-age={shop.LESEPROBE_MAX_AGE}" in antwort.headers["Cache-Control"]
+    assert "Set-Cookie" not in antwort.headers
+
+
+def test_304_bei_gleichem_etag(client, leseproben):
+    etag = client.get("/leseprobe/bruecke.pdf").headers["ETag"]
+
+    antwort = client.get("/leseprobe/bruecke.pdf", headers={"If-None-Match": etag})
+
+    assert antwort.status_code == 304
+    assert antwort.data == b""
+
+
+def test_range_request(client, leseproben):
+    antwort = client.get("/leseprobe/bruecke.pdf", headers={"Range": "bytes=0-8"})
+
+    assert antwort.status_code == 206
+    assert antwort.data == b"%PDF-1.4\n"
+    assert antwort.headers["Content-Range"] == f"bytes 0-8/{len(PDF)}"
+
+
+def test_if_range_mit_altem_etag_liefert_alles(client, leseproben):
+    antwort = client.get(
+        "/leseprobe/bruecke.pdf",
+        headers={"Range": "bytes=0-8", "If-Range": '"veraltet"'}
+    )
+
+    assert antwort.status_code == 200
+    assert antwort.data == PDF
+
+
+def test_geaenderte_datei_neuer_etag(client, leseproben):
+    alt = client.get("/leseprobe/bruecke.pdf").headers["ETag"]
+
+    datei = leseproben / "bruecke.pdf"
+    datei.write_bytes(PDF + b"% Nachtrag\n")
+    os.utime(datei, ns=(1, 1))
+
+    antwort = client.get("/leseprobe/bruecke.pdf", headers={"If-None-Match": alt})
+
+    assert antwort.status_code == 200
+    assert antwort.headers["ETag"] != alt
+
+
+@pytest.mark.parametrize("pfad", ["fehlt.pdf", "notiz.txt", "../leseproben/notiz.txt", "../../app.py"])
+def test_nur_vorhandene_pdfs(client, leseproben, pfad):
+    assert client.get(f"/leseprobe/{pfad}").status_code == 404
@@ -0,0 +1,157 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import MailAuftrag
+
+
+@pytest.fixture
+def sendgrid(shop, monkeypatch):
+    """Zugestellte Mails; `fehler[empfaenger]` lässt die Zustellung scheitern"""
+    monkeypatch.setattr(shop, "mail_konfiguriert", lambda: True)
+    zugestellt = []
+    fehler = {}
+
+    def email_senden(subject, recipient, html, plain_text=None):
+        if recipient in fehler:
+            raise fehler[recipient]
+        zugestellt.append((recipient, subject))
+
+    monkeypatch.setattr(shop, "email_senden", email_senden)
+    shop.mail_wecker.clear()
+    return zugestellt, fehler
+
+
+def auftraege(session):
+    session.expire_all()
+    return MailAuftrag.query.order_by(MailAuftrag.id).all()
+
+
+def wieder_faellig(session):
+    for m in auftraege(session):
+        m.naechster_versuch_am = datetime.utcnow() - timedelta(seconds=1)
+    session.commit()
+
+
+# -----------------------------
+# Warteschlange
+# -----------------------------
+
+def test_einreihen_weckt_den_worker(shop, kontext, sendgrid):
+    zugestellt, _ = sendgrid
+
+    shop.send_email("Danke", "kunde@example.org", "<p>Danke</p>", "Danke")
+
+    assert shop.mail_wecker.is_set()
+    assert zugestellt == []
+    [m] = auftraege(kontext)
+    assert (m.empfaenger, m.status, m.text) == ("kunde@example.org", "offen", "Danke")
+
+
+def test_zustellung(shop, kontext, sendgrid):
+    zugestellt, _ = sendgrid
+    shop.send_email("A", "a@example.org", "<p>A</p>")
+    shop.send_email("B", "b@example.org", "<p>B</p>")
+
+    shop.mails_zustellen()
+
+    assert sorted(zugestellt) == [("a@example.org", "A"), ("b@example.org", "B")]
+    assert [(m.status, m.versuche) for m in auftraege(kontext)] == [("gesendet", 0), ("gesendet", 0)]
+
+    shop.mails_zustellen()
+    assert len(zugestellt) == 2
+
+
+def test_fehler_mit_backoff(shop, kontext, sendgrid):
+    zugestellt, fehler = sendgrid
+    fehler["kaputt@example.org"] = RuntimeError("SendGrid 503")
+    shop.send_email("A", "kaputt@example.org", "<p>A</p>")
+    shop.send_email("B", "b@example.org", "<p>B</p>")
+
+    shop.mails_zustellen()
+
+    kaputt, gut = auftraege(kontext)
+    assert gut.status == "gesendet"
+    assert (kaputt.status, kaputt.versuche, kaputt.letzter_fehler) == ("offen", 1, "SendGrid 503")
+    assert timedelta(seconds=50) < kaputt.naechster_versuch_am - datetime.utcnow() <= timedelta(minutes=1)
+
+    # Noch nicht fällig
+    shop.mails_zustellen()
+    assert auftraege(kontext)[0].versuche == 1
+
+    wieder_faellig(kontext)
+    shop.mails_zustellen()
+
+    kaputt = auftraege(kontext)[0]
+    assert kaputt.versuche == 2
+    assert timedelta(seconds=110) < kaputt.naechster_versuch_am - datetime.utcnow() <= timedelta(minutes=2)
+
+
+def test_ohne_meldung_klassenname_als_fehler(shop, kontext, sendgrid):
+    _, fehler = sendgrid
+    fehler["kaputt@example.org"] = TimeoutError()
+    shop.send_email("A", "kaputt@example.org", "<p>A</p>")
+
+    shop.mails_zustellen()
+
+    assert auftraege(kontext)[0].letzter_fehler == "TimeoutError"
+
+
+# -----------------------------
+# Aufgegeben und Admin-Ansicht
+# -----------------------------
+
+@pytest.fixture
+def aufgegeben(shop, kontext, sendgrid, monkeypatch):
+    monkeypatch.setattr(shop, "MAIL_MAX_VERSUCHE", 2)
+    _, fehler = sendgrid
+    fehler["kaputt@example.org"] = RuntimeError("SendGrid 503")
+    shop.send_email("Bestellbestätigung", "kaputt@example.org", "<p>A</p>")
+
+    shop.mails_zustellen()
+    wieder_faellig(kontext)
+    shop.mails_zustellen()
+
+    del fehler["kaputt@example.org"]
+    shop.mail_wecker.clear()
+    return auftraege(kontext)[0]
+
+
+def test_nach_max_versuchen_fehler(shop, kontext, sendgrid, aufgegeben):
+    zugestellt, _ = sendgrid
+    assert (aufgegeben.status, aufgegeben.versuche) == ("fehler", 2)
+
+    wieder_faellig(kontext)
+    shop.mails_zustellen()
+    assert zugestellt == []
+
+
+def test_admin_ansicht(shop, admin, kontext, sendgrid, aufgegeben):
+    shop.send_email("Noch offen", "b@example.org", "<p>B</p>")
+
+    text = admin.get("/admin/mails").get_data(as_text=True)
+
+    assert "Noch nicht zugestellt: 1" in text
+    assert "kaputt@example.org" in text
+    assert "SendGrid 503" in text
+    assert "b@example.org" not in text
+
+
+def test_admin_erneut_senden(shop, admin, kontext, sendgrid, aufgegeben):
+    zugestellt, _ = sendgrid
+
+    antwort = admin.post(f"/admin/mails/{aufgegeben.id}/erneut-senden")
+
+    assert antwort.status_code == 302
+    assert shop.mail_wecker.is_set()
+    m = auftraege(kontext)[0]
+    assert (m.status, m.versuche) == ("offen", 0)
+
+    shop.mails_zustellen()
+    assert zugestellt == [("kaputt@example.org", "Bestellbestätigung")]
+
+
+def test_nur_als_admin(client, kontext, sendgrid, aufgegeben):
+    assert client.get("/admin/mails").status_code == 403
+    assert client.post(f"/admin/mails/{aufgegeben.id}/erneut-senden").status_code == 403
+    assert auftraege(kontext)[0].status == "fehler"
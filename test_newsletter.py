@@ -0,0 +1,123 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import NewsletterSubscriber, NewsletterVersand
+
+
+class Absturz(BaseException):
+    """Worker stirbt mitten im Versand – wird vom Job nicht abgefangen"""
+
+
+@pytest.fixture
+def versand(shop, kontext, monkeypatch):
+    """Zwei Empfänger pro Batch; gesendete Adressen und geplante Störungen"""
+    monkeypatch.setattr(shop, "mail_konfiguriert", lambda: True)
+    monkeypatch.setattr(shop, "NEWSLETTER_BATCH", 2)
+    monkeypatch.setattr(shop, "NEWSLETTER_PAUSE", 0)
+    monkeypatch.setattr(shop, "im_hintergrund", lambda *args, **kwargs: None)
+
+    gesendet = []
+    stoerungen = {}       # Nummer des Batch-Aufrufs → Exception
+    aufrufe = []
+
+    def newsletter_batch_senden(subject, html, empfaenger):
+        aufrufe.append(subject)
+        stoerung = stoerungen.pop(len(aufrufe), None)
+        if stoerung:
+            raise stoerung
+        gesendet.append([email for email, _ in empfaenger])
+
+    monkeypatch.setattr(shop, "newsletter_batch_senden", newsletter_batch_senden)
+
+    for i in range(1, 6):
+        kontext.add(NewsletterSubscriber(email=f"leser{i}@example.org", confirmed=True))
+    kontext.add(NewsletterSubscriber(email="unbestaetigt@example.org", confirmed=False, token="t"))
+    kontext.add(NewsletterVersand(betreff="Neu im Laden", inhalt="<p>Hallo</p>",
+                                  abmelde_vorlage="https://example.org/abmelden/__TOKEN__"))
+    kontext.commit()
+
+    return gesendet, stoerungen
+
+
+def job(session):
+    session.expire_all()
+    return session.get(NewsletterVersand, 1)
+
+
+def alle(gesendet):
+    return [email for batch in gesendet for email in batch]
+
+
+def test_versand_in_batches(shop, kontext, versand):
+    gesendet, _ = versand
+
+    shop.newsletter_versand_abarbeiten()
+
+    assert gesendet == [
+        ["leser1@example.org", "leser2@example.org"],
+        ["leser3@example.org", "leser4@example.org"],
+        ["leser5@example.org"],
+    ]
+    j = job(kontext)
+    assert (j.status, j.gesamt, j.gesendet, j.gesperrt_bis) == ("fertig", 5, 5, None)
+
+
+def test_fortsetzen_nach_absturz(shop, kontext, versand):
+    gesendet, stoerungen = versand
+    stoerungen[2] = Absturz()
+
+    with pytest.raises(Absturz):
+        shop.newsletter_versand_abarbeiten()
+    kontext.rollback()
+
+    j = job(kontext)
+    assert (j.status, j.gesendet) == ("läuft", 2)
+    assert j.gesperrt_bis > datetime.utcnow()
+
+    # Solange die Sperre gilt, übernimmt kein anderer Worker
+    shop.newsletter_versand_abarbeiten()
+    assert len(gesendet) == 1
+
+    j.gesperrt_bis = datetime.utcnow() - timedelta(seconds=1)
+    kontext.commit()
+    shop.newsletter_versand_abarbeiten()
+
+    # Jeder Empfänger genau einmal, ab dem gespeicherten Cursor
+    assert alle(gesendet) == [f"leser{i}@example.org" for i in range(1, 6)]
+    j = job(kontext)
+    assert (j.status, j.gesendet) == ("fertig", 5)
+
+
+def test_fehlgeschlagener_batch_wird_wiederholt(shop, kontext, versand):
+    gesendet, stoerungen = versand
+    stoerungen[2] = RuntimeError("SendGrid 503")
+
+    shop.newsletter_versand_abarbeiten()
+
+    assert alle(gesendet) == [f"leser{i}@example.org" for i in range(1, 6)]
+    assert job(kontext).status == "fertig"
+
+
+def test_nach_fehlern_fortsetzen_durch_admin(shop, admin, kontext, versand):
+    gesendet, stoerungen = versand
+    for aufruf in (2, 3, 4):
+        stoerungen[aufruf] = RuntimeError("SendGrid 503")
+
+    shop.newsletter_versand_abarbeiten()
+
+    j = job(kontext)
+    assert (j.status, j.gesendet, j.meldung) == ("fehler", 2, "SendGrid 503")
+
+    antwort = admin.post("/admin/newsletter/versand/1/fortsetzen")
+    assert antwort.status_code == 302
+    assert job(kontext).status == "wartend"
+
+    shop.newsletter_versand_abarbeiten()
+
+    assert alle(gesendet) == [f"leser{i}@example.org" for i in range(1, 6)]
+    assert admin.get("/admin/newsletter/versand/1").json["status"] == "fertig"
+
+
+def test_fortsetzen_nur_als_admin(client, kontext, versand):
+    assert client.post("/admin/newsletter/versand/1/fortsetzen").status_code == 403
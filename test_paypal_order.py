@@ -0,0 +1,107 @@
+import pytest
+
+from cache import KurzzeitCache
+from models import Bestellung, BestellPosition
+
+
+EAN = "9783000000028"       # Jacominus, 24 € im Katalog
+
+
+@pytest.fixture
+def preise(shop, katalog, monkeypatch):
+    """MOVEMENT-Preise pro EAN; ohne Eintrag gilt der Katalogpreis"""
+    preise = {}
+    monkeypatch.setattr(shop, "lade_bestand_von_api", lambda ean: preise.get(ean))
+    monkeypatch.setattr(shop, "lade_produkt_von_api", lambda ean: None)
+    return preise
+
+
+def order_anlegen(client, menge=1):
+    client.post("/sync-cart", json=[{"ean": EAN, "quantity": menge}])
+    return client.post("/create-paypal-order")
+
+
+def request_id(order):
+    return order[1]["PayPal-Request-Id"]
+
+
+# -----------------------------
+# Offene Order und Request-Id
+# -----------------------------
+
+def test_gleicher_warenkorb_gleiche_order(client, preise, paypal_orders):
+    erste = order_anlegen(client)
+    zweite = order_anlegen(client)
+
+    assert erste.json == zweite.json == {"id": "ORDER-1"}
+    assert len(paypal_orders) == 1
+
+
+def test_geaenderter_warenkorb_neue_order_gleiche_nonce(client, preise, paypal_orders):
+    order_anlegen(client)
+    antwort = order_anlegen(client, menge=2)
+
+    assert antwort.json == {"id": "ORDER-2"}
+    assert paypal_orders[1][0]["purchase_units"][0]["amount"]["value"] == "48.00"
+
+    alt, neu = request_id(paypal_orders[0]), request_id(paypal_orders[1])
+    assert alt != neu
+    assert alt.rsplit("-", 1)[0] == neu.rsplit("-", 1)[0]
+
+
+def test_doppelklick_gleiche_request_id(client, preise, paypal_orders):
+    order_anlegen(client)
+    # Zweiter Request lief parallel los, bevor die erste Order in der Session stand
+    with client.session_transaction() as sitzung:
+        sitzung.pop("paypal_offen")
+
+    order_anlegen(client)
+
+    assert request_id(paypal_orders[0]) == request_id(paypal_orders[1])
+
+
+def test_andere_session_andere_request_id(shop, client, preise, paypal_orders):
+    order_anlegen(client)
+    order_anlegen(shop.app.test_client())
+
+    assert request_id(paypal_orders[0]) != request_id(paypal_orders[1])
+
+
+# -----------------------------
+# Capture
+# -----------------------------
+
+@pytest.fixture
+def erfassen(shop, monkeypatch):
+    monkeypatch.setattr(shop.paypal, "bestellung_erfassen", lambda order_id: {
+        "status": "COMPLETED",
+        "purchase_units": [{"payments": {"captures": [{"id": f"CAPTURE-{order_id}"}]}}],
+    })
+
+
+def test_capture_mit_bezahlten_preisen_und_neue_nonce(shop, client, preise, paypal_orders, erfassen, kontext,
+                                                     monkeypatch):
+    preise[EAN] = {"preis": 20.0}
+    order_anlegen(client)
+    with client.session_transaction() as sitzung:
+        sitzung["checkout_email"] = "kunde@example.org"
+
+    # Preis ändert sich zwischen Order und Capture
+    preise[EAN] = {"preis": 30.0}
+    monkeypatch.setattr(shop, "movement_cache", KurzzeitCache(ttl=60))
+
+    antwort = client.post("/capture-paypal-order/ORDER-1")
+
+    assert antwort.json == {"status": "success", "order_id": "ORDER-1"}
+    bestellung = Bestellung.query.filter_by(paypal_order_id="ORDER-1").one()
+    assert bestellung.paypal_capture_id == "CAPTURE-ORDER-1"
+    assert [p.preis for p in BestellPosition.query.filter_by(bestellung_id=bestellung.id)] == [20.0]
+    assert bestellung.ausgang.status == "offen"
+
+    # Nächster Kauf: neue Order mit neuer Request-Id
+    preise[EAN] = {"preis": 20.0}
+    monkeypatch.setattr(shop, "movement_cache", KurzzeitCache(ttl=60))
+    order_anlegen(client)
+
+    assert len(paypal_orders) == 2
+    assert request_id(paypal_orders[0]) != request_id(paypal_orders[1])
@@ -0,0 +1,147 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import Bestellung, PayPalEreignis
+
+
+def capture_ereignis(event_id="WH-1", order_id="ORDER-1"):
+    return {
+        "id": event_id,
+        "event_type": "PAYMENT.CAPTURE.COMPLETED",
+        "resource": {
+            "id": "CAPTURE-1",
+            "amount": {"value": "24.00"},
+            "supplementary_data": {"related_ids": {"order_id": order_id}},
+        },
+    }
+
+
+HEADER = {"PAYPAL-TRANSMISSION-ID": "T-1", "PAYPAL-TRANSMISSION-SIG": "sig"}
+
+
+@pytest.fixture
+def pruefungen(shop, monkeypatch):
+    """Signaturprüfung bei PayPal: Antworten der Reihe nach, Aufrufe werden gesammelt"""
+    aufrufe = []
+    antworten = []
+
+    def webhook_verifizieren(daten):
+        aufrufe.append(daten)
+        antwort = antworten.pop(0) if antworten else "SUCCESS"
+        if isinstance(antwort, Exception):
+            raise antwort
+        return {"verification_status": antwort}
+
+    monkeypatch.setattr(shop.paypal, "webhook_verifizieren", webhook_verifizieren)
+    return aufrufe, antworten
+
+
+def ereignisse(session):
+    session.expire_all()
+    return PayPalEreignis.query.order_by(PayPalEreignis.id).all()
+
+
+def wieder_faellig(session):
+    for ereignis in ereignisse(session):
+        ereignis.naechster_versuch_am = datetime.utcnow() - timedelta(seconds=1)
+    session.commit()
+
+
+# -----------------------------
+# Annahme
+# -----------------------------
+
+def test_annahme_ohne_pruefung(shop, client, kontext, pruefungen):
+    antwort = client.post("/paypal-webhook", json=capture_ereignis(), headers=HEADER)
+
+    assert antwort.status_code == 200
+    # Geprüft wird erst im Hintergrund
+    assert pruefungen[0] == []
+
+    [ereignis] = ereignisse(kontext)
+    assert (ereignis.event_id, ereignis.status) == ("WH-1", "offen")
+    assert json.loads(ereignis.headers)["PAYPAL-TRANSMISSION-ID"] == "T-1"
+
+
+def test_wiederholte_zustellung_nur_einmal(shop, client, kontext):
+    for _ in range(3):
+        assert client.post("/paypal-webhook", json=capture_ereignis()).status_code == 200
+
+    assert len(ereignisse(kontext)) == 1
+
+
+@pytest.mark.parametrize("body", ["kein json", "[]", "{}", '{"event_type": "X"}'])
+def test_kaputter_body(shop, client, kontext, body):
+    antwort = client.post("/paypal-webhook", data=body, content_type="application/json")
+
+    assert antwort.status_code == 400
+    assert ereignisse(kontext) == []
+
+
+# -----------------------------
+# Verarbeitung im Hintergrund
+# -----------------------------
+
+def test_capture_wird_der_bestellung_zugeordnet(shop, client, kontext, pruefungen):
+    kontext.add(Bestellung(email="kunde@example.org", paypal_order_id="ORDER-1"))
+    kontext.commit()
+    client.post("/paypal-webhook", json=capture_ereignis(), headers=HEADER)
+
+    shop.paypal_ereignisse_verarbeiten()
+
+    [ereignis] = ereignisse(kontext)
+    assert ereignis.status == "verarbeitet"
+    assert pruefungen[0][0]["transmission_id"] == "T-1"
+    assert pruefungen[0][0]["webhook_event"]["id"] == "WH-1"
+
+    bestellung = Bestellung.query.filter_by(paypal_order_id="ORDER-1").one()
+    assert bestellung.paypal_capture_id == "CAPTURE-1"
+    assert bestellung.bezahlt_am is not None
+
+    # Erledigt → kein zweiter Lauf
+    shop.paypal_ereignisse_verarbeiten()
+    assert len(pruefungen[0]) == 1
+
+
+def test_ungueltige_signatur(shop, client, kontext, pruefungen):
+    pruefungen[1].append("FAILURE")
+    client.post("/paypal-webhook", json=capture_ereignis())
+
+    shop.paypal_ereignisse_verarbeiten()
+
+    assert ereignisse(kontext)[0].status == "ungültig"
+
+
+def test_capture_ohne_order_id_uebersprungen(shop, client, kontext, pruefungen):
+    ereignis = capture_ereignis()
+    del ereignis["resource"]["supplementary_data"]
+    client.post("/paypal-webhook", json=ereignis)
+
+    shop.paypal_ereignisse_verarbeiten()
+
+    assert ereignisse(kontext)[0].status == "übersprungen"
+
+
+def test_fehler_mit_backoff_bis_aufgegeben(shop, client, kontext, pruefungen, monkeypatch):
+    monkeypatch.setattr(shop, "PAYPAL_WEBHOOK_MAX_VERSUCHE", 2)
+    pruefungen[1].extend([RuntimeError("PayPal weg"), RuntimeError("PayPal weg")])
+    client.post("/paypal-webhook", json=capture_ereignis())
+
+    shop.paypal_ereignisse_verarbeiten()
+
+    [ereignis] = ereignisse(kontext)
+    assert (ereignis.status, ereignis.versuche) == ("offen", 1)
+    assert "PayPal weg" in ereignis.letzter_fehler
+    assert ereignis.naechster_versuch_am > datetime.utcnow() + timedelta(seconds=110)
+
+    # Noch nicht fällig
+    shop.paypal_ereignisse_verarbeiten()
+    assert len(pruefungen[0]) == 1
+
+    wieder_faellig(kontext)
+    shop.paypal_ereignisse_verarbeiten()
+
+    [ereignis] = ereignisse(kontext)
+    assert (ereignis.status, ereignis.versuche) == ("fehler", 2)
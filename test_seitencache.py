@@ -0,0 +1,184 @@
+import pytest
+from flask import Flask, flash, render_template_string
+
+import seitencache
+from seitencache import SeitenCache, nicht_cachen
+
+
+@pytest.fixture
+def umgebung():
+    """Mini-App mit gecachten Views; `stand` steuert Version und Inhalt"""
+    app = Flask(__name__)
+    app.secret_key = "test"
+    app.testing = True
+    cache = SeitenCache(max_eintraege=3, max_bytes=250)
+    stand = {"version": 1, "renders": 0, "unvollstaendig": False}
+
+    seite = cache.seite(lambda: stand["version"])
+
+    @app.route("/seite/<int:nr>")
+    @seite
+    def seite_nr(nr):
+        stand["renders"] += 1
+        if stand["unvollstaendig"]:
+            nicht_cachen()
+        return f"Seite {nr} v{stand['version']}".ljust(100)
+
+    @app.route("/gross")
+    @seite
+    def gross():
+        stand["renders"] += 1
+        return "x" * 300
+
+    @app.route("/formular")
+    @seite
+    def formular():
+        return render_template_string("<input value='{{ csrf_token() }}'>", csrf_token=cache.csrf_token)
+
+    @app.route("/konto")
+    @cache.seite(lambda: 1, variation=lambda: "angemeldet", max_age=60)
+    def konto():
+        return "Konto"
+
+    @app.route("/kurz")
+    @cache.seite(lambda: 1, ttl=10)
+    def kurz():
+        stand["renders"] += 1
+        return "kurz"
+
+    @app.route("/meldung")
+    def meldung():
+        flash("Gespeichert")
+        return "ok"
+
+    return app.test_client(), cache, stand
+
+
+def test_zweiter_aufruf_aus_cache(umgebung):
+    client, cache, stand = umgebung
+
+    erste = client.get("/seite/1")
+    zweite = client.get("/seite/1")
+
+    assert erste.data == zweite.data
+    assert stand["renders"] == 1
+    assert cache.statistik_kopie()["treffer"] == 1
+    assert zweite.headers["Cache-Control"] == "no-cache"
+
+
+def test_etag_stabil_und_304(umgebung):
+    client, _, _ = umgebung
+
+    erste = client.get("/seite/1")
+    etag = erste.headers["ETag"]
+    assert etag == client.get("/seite/1").headers["ETag"]
+
+    antwort = client.get("/seite/1", headers={"If-None-Match": etag})
+    assert antwort.status_code == 304
+    assert antwort.data == b""
+
+    assert client.get("/seite/1", headers={"If-None-Match": '"anders"'}).status_code == 200
+
+
+def test_neue_version_rendert_neu(umgebung):
+    client, _, stand = umgebung
+
+    etag = client.get("/seite/1").headers["ETag"]
+    stand["version"] = 2
+    antwort = client.get("/seite/1", headers={"If-None-Match": etag})
+
+    assert antwort.status_code == 200
+    assert b"v2" in antwort.data
+    assert stand["renders"] == 2
+
+
+def test_lru_byte_grenze(umgebung):
+    client, cache, stand = umgebung
+
+    # 250 Bytes → nur zwei Seiten à 100 Bytes
+    client.get("/seite/1")
+    client.get("/seite/2")
+    client.get("/seite/1")          # 1 zuletzt gelesen
+    client.get("/seite/3")          # verdrängt 2
+
+    statistik = cache.statistik_kopie()
+    assert (statistik["eintraege"], statistik["bytes"], statistik["verdraengt"]) == (2, 200, 1)
+
+    renders = stand["renders"]
+    client.get("/seite/1")
+    client.get("/seite/3")
+    assert stand["renders"] == renders
+
+    client.get("/seite/2")
+    assert stand["renders"] == renders + 1
+
+
+def test_lru_eintrag_grenze(umgebung):
+    client, cache, _ = umgebung
+    cache.max_bytes = 10_000
+
+    for nr in range(5):
+        client.get(f"/seite/{nr}")
+
+    assert cache.statistik_kopie()["eintraege"] == 3
+    assert cache.statistik_kopie()["verdraengt"] == 2
+
+
+def test_zu_grosse_seite_nicht_gespeichert(umgebung):
+    client, cache, stand = umgebung
+
+    client.get("/gross")
+    client.get("/gross")
+
+    assert stand["renders"] == 2
+    assert cache.statistik_kopie()["eintraege"] == 0
+
+
+def test_ttl(umgebung, monkeypatch):
+    client, _, stand = umgebung
+    jetzt = [1000.0]
+    monkeypatch.setattr(seitencache.time, "monotonic", lambda: jetzt[0])
+
+    client.get("/kurz")
+    jetzt[0] += 9
+    client.get("/kurz")
+    assert stand["renders"] == 1
+
+    jetzt[0] += 1
+    client.get("/kurz")
+    assert stand["renders"] == 2
+
+
+def test_nicht_cachen(umgebung):
+    client, cache, stand = umgebung
+    stand["unvollstaendig"] = True
+
+    client.get("/seite/1")
+    client.get("/seite/1")
+
+    assert stand["renders"] == 2
+    assert cache.statistik_kopie()["eintraege"] == 0
+
+
+def test_variation_ist_privat(umgebung):
+    client, _, _ = umgebung
+
+    assert client.get("/konto").headers["Cache-Control"] == "private, max-age=60"
+
+
+def test_flash_umgeht_cache(umgebung):
+    client, cache, stand = umgebung
+    client.get("/seite/1")
+
+    client.get("/meldung")
+    client.get("/seite/1")
+
+    assert stand["renders"] == 2
+    assert cache.statistik_kopie()["umgangen"] == 1
+
+
+def test_kein_csrf_token_in_gecachter_seite(umgebung):
+    client, _, _ = umgebung
+
+    with pytest.raises(RuntimeError):
+        client.get("/formular")
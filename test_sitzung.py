@@ -0,0 +1,173 @@
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask, make_response, session
+
+from models import db, Sitzung
+from sitzung import DbSitzungInterface
+
+
+@pytest.fixture
+def umgebung():
+    """Mini-App mit DB-Sessions auf einer In-Memory-SQLite"""
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    app.config["SECRET_KEY"] = "test"
+    app.session_interface = DbSitzungInterface()
+    db.init_app(app)
+
+    @app.route("/lesen")
+    def lesen():
+        return {"warenkorb": session.get("warenkorb")}
+
+    @app.route("/legen/<wert>")
+    def legen(wert):
+        session["warenkorb"] = wert
+        return "ok"
+
+    @app.route("/nur-csrf")
+    def nur_csrf():
+        session["csrf_token"] = "abc"
+        return "ok"
+
+    @app.route("/behalten")
+    def behalten():
+        session["csrf_token"] = "abc"
+        session.behalten = True
+        return "ok"
+
+    @app.route("/anmelden")
+    def anmelden():
+        warenkorb = session.get("warenkorb")
+        session.clear()
+        session["warenkorb"] = warenkorb
+        session["admin"] = True
+        return "ok"
+
+    @app.route("/leeren")
+    def leeren():
+        session.clear()
+        return "ok"
+
+    @app.route("/oeffentlich")
+    def oeffentlich():
+        response = make_response("Katalog")
+        response.headers["Cache-Control"] = "public, max-age=600"
+        return response
+
+    @app.route("/oeffentlich/legen/<wert>")
+    def oeffentlich_legen(wert):
+        session["warenkorb"] = wert
+        response = make_response("Katalog")
+        response.headers["Cache-Control"] = "public, max-age=600"
+        return response
+
+    with app.app_context():
+        db.create_all()
+        yield app.test_client()
+        db.session.remove()
+        db.drop_all()
+
+
+def zeilen():
+    return {s.id: s for s in Sitzung.query.all()}
+
+
+def sitzungs_id(client):
+    cookie = client.get_cookie("session")
+    return cookie.value if cookie else None
+
+
+def test_ohne_inhalt_kein_cookie(umgebung):
+    antwort = umgebung.get("/lesen")
+
+    assert "Set-Cookie" not in antwort.headers
+    assert zeilen() == {}
+
+
+def test_nur_csrf_token_wird_nicht_gespeichert(umgebung):
+    antwort = umgebung.get("/nur-csrf")
+
+    assert "Set-Cookie" not in antwort.headers
+    assert zeilen() == {}
+
+
+def test_behalten_speichert_auch_nur_csrf(umgebung):
+    umgebung.get("/behalten")
+
+    assert list(zeilen()) == [sitzungs_id(umgebung)]
+
+
+def test_inhalt_in_der_db_cookie_nur_id(umgebung):
+    umgebung.get("/legen/abc")
+
+    sid = sitzungs_id(umgebung)
+    assert list(zeilen()) == [sid]
+    assert "abc" not in sid
+    assert umgebung.get("/lesen").json == {"warenkorb": "abc"}
+
+
+def test_clear_rotiert_die_id(umgebung):
+    umgebung.get("/legen/abc")
+    alt = sitzungs_id(umgebung)
+
+    umgebung.get("/anmelden")
+    neu = sitzungs_id(umgebung)
+
+    assert neu and neu != alt
+    assert list(zeilen()) == [neu]
+    assert umgebung.get("/lesen").json == {"warenkorb": "abc"}
+
+
+def test_leere_session_wird_geloescht(umgebung):
+    umgebung.get("/legen/abc")
+
+    antwort = umgebung.get("/leeren")
+
+    assert "session=;" in antwort.headers["Set-Cookie"]
+    assert zeilen() == {}
+
+
+def test_unbekannte_id_bekommt_neue(umgebung):
+    umgebung.set_cookie("session", "ausgedacht")
+
+    assert umgebung.get("/lesen").json == {"warenkorb": None}
+
+    umgebung.get("/legen/abc")
+    assert sitzungs_id(umgebung) != "ausgedacht"
+    assert list(zeilen()) == [sitzungs_id(umgebung)]
+
+
+def fast_abgelaufen():
+    """Ablauf aller Sessions in die zweite Hälfte der Laufzeit schieben"""
+    for sitzung in Sitzung.query.all():
+        sitzung.ablauf = datetime.utcnow() + timedelta(minutes=5)
+    db.session.commit()
+
+
+def test_gleitender_ablauf_frischt_auf(umgebung):
+    umgebung.get("/legen/abc")
+    fast_abgelaufen()
+
+    antwort = umgebung.get("/lesen")
+
+    assert "Set-Cookie" in antwort.headers
+    assert next(iter(zeilen().values())).ablauf > datetime.utcnow() + timedelta(days=1)
+
+
+def test_oeffentliche_antwort_ohne_set_cookie(umgebung):
+    umgebung.get("/legen/abc")
+    fast_abgelaufen()
+
+    antwort = umgebung.get("/oeffentlich")
+
+    assert "Set-Cookie" not in antwort.headers
+    assert antwort.headers["Cache-Control"] == "public, max-age=600"
+
+
+def test_geaenderte_session_macht_antwort_privat(umgebung):
+    antwort = umgebung.get("/oeffentlich/legen/abc")
+
+    assert "Set-Cookie" in antwort.headers
+    assert "public" not in antwort.headers["Cache-Control"]
+    assert "private" in antwort.headers["Cache-Control"]
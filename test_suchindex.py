@@ -0,0 +1,160 @@
+from suchindex import (
+    MAX_TIEFE, SuchIndex, Vorschlaege, falten, praefix_normalisieren, tokenisieren, umschreiben
+)
+
+
+PRODUKTE = [
+    {"id": 1, "slug": "die-brucke", "ean": "9783000000011", "name": "Die Brücke",
+     "autor": "Anna Fluss", "kategorie": "Kinderbuch", "beschreibung": "Zwei Ufer, ein Weg."},
+    {"id": 2, "slug": "jacominus", "ean": "9783000000028", "name": "Jacominus Gainsborough",
+     "autor": "Rebecca Dautremer", "kategorie": "Bilderbuch", "beschreibung": "Ein Leben."},
+    {"id": 3, "slug": "am-fluss", "ean": "9783000000035", "name": "Am Fluss",
+     "autor": "Bruno Berg", "kategorie": "Roman", "beschreibung": "Über eine alte Brücke im Nebel."},
+    {"id": 4, "slug": "wuetend", "ean": "9783000000042", "name": "Wütend",
+     "autor": "Jutta Bauer", "kategorie": "Bilderbuch", "beschreibung": "Gefühle."},
+]
+
+
+# -----------------------------
+# Normalisierung
+# -----------------------------
+
+def test_falten_umlaute_und_schreibweisen():
+    assert falten("Brücke") == falten("BRUCKE") == "brucke"
+    assert falten("Straße") == "strasse"
+
+
+def test_falten_laesst_ae_oe_ue_stehen():
+    assert falten("Poet") == "poet"
+    assert falten("Feuer") == "feuer"
+    assert falten("Bruecke") == "bruecke"
+
+
+def test_umschrift_nur_fuer_umlaute():
+    assert umschreiben("Die Brücke über den Fluss") == "bruecke ueber"
+    assert umschreiben("Poet") == ""
+    assert tokenisieren("Die Brücke", umschrift=True) == ["bruck", "brueck"]
+
+
+def test_falten_isbn_mit_bindestrichen():
+    assert falten("978-3-00-000001-1") == "9783000000011"
+
+
+def test_tokenisieren_stoppwoerter_und_stamm():
+    assert tokenisieren("Die Brücke") == tokenisieren("Brücken") == ["bruck"]
+    assert tokenisieren(None) == []
+
+
+# -----------------------------
+# Suche
+# -----------------------------
+
+def test_brucke_findet_die_bruecke():
+    index = SuchIndex(PRODUKTE)
+
+    for anfrage in ("brucke", "Brücke", "bruecke"):
+        treffer = index.suche(anfrage)
+        assert treffer.produkte[0]["name"] == "Die Brücke"
+
+
+def test_keine_verwechslung_durch_ae_oe_ue():
+    index = SuchIndex([{"id": 1, "name": "Der Poet"}, {"id": 2, "name": "Feuer und Flamme"}])
+
+    assert index.suche("pot").gesamt == 0
+    assert index.suche("feür").gesamt == 0
+    assert [p["id"] for p in index.suche("poet").produkte] == [1]
+
+
+def test_treffer_im_titel_vor_treffer_in_beschreibung():
+    treffer = SuchIndex(PRODUKTE).suche("brücke")
+
+    assert [p["id"] for p in treffer.produkte] == [1, 3]
+    assert treffer.gesamt == 2
+
+
+def test_letzter_begriff_als_praefix():
+    assert [p["id"] for p in SuchIndex(PRODUKTE).suche("jacom").produkte] == [2]
+
+
+def test_suche_nach_ean():
+    assert [p["id"] for p in SuchIndex(PRODUKTE).suche("978-3-00-000004-2").produkte] == [4]
+
+
+def test_keine_treffer():
+    treffer = SuchIndex(PRODUKTE).suche("der die das")
+
+    assert treffer.produkte == []
+    assert (treffer.gesamt, treffer.seite, treffer.seiten) == (0, 1, 1)
+
+
+def test_seiten_werden_begrenzt():
+    produkte = [{"id": i, "name": f"Buch {i}", "kategorie": "Roman"} for i in range(5)]
+    index = SuchIndex(produkte)
+
+    erste = index.suche("roman", seite=1, pro_seite=2)
+    letzte = index.suche("roman", seite=99, pro_seite=2)
+
+    assert (erste.gesamt, erste.seiten, len(erste.produkte)) == (5, 3, 2)
+    assert (letzte.seite, len(letzte.produkte)) == (3, 1)
+
+
+# -----------------------------
+# Vorschläge (Trie)
+# -----------------------------
+
+def test_vorschlag_ab_wortanfang():
+    vorschlaege = Vorschlaege(PRODUKTE)
+
+    treffer = vorschlaege.vorschlagen(praefix_normalisieren("Brü"))
+
+    # Anfang des ganzen Textes vor späterem Wortanfang
+    assert [t["text"] for t in treffer] == ["Bruno Berg", "Die Brücke"]
+    assert treffer[1]["slug"] == "die-brucke"
+
+
+def test_vorschlag_in_umschrift():
+    treffer = Vorschlaege(PRODUKTE).vorschlagen(praefix_normalisieren("Bruec"))
+
+    assert [t["text"] for t in treffer] == ["Die Brücke"]
+
+
+def test_titel_vor_autor():
+    treffer = Vorschlaege(PRODUKTE).vorschlagen("j")
+
+    assert [(t["typ"], t["text"]) for t in treffer] == [
+        ("titel", "Jacominus Gainsborough"),
+        ("autor", "Jutta Bauer"),
+    ]
+
+
+def test_vorschlag_ean_und_anzahl():
+    vorschlaege = Vorschlaege(PRODUKTE)
+
+    assert len(vorschlaege.vorschlagen("978300000", anzahl=2)) == 2
+    assert vorschlaege.vorschlagen("9783000000042")[0]["produkt_id"] == 4
+
+
+def test_vorschlag_anzahl_begrenzt():
+    vorschlaege = Vorschlaege(PRODUKTE, anzahl=3)
+
+    assert len(vorschlaege.vorschlagen("978")) == 3
+    assert len(vorschlaege.vorschlagen("978", anzahl=99)) == 3
+    assert len(vorschlaege.vorschlagen("978", anzahl=2)) == 2
+    assert len(vorschlaege.vorschlagen("978", anzahl=0)) == 1
+    assert len(vorschlaege.vorschlagen("978", anzahl=-3)) == 1
+
+
+def test_vorschlag_laenger_als_max_tiefe():
+    vorschlaege = Vorschlaege(PRODUKTE)
+    praefix = praefix_normalisieren("Jacominus Gainsborough")
+    assert len(praefix) > MAX_TIEFE
+
+    assert [t["produkt_id"] for t in vorschlaege.vorschlagen(praefix)] == [2]
+    assert vorschlaege.vorschlagen(praefix + "x") == []
+
+
+def test_vorschlag_leer_oder_unbekannt():
+    vorschlaege = Vorschlaege(PRODUKTE)
+
+    assert vorschlaege.vorschlagen("") == []
+    assert vorschlaege.vorschlagen("zzz") == []
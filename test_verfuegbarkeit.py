@@ -0,0 +1,139 @@
+import threading
+
+import pytest
+
+
+EANS = ["9783000000011", "9783000000028", "9783000000035"]
+
+
+@pytest.fixture
+def movement(shop, katalog, monkeypatch):
+    """MOVEMENT-Antworten pro EAN; Aufrufe werden gezählt"""
+    antworten = {}
+    aufrufe = []
+
+    def lade_bestand_von_api(ean):
+        aufrufe.append(ean)
+        return antworten.get(ean)
+
+    monkeypatch.setattr(shop, "lade_bestand_von_api", lade_bestand_von_api)
+    return antworten, aufrufe
+
+
+def bestand(preis=15.0, bestand=3):
+    return {"preis": preis, "bestand": bestand, "handling_zeit": "2", "erfuellungsrate": "98"}
+
+
+# -----------------------------
+# Einzelne EAN
+# -----------------------------
+
+def test_verfuegbarkeit(shop, client, movement):
+    antworten, _ = movement
+    antworten[EANS[0]] = bestand()
+
+    antwort = client.get(f"/api/produkt/{EANS[0]}/verfuegbarkeit")
+
+    assert antwort.status_code == 200
+    assert antwort.json == {"ean": EANS[0], "preis": 15.0, "bestand": 3,
+                            "handling_zeit": "2", "erfuellungsrate": "98"}
+    assert antwort.headers["Cache-Control"] == f"public, max-age={shop.VERFUEGBARKEIT_MAX_AGE}"
+    assert "Set-Cookie" not in antwort.headers
+
+    bedingt = client.get(f"/api/produkt/{EANS[0]}/verfuegbarkeit",
+                         headers={"If-None-Match": antwort.headers["ETag"]})
+    assert bedingt.status_code == 304
+
+
+def test_unbekannte_ean_ohne_upstream_call(client, movement):
+    _, aufrufe = movement
+
+    assert client.get("/api/produkt/9780000000000/verfuegbarkeit").status_code == 404
+    assert aufrufe == []
+
+
+def test_upstream_fehler_503(shop, client, katalog, buchbutler, monkeypatch):
+    def kaputt(ean):
+        raise RuntimeError("Buchbutler weg")
+
+    monkeypatch.setattr(shop, "bestand_abrufen", kaputt)
+
+    antwort = client.get(f"/api/produkt/{EANS[0]}/verfuegbarkeit")
+
+    assert antwort.status_code == 503
+    assert antwort.headers["Cache-Control"] == "no-store"
+
+
+def test_deadline_503(shop, client, katalog, monkeypatch):
+    freigabe = threading.Event()
+    monkeypatch.setattr(shop, "PRODUKT_DEADLINE", 0.05)
+    monkeypatch.setattr(shop, "lade_bestand_von_api", lambda ean: freigabe.wait(5) and bestand())
+
+    try:
+        antwort = client.get(f"/api/produkt/{EANS[0]}/verfuegbarkeit")
+    finally:
+        freigabe.set()
+
+    assert antwort.status_code == 503
+
+
+def test_pool_voll_503(shop, client, movement, monkeypatch):
+    antworten, aufrufe = movement
+    antworten[EANS[0]] = bestand()
+    monkeypatch.setattr(shop.upstream_pool, "submit", lambda *args: None)
+
+    assert client.get(f"/api/produkt/{EANS[0]}/verfuegbarkeit").status_code == 503
+    assert aufrufe == []
+
+
+# -----------------------------
+# Mehrere EANs
+# -----------------------------
+
+def test_mehrere_eans(shop, client, movement):
+    antworten, aufrufe = movement
+    antworten.update({ean: bestand(preis=i) for i, ean in enumerate(EANS, 1)})
+
+    antwort = client.get(
+        f"/api/produkte/verfuegbarkeit?ean={EANS[0]},{EANS[1]}&ean={EANS[2]}&ean={EANS[0]}&ean=9780000000000"
+    )
+
+    assert antwort.status_code == 200
+    assert {ean: p["preis"] for ean, p in antwort.json["produkte"].items()} == dict(zip(EANS, (1, 2, 3)))
+    assert sorted(aufrufe) == EANS
+    assert antwort.headers["Cache-Control"] == f"public, max-age={shop.VERFUEGBARKEIT_MAX_AGE}"
+
+
+def test_luecken_nicht_cachen(client, movement):
+    antworten, _ = movement
+    antworten[EANS[0]] = bestand()
+
+    antwort = client.get(f"/api/produkte/verfuegbarkeit?ean={EANS[0]}&ean={EANS[1]}")
+
+    assert antwort.status_code == 200
+    assert antwort.json["produkte"][EANS[1]] is None
+    assert antwort.headers["Cache-Control"] == "no-cache"
+
+
+def test_mehrere_bedingt(client, movement):
+    antworten, _ = movement
+    antworten.update({ean: bestand() for ean in EANS})
+    url = f"/api/produkte/verfuegbarkeit?ean={','.join(EANS)}"
+
+    etag = client.get(url).headers["ETag"]
+
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_hoechstzahl_eans(shop, client, movement, monkeypatch):
+    _, aufrufe = movement
+    monkeypatch.setattr(shop, "VERFUEGBARKEIT_MAX_EANS", 2)
+
+    antwort = client.get(f"/api/produkte/verfuegbarkeit?ean={','.join(EANS)}")
+
+    assert antwort.status_code == 400
+    assert aufrufe == []
+    # Unbekannte EANs zählen nicht mit
+    assert client.get(
+        f"/api/produkte/verfuegbarkeit?ean={EANS[0]},{EANS[1]},9780000000000"
+    ).status_code == 200
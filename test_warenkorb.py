@@ -0,0 +1,77 @@
+import pytest
+
+
+@pytest.fixture
+def produkt(shop):
+    """Katalogprodukt ohne eigenen Preis in produkte.json"""
+    return next(p for p in shop.katalog if p.get("ean") and not p.get("preis"))
+
+
+def betrag(order):
+    return order[0]["purchase_units"][0]["amount"]["value"]
+
+
+def test_kalter_cache_preis_aus_movement(shop, client, produkt, paypal_orders, monkeypatch):
+    monkeypatch.setattr(shop, "lade_bestand_von_api", lambda ean: {"preis": 14.9, "bestand": 2})
+    monkeypatch.setattr(shop, "lade_produkt_von_api", lambda ean: pytest.fail("MOVEMENT reicht"))
+
+    client.post("/sync-cart", json=[{"ean": produkt["ean"], "quantity": 2}])
+    antwort = client.post("/create-paypal-order")
+
+    assert antwort.status_code == 200
+    assert betrag(paypal_orders[0]) == "29.80"
+
+
+def test_ohne_movement_preis_aus_content(shop, client, produkt, paypal_orders, monkeypatch):
+    monkeypatch.setattr(shop, "lade_bestand_von_api", lambda ean: None)
+    monkeypatch.setattr(shop, "lade_produkt_von_api", lambda ean: {"name": "x", "preis": 12.0})
+
+    client.post("/sync-cart", json=[{"ean": produkt["ean"], "quantity": 1}])
+    antwort = client.post("/create-paypal-order")
+
+    assert antwort.status_code == 200
+    assert betrag(paypal_orders[0]) == "12.00"
+
+
+def test_ohne_preis_kein_checkout(shop, client, produkt, paypal_orders, monkeypatch):
+    monkeypatch.setattr(shop, "lade_bestand_von_api", lambda ean: None)
+    monkeypatch.setattr(shop, "lade_produkt_von_api", lambda ean: None)
+
+    client.post("/sync-cart", json=[{"ean": produkt["ean"], "quantity": 1}])
+    antwort = client.post("/create-paypal-order")
+
+    assert antwort.status_code == 409
+    assert antwort.json["positionen"] == [produkt["name"]]
+    assert paypal_orders == []
+
+
+def test_gemischter_warenkorb_nur_komplett(shop, client, paypal_orders, monkeypatch):
+    ohne, mit = [p for p in shop.katalog if p.get("ean") and not p.get("preis")][:2]
+    preise = {mit["ean"]: {"preis": 10.0}}
+    monkeypatch.setattr(shop, "lade_bestand_von_api", preise.get)
+    monkeypatch.setattr(shop, "lade_produkt_von_api", lambda ean: None)
+
+    client.post("/sync-cart", json=[{"ean": ohne["ean"]}, {"ean": mit["ean"]}])
+
+    assert client.post("/create-paypal-order").status_code == 409
+    assert paypal_orders == []
+
+
+def test_sync_cart_lehnt_gutschein_ab(client, produkt):
+    antwort = client.post("/sync-cart", json=[
+        {"ean": produkt["ean"], "quantity": 1},
+        {"ean": "GUTSCHEIN_CUSTOM", "price": 50, "quantity": 1},
+    ])
+
+    assert antwort.status_code == 422
+    assert antwort.json["abgelehnt"] == ["GUTSCHEIN_CUSTOM"]
+    assert antwort.json["positionen"] == 1
+
+
+def test_sync_cart_uebernimmt_keine_client_preise(shop, client, produkt, paypal_orders, monkeypatch):
+    monkeypatch.setattr(shop, "lade_bestand_von_api", lambda ean: {"preis": 20.0})
+
+    client.post("/sync-cart", json=[{"ean": produkt["ean"], "price": 0.01, "quantity": 1}])
+    client.post("/create-paypal-order")
+
+    assert betrag(paypal_orders[0]) == "20.00"